@@ -0,0 +1,92 @@
+"""Event-loop lag added by PostHog capture under load.
+
+A ticker task sleeps 1 ms in a loop and records how late it wakes up while
+producer tasks capture usage events as fast as they can.  The network is
+simulated (20 ms per batch request), so the numbers reflect only the work
+each capture path does on the event-loop thread.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/async_loop_lag.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import time
+
+import openadapt_telemetry.posthog as posthog
+from openadapt_telemetry.aio import AsyncPostHogTransport
+
+EVENTS_PER_PRODUCER = 2_000
+PRODUCERS = 4
+TICK_SECONDS = 0.001
+
+
+def _fake_post(path: str, body: bytes) -> bool:
+    time.sleep(0.02)
+    return True
+
+
+async def _ticker(stop: asyncio.Event, lags: list[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(loop.time() - started - TICK_SECONDS)
+
+
+async def _produce(capture) -> None:  # noqa: ANN001
+    for i in range(EVENTS_PER_PRODUCER):
+        await capture("action_executed", {"kind": "click", "i": i % 10})
+        await asyncio.sleep(0)
+
+
+async def _run(label: str, capture, transport: AsyncPostHogTransport | None) -> None:  # noqa: ANN001
+    stop = asyncio.Event()
+    lags: list[float] = []
+    if transport is not None:
+        await transport.start()
+    ticker = asyncio.create_task(_ticker(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(_produce(capture) for _ in range(PRODUCERS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    if transport is not None:
+        await transport.aclose(timeout=10.0)
+    else:
+        posthog.flush(timeout=10.0)
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    events = EVENTS_PER_PRODUCER * PRODUCERS
+    print(
+        f"{label:<28} {events / elapsed:>10,.0f} events/s   "
+        f"lag p50 {statistics.median(lags_ms):6.3f} ms   p99 {p99:6.3f} ms   "
+        f"max {lags_ms[-1]:7.3f} ms"
+    )
+
+
+async def _idle(event: str, properties: dict) -> bool:
+    return False
+
+
+async def _sync_capture(event: str, properties: dict) -> bool:
+    return posthog.capture_event(event, properties)
+
+
+async def main() -> None:
+    await _run("idle (no capture)", _idle, None)
+    await _run("capture_event on loop", _sync_capture, None)
+    await _run("acapture_event (threaded)", posthog.acapture_event, None)
+    await _run("acapture_event (asyncio)", posthog.acapture_event, AsyncPostHogTransport())
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("OPENADAPT_TELEMETRY_ENABLED", "true")
+    os.environ.setdefault("OPENADAPT_TELEMETRY_DISTINCT_ID", "benchmark")
+    os.environ["OPENADAPT_POSTHOG_OVERFLOW_POLICY"] = "drop_newest"
+    posthog._post = _fake_post
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""Caller-thread latency of capture_event, eager vs. deferred build.
+
+With ``OPENADAPT_POSTHOG_DEFER_BUILD`` the caller only samples, rate limits,
+snapshots the properties and enqueues; scrubbing and payload building move
+to the sender.  The sender is not started here, so the numbers are pure
+caller-side cost.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/capture_latency.py
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import timeit
+
+import openadapt_telemetry.posthog as posthog
+
+ITERATIONS = 2_000
+PROPERTIES = {
+    "entrypoint": "oa evals run",
+    "mode": "live",
+    "kind": "click",
+    "step": 12,
+    "duration_ms": 3.5,
+}
+
+
+def _per_call_us(func) -> float:  # noqa: ANN001
+    timings = []
+    for _ in range(5):
+        sink: queue.Queue = queue.Queue()
+        posthog._ensure_worker = lambda sink=sink: sink  # type: ignore[assignment]
+        timings.append(timeit.timeit(func, number=ITERATIONS))
+    return min(timings) / ITERATIONS * 1e6
+
+
+def main() -> None:
+    os.environ["OPENADAPT_TELEMETRY_ENABLED"] = "true"
+    os.environ["OPENADAPT_TELEMETRY_DISTINCT_ID"] = "bench"
+    capture = lambda: posthog.capture_event("action_executed", PROPERTIES)  # noqa: E731
+    os.environ.pop("OPENADAPT_POSTHOG_DEFER_BUILD", None)
+    print(f"capture_event (eager build)      {_per_call_us(capture):7.2f} us/call")
+    os.environ["OPENADAPT_POSTHOG_DEFER_BUILD"] = "1"
+    print(f"capture_event (deferred build)   {_per_call_us(capture):7.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
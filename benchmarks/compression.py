@@ -0,0 +1,104 @@
+"""CPU cost vs. bytes saved when gzipping PostHog ``/batch/`` bodies.
+
+Builds batches the way the sender does for three event mixes (small usage
+events, automation failure signals, and an even mix) and reports, per gzip
+level, the compressed size relative to the raw body and the time to compress
+one batch.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/compression.py
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import timeit
+
+import openadapt_telemetry.posthog as posthog
+from openadapt_telemetry.compression import BodyCompressor
+from openadapt_telemetry.failure_signals import (
+    ActionKind,
+    AutomationFailureSignal,
+    DeliveryState,
+    EffectTier,
+    ExecutionOutcome,
+    ExecutionProfile,
+    FailureKind,
+    IdentityState,
+    ResolutionRung,
+    RiskClass,
+    Substrate,
+    _failure_payload,
+)
+
+BATCH_EVENTS = 100
+LEVELS = (1, 6, 9)
+
+
+def _usage(rng: random.Random) -> dict:
+    properties = {
+        "entrypoint": rng.choice(["oa evals run", "oa record", "oa replay"]),
+        "kind": rng.choice(["click", "type", "scroll", "key"]),
+        "step": rng.randrange(500),
+        "duration_ms": round(rng.uniform(0.5, 900.0), 2),
+    }
+    return posthog._usage_payload("action_executed", properties, "openadapt").to_payload()
+
+
+def _failure(rng: random.Random) -> dict:
+    signal = AutomationFailureSignal(
+        failure_kind=rng.choice(list(FailureKind)),
+        substrate=rng.choice(list(Substrate)),
+        action_kind=rng.choice(list(ActionKind)),
+        risk_class=rng.choice(list(RiskClass)),
+        resolution_rung=rng.choice(list(ResolutionRung)),
+        identity_state=rng.choice(list(IdentityState)),
+        effect_tier=rng.choice(list(EffectTier)),
+        delivery_state=rng.choice(list(DeliveryState)),
+        execution_profile=rng.choice(list(ExecutionProfile)),
+        outcome=rng.choice(list(ExecutionOutcome)),
+        runtime_version="1.23.0",
+        model_calls=rng.randrange(4),
+        external_network_calls="none",
+        occurred_at="2026-07-26T19:37:22+00:00",
+    )
+    return _failure_payload(signal).to_payload()
+
+
+def _body(make, rng: random.Random) -> bytes:  # noqa: ANN001
+    return b"".join(
+        (
+            b'{"api_key":"phc_bench","batch":[',
+            b",".join(posthog._encode_event(make(rng)) for _ in range(BATCH_EVENTS)),
+            b"]}",
+        )
+    )
+
+
+def main() -> None:
+    os.environ["OPENADAPT_TELEMETRY_ENABLED"] = "true"
+    os.environ["OPENADAPT_TELEMETRY_DISTINCT_ID"] = "bench"
+    rng = random.Random(0)
+    mixes = {
+        "usage": lambda r: _usage(r),
+        "failure": lambda r: _failure(r),
+        "mixed": lambda r: _usage(r) if r.random() < 0.5 else _failure(r),
+    }
+    print(f"{BATCH_EVENTS} events per batch")
+    print(f"{'mix':<8} {'raw':>8} {'level':>5} {'gzipped':>8} {'ratio':>6} {'time':>9}")
+    for name, make in mixes.items():
+        body = _body(make, rng)
+        for level in LEVELS:
+            compressor = BodyCompressor(level=level, min_bytes=0)
+            compressed = compressor.compress(body)
+            seconds = min(timeit.repeat(lambda: compressor.compress(body), number=50, repeat=5))
+            print(
+                f"{name:<8} {len(body):>8} {level:>5} {len(compressed):>8}"
+                f" {len(compressed) / len(body):>6.2f} {seconds / 50 * 1e6:>7.0f}us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Per-event cost of encoding a queued usage event as a ``/batch/`` item.
+
+"dict + json.dumps" is the path the sender took before: expand the compact
+record into the payload dict and serialize all of it.  ``QueuedEvent.encode``
+reuses cached fragments for the constant sections and serializes only the
+timestamp and the caller's properties, with ``orjson`` when installed.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/encode_event.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import timeit
+
+import openadapt_telemetry.posthog as posthog
+from openadapt_telemetry import queueing
+
+ITERATIONS = 20_000
+PROPERTIES = {"entrypoint": "oa evals run", "mode": "live", "kind": "click", "step": 12}
+
+
+def _per_call_us(func) -> float:  # noqa: ANN001
+    return min(timeit.repeat(func, number=ITERATIONS, repeat=5)) / ITERATIONS * 1e6
+
+
+def _reference(event: queueing.QueuedEvent) -> bytes:
+    payload = event.to_payload()
+    return json.dumps({k: v for k, v in payload.items() if k != "api_key"}).encode("utf-8")
+
+
+def main() -> None:
+    os.environ["OPENADAPT_TELEMETRY_ENABLED"] = "true"
+    os.environ["OPENADAPT_TELEMETRY_DISTINCT_ID"] = "bench"
+    for properties, label in ((PROPERTIES, "4 properties"), ({}, "no properties")):
+        event = posthog._usage_payload("action_executed", properties, "openadapt")
+        print(f"{label}:")
+        print(f"  dict + json.dumps            {_per_call_us(lambda: _reference(event)):6.2f} us")
+        accelerator = queueing._orjson
+        queueing._orjson = None
+        print(f"  QueuedEvent.encode (stdlib)  {_per_call_us(event.encode):6.2f} us")
+        queueing._orjson = accelerator
+        if accelerator is not None:
+            print(f"  QueuedEvent.encode (orjson)  {_per_call_us(event.encode):6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Failure-signal batches: schema preset dictionary vs. plain gzip.
+
+Encodes batches of random automation failure signals as JSON lines and
+compares the compressed size and encode time of gzip (level 9) against
+:func:`encode_failure_signals`.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/failure_codec.py
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import timeit
+
+from openadapt_telemetry.failure_signals import (
+    ActionKind,
+    AutomationFailureSignal,
+    DeliveryState,
+    EffectTier,
+    ExecutionOutcome,
+    ExecutionProfile,
+    FailureKind,
+    IdentityState,
+    ResolutionRung,
+    RiskClass,
+    Substrate,
+    encode_failure_signals,
+)
+
+BATCH_SIZES = (1, 10, 100)
+
+
+def _signal(rng: random.Random) -> AutomationFailureSignal:
+    return AutomationFailureSignal(
+        failure_kind=rng.choice(list(FailureKind)),
+        substrate=rng.choice(list(Substrate)),
+        action_kind=rng.choice(list(ActionKind)),
+        risk_class=rng.choice(list(RiskClass)),
+        resolution_rung=rng.choice(list(ResolutionRung)),
+        identity_state=rng.choice(list(IdentityState)),
+        effect_tier=rng.choice(list(EffectTier)),
+        delivery_state=rng.choice(list(DeliveryState)),
+        execution_profile=rng.choice(list(ExecutionProfile)),
+        outcome=rng.choice(list(ExecutionOutcome)),
+        runtime_version="1.23.0",
+        model_calls=rng.randrange(4),
+        external_network_calls=rng.choice(["none", "observed", "unknown"]),
+        occurred_at="2026-07-26T19:37:22+00:00",
+    )
+
+
+def main() -> None:
+    rng = random.Random(0)
+    print(f"{'events':>6} {'raw':>7} {'gzip-9':>7} {'zdict':>7} {'gzip us':>8} {'zdict us':>9}")
+    for size in BATCH_SIZES:
+        envelopes = [_signal(rng).to_envelope() for _ in range(size)]
+        raw = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in envelopes).encode()
+        gzip_time = min(timeit.repeat(lambda: gzip.compress(raw, 9), number=100, repeat=5))
+        zdict_time = min(
+            timeit.repeat(lambda: encode_failure_signals(envelopes), number=100, repeat=5)
+        )
+        print(
+            f"{size:>6} {len(raw):>7} {len(gzip.compress(raw, 9)):>7}"
+            f" {len(encode_failure_signals(envelopes)):>7}"
+            f" {gzip_time * 1e4:>8.0f} {zdict_time * 1e4:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Cost of the privacy scrubber on typical Sentry event content.
+
+Reports per-string ``scrub_string`` cost against the sequential reference
+(every pattern applied in turn), and the cost of ``before_send`` on a
+synthetic exception event with 60 frames, local variables, breadcrumbs and
+extra data.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/privacy_scrub.py
+"""
+
+from __future__ import annotations
+
+import copy
+import timeit
+
+from openadapt_telemetry import privacy
+
+STRINGS = {
+    "identifier": "openadapt_telemetry.posthog",
+    "message": "Failed to open file config.yaml in directory build/output after 3 retries",
+    "short": "KeyError: 'missing_key'",
+    "sensitive": "user john@example.com failed login from 555-123-4567",
+}
+
+
+def _event() -> dict:
+    frames = [
+        {
+            "filename": f"openadapt/module_{i % 12}.py",
+            "abs_path": f"/home/alice/code/openadapt/module_{i % 12}.py",
+            "function": f"handler_{i}",
+            "vars": {"self": "<Runner object>", "step": str(i), "name": "click", "retries": "3"},
+        }
+        for i in range(60)
+    ]
+    return {
+        "message": "Replay failed while resolving target",
+        "exception": {
+            "values": [
+                {"value": "TimeoutError: element not found", "stacktrace": {"frames": frames}}
+            ]
+        },
+        "breadcrumbs": {
+            "values": [
+                {"message": f"step {i} executed", "data": {"kind": "click", "index": i}}
+                for i in range(30)
+            ]
+        },
+        "extra": {"mode": "live", "entrypoint": "oa replay", "workflow": "invoice_entry"},
+        "tags": {"package": "openadapt", "os": "linux"},
+    }
+
+
+def _per_call_us(func, number: int) -> float:  # noqa: ANN001
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    print("scrub_string per string:")
+    for label, value in STRINGS.items():
+        reference = _per_call_us(lambda: privacy._scrub_string_sequential(value), 20_000)
+        current = _per_call_us(lambda: privacy.scrub_string(value), 20_000)
+        print(f"  {label:<11} sequential {reference:6.2f} us   scrub_string {current:6.2f} us")
+
+    before_send = privacy.create_before_send_filter()
+    template = _event()
+    events = [copy.deepcopy(template) for _ in range(505)]
+    it = iter(events)
+    print(
+        f"before_send, 60-frame event: {_per_call_us(lambda: before_send(next(it), {}), 100):7.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Cost of the PostHog rate-limiter check.
+
+Times ``RateLimiter.admit`` with both the per-event and per-package buckets
+enabled, for an admitted steady state and a suppressed (runaway) state.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/rate_limit.py
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from openadapt_telemetry.ratelimit import RateLimiter
+
+ITERATIONS = 200_000
+
+
+def _per_call_us(func) -> float:  # noqa: ANN001
+    return min(timeit.repeat(func, number=ITERATIONS, repeat=5)) / ITERATIONS * 1e6
+
+
+def main() -> None:
+    admitted = RateLimiter(event_rate=1e9, event_burst=1e9, package_rate=1e9, package_burst=1e9)
+    suppressed = RateLimiter(event_rate=1e-9, event_burst=1, package_rate=1e9, package_burst=1e9)
+    suppressed.admit("action_executed", "openadapt")
+    print(
+        "admit (admitted)     "
+        f"{_per_call_us(lambda: admitted.admit('action_executed', 'openadapt')):6.3f} us/call"
+    )
+    print(
+        "admit (suppressed)   "
+        f"{_per_call_us(lambda: suppressed.admit('action_executed', 'openadapt')):6.3f} us/call"
+    )
+
+
+if __name__ == "__main__":
+    main()
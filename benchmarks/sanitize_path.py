@@ -0,0 +1,58 @@
+"""Cost of sanitizing stack-frame paths, per 60-frame exception.
+
+Compares the five ``re.sub`` calls on pattern strings (the previous
+implementation) with the precompiled, memoized ``sanitize_path`` on an
+exception whose frames come from a small set of files, as in an error storm.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/sanitize_path.py
+"""
+
+from __future__ import annotations
+
+import re
+import time
+
+from openadapt_telemetry import privacy
+
+FILES = [
+    "/home/alice/.venv/lib/python3.12/site-packages/openadapt/runtime.py",
+    "/home/alice/.venv/lib/python3.12/site-packages/openadapt/steps.py",
+    "/home/alice/.venv/lib/python3.12/site-packages/httpx/_client.py",
+    "/home/alice/work/flows/invoice.py",
+    "/usr/lib/python3.12/asyncio/base_events.py",
+    "/usr/lib/python3.12/threading.py",
+]
+FRAMES = 60
+ROUNDS = 5_000
+
+
+def _sequential(path: str) -> str:
+    path = re.sub(r"/Users/[^/]+/", "/Users/<user>/", path)
+    path = re.sub(r"/home/[^/]+/", "/home/<user>/", path)
+    path = re.sub(r"C:\\Users\\[^\\]+\\", r"C:\\Users\\<user>\\", path)
+    path = re.sub(r"C:\\\\Users\\\\[^\\\\]+\\\\", r"C:\\\\Users\\\\<user>\\\\", path)
+    return re.sub(r"C:/Users/[^/]+/", "C:/Users/<user>/", path)
+
+
+def _us_per_exception(sanitize, paths: list[str]) -> float:  # noqa: ANN001
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for path in paths:
+            sanitize(path)
+    return (time.perf_counter() - started) / ROUNDS * 1e6
+
+
+def main() -> None:
+    # filename and abs_path for every frame.
+    paths = [FILES[i % len(FILES)] for i in range(FRAMES)] * 2
+    for label, sanitize in (
+        ("re.sub cascade", _sequential),
+        ("sanitize_path", privacy.sanitize_path),
+    ):
+        print(f"{label:<16} {_us_per_exception(sanitize, paths):7.1f} us per exception")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Per-event cost of the usage-enabled check.
+
+Compares resolving the decision from scratch (env, CI detection, walking up
+to the nearest pyproject.toml and parsing it) with the cached fast path, and
+times ``capture_event`` end to end with the sender queue stubbed out.
+
+Run from a project checkout (so a pyproject.toml is found) with::
+
+    PYTHONPATH=src python benchmarks/usage_decision.py
+"""
+
+from __future__ import annotations
+
+import os
+import timeit
+
+import openadapt_telemetry.posthog as posthog
+
+ITERATIONS = 20_000
+
+
+class _NullQueue:
+    def put_nowait(self, payload: dict) -> None:
+        return None
+
+    def qsize(self) -> int:
+        return 0
+
+
+def _per_call_us(func, number: int = ITERATIONS) -> float:  # noqa: ANN001
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def _uncached() -> bool:
+    posthog.invalidate_usage_cache()
+    return posthog._usage_enabled()
+
+
+def main() -> None:
+    os.environ.pop("DO_NOT_TRACK", None)
+    os.environ["OPENADAPT_TELEMETRY_IN_CI"] = "true"
+    os.environ["OPENADAPT_TELEMETRY_DISTINCT_ID"] = "bench"
+    posthog._ensure_worker = lambda: _NullQueue()  # type: ignore[assignment]
+
+    print(f"_usage_enabled (resolved)   {_per_call_us(_uncached, ITERATIONS // 10):8.2f} us/call")
+    posthog._usage_enabled()
+    print(f"_usage_enabled (cached)     {_per_call_us(posthog._usage_enabled):8.2f} us/call")
+    capture = lambda: posthog.capture_event("action_executed", {"kind": "click"})  # noqa: E731
+    print(f"capture_event (cached)      {_per_call_us(capture, ITERATIONS // 10):8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
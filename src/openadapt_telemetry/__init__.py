@@ -49,6 +49,7 @@ Opt-out:
     export OPENADAPT_TELEMETRY_ENABLED=false
 """
 
+from openadapt_telemetry.aio import AsyncPostHogTransport
 from openadapt_telemetry.client import (
     TelemetryClient,
     get_telemetry,
@@ -94,13 +95,18 @@ from openadapt_telemetry.failure_signals import (
     ResolutionRung,
     RiskClass,
     Substrate,
+    acapture_automation_failure,
     capture_automation_failure,
+    decode_failure_signals,
+    encode_failure_signals,
+    failure_signal_dictionary,
 )
 from openadapt_telemetry.posthog import (
-    capture_event as capture_posthog_event,
+    acapture_usage_event,
+    capture_usage_event,
 )
 from openadapt_telemetry.posthog import (
-    capture_usage_event,
+    capture_event as capture_posthog_event,
 )
 from openadapt_telemetry.privacy import (
     PII_DENYLIST,
@@ -169,7 +175,13 @@ __all__ = [
     "ExecutionProfile",
     "ExecutionOutcome",
     "capture_automation_failure",
+    "acapture_automation_failure",
+    "encode_failure_signals",
+    "decode_failure_signals",
+    "failure_signal_dictionary",
     # PostHog usage events
     "capture_posthog_event",
     "capture_usage_event",
+    "acapture_usage_event",
+    "AsyncPostHogTransport",
 ]
@@ -0,0 +1,133 @@
+"""Client-side rollups of repeated PostHog usage events.
+
+Hot loops can capture the same event with the same properties thousands of
+times per run.  When aggregation is enabled, :class:`EventAggregator` folds
+those calls into one event per distinct ``(event, distinct_id, properties)``
+per window, carrying:
+
+- ``count``: how many calls were folded together
+- ``first_seen`` / ``last_seen``: Unix timestamps of the first and last call
+
+Windows are tumbling: the first event after an idle period arms a timer and
+every pending rollup is emitted when it fires.  Memory is bounded by
+``max_keys``; the least recently used rollup is emitted early when a new key
+would exceed it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Hashable
+
+DEFAULT_MAX_KEYS = 1000
+
+
+def _rollup_key(payload: dict[str, Any]) -> Hashable:
+    properties = payload.get("properties", {})
+    return (
+        payload.get("api_key"),
+        payload.get("event"),
+        payload.get("distinct_id"),
+        frozenset(item for item in properties.items() if item[0] != "timestamp"),
+    )
+
+
+class _Rollup:
+    __slots__ = ("payload", "count", "first_seen", "last_seen")
+
+    def __init__(self, payload: dict[str, Any], now: float) -> None:
+        self.payload = payload
+        self.count = 1
+        self.first_seen = now
+        self.last_seen = now
+
+    def to_payload(self) -> dict[str, Any]:
+        properties = {
+            **self.payload.get("properties", {}),
+            "timestamp": int(self.first_seen),
+            "count": self.count,
+            "first_seen": round(self.first_seen, 3),
+            "last_seen": round(self.last_seen, 3),
+        }
+        return {
+            **self.payload,
+            "properties": properties,
+            # Emission happens up to a window later; pin the event to its first call.
+            "timestamp": datetime.fromtimestamp(self.first_seen, timezone.utc).isoformat(),
+        }
+
+
+class EventAggregator:
+    """Folds identical usage payloads into counted rollups.
+
+    Thread-safe.  ``emit`` receives each finished rollup payload and is always
+    called without the aggregator's lock held.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        emit: Callable[[dict[str, Any]], object],
+        max_keys: int = DEFAULT_MAX_KEYS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.window = window
+        self.max_keys = max(1, max_keys)
+        self._emit = emit
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rollups: OrderedDict[Hashable, _Rollup] = OrderedDict()
+        self._timer: threading.Timer | None = None
+
+    def add(self, payload: dict[str, Any]) -> bool:
+        """Fold ``payload`` into its rollup; always returns True."""
+        key = _rollup_key(payload)
+        now = self._clock()
+        evicted: _Rollup | None = None
+        with self._lock:
+            rollup = self._rollups.get(key)
+            if rollup is not None:
+                rollup.count += 1
+                rollup.last_seen = now
+                self._rollups.move_to_end(key)
+            else:
+                self._rollups[key] = _Rollup(payload, now)
+                if len(self._rollups) > self.max_keys:
+                    _, evicted = self._rollups.popitem(last=False)
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self._on_window)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if evicted is not None:
+            self._emit(evicted.to_payload())
+        return True
+
+    def pending(self) -> int:
+        """Number of distinct rollups waiting for the window to close."""
+        with self._lock:
+            return len(self._rollups)
+
+    def flush(self) -> int:
+        """Emit every pending rollup now; returns how many were emitted."""
+        with self._lock:
+            rollups = list(self._rollups.values())
+            self._rollups.clear()
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        for rollup in rollups:
+            self._emit(rollup.to_payload())
+        return len(rollups)
+
+    def _on_window(self) -> None:
+        with self._lock:
+            if self._timer is not threading.current_thread():
+                return  # superseded by a flush
+            rollups = list(self._rollups.values())
+            self._rollups.clear()
+            self._timer = None
+        for rollup in rollups:
+            self._emit(rollup.to_payload())
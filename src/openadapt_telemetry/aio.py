@@ -0,0 +1,185 @@
+"""asyncio-native PostHog transport.
+
+:func:`~openadapt_telemetry.posthog.acapture_event` already keeps blocking
+work off the event loop.  By default it hands the built payload to the
+threaded sender.  Agents that live on one event loop can instead run an
+:class:`AsyncPostHogTransport`, which batches events on an ``asyncio.Queue``
+from a background task on the running loop and performs every network and
+disk operation (encoding, sending, retries, spooling) in a dedicated
+single-thread executor::
+
+    async with AsyncPostHogTransport():
+        await acapture_event("agent_run", {"mode": "live"})
+
+Batches are limited by the same ``OPENADAPT_POSTHOG_BATCH_*`` settings as the
+threaded sender, and overflow is counted in the same drop accounting.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from . import posthog
+
+_running: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncPostHogTransport] = (
+    weakref.WeakKeyDictionary()
+)
+# Wakes a lingering batch collector so flush() does not wait out the linger time.
+_WAKE: dict[str, Any] = {}
+
+
+def _reset_after_fork() -> None:
+    # A forked child does not inherit the event loop's running task or executor.
+    _running.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def running_transport() -> AsyncPostHogTransport | None:
+    """Return the transport started on the current event loop, if any."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    return _running.get(loop)
+
+
+def _encode_and_deliver(payloads: list[posthog._QueueItem], max_bytes: int) -> None:
+    """Encode payloads and deliver them in byte-bounded batches (executor thread)."""
+    batch: list[tuple[posthog._Sendable, bytes]] = []
+    size = 0
+    for item in payloads:
+        payload = posthog._prepare(item, aggregate=False)
+        if payload is None:
+            continue
+        encoded = posthog._encode_event(payload)
+        if batch and size + len(encoded) + 1 > max_bytes:
+            posthog._deliver(batch)
+            batch, size = [], 0
+        batch.append((payload, encoded))
+        size += len(encoded) + 1
+    if batch:
+        posthog._deliver(batch)
+
+
+class AsyncPostHogTransport:
+    """Batches usage events on the running loop and sends them off-loop."""
+
+    def __init__(self, maxsize: int = posthog.QUEUE_MAXSIZE) -> None:
+        self.maxsize = maxsize
+        self._queue: asyncio.Queue[posthog._QueueItem] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self) -> None:
+        """Start the batching task on the running loop and make it current."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="oa-posthog-aio")
+        self._task = self._loop.create_task(self._run(), name="oa-posthog-aio")
+        _running[self._loop] = self
+
+    def enqueue(self, payload: posthog._QueueItem) -> bool:
+        """Queue a built payload; never blocks.  Returns False when dropped."""
+        if self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            posthog._record_dropped([payload], "queue_full")
+            return False
+        return True
+
+    async def _run(self) -> None:
+        assert self._queue is not None and self._loop is not None
+        max_events, max_bytes, linger_seconds = posthog._batch_limits()
+        while True:
+            first = await self._queue.get()
+            if first is _WAKE:
+                self._queue.task_done()
+                continue
+            batch = [first]
+            taken = 1
+            deadline = self._loop.time() + linger_seconds
+            while len(batch) < max_events:
+                try:
+                    payload = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - self._loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        payload = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                taken += 1
+                if payload is _WAKE:
+                    break
+                batch.append(payload)
+            try:
+                await self._loop.run_in_executor(
+                    self._executor, _encode_and_deliver, batch, max_bytes
+                )
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    async def flush(self, timeout: float = posthog.FLUSH_TIMEOUT_SECONDS) -> bool:
+        """Wait until every queued event has been sent, spooled or dropped."""
+        if self._queue is None:
+            return True
+        try:
+            self._queue.put_nowait(_WAKE)
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def aclose(self, timeout: float = posthog.FLUSH_TIMEOUT_SECONDS) -> bool:
+        """Flush within ``timeout``, then spool or drop the rest and stop."""
+        delivered = await self.flush(timeout)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        leftover: list[posthog._Sendable] = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                payload = None if item is _WAKE else posthog._materialize(item, aggregate=False)
+                if payload is not None:
+                    leftover.append(payload)
+        if leftover and self._loop is not None:
+            spooled = await self._loop.run_in_executor(
+                self._executor, posthog._spool_payloads, leftover
+            )
+            if not spooled:
+                posthog._record_dropped(leftover, "shutdown")
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self._loop is not None and _running.get(self._loop) is self:
+            del _running[self._loop]
+        self._task = None
+        self._queue = None
+        return delivered and not leftover
+
+    async def __aenter__(self) -> AsyncPostHogTransport:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
@@ -9,6 +9,8 @@ from __future__ import annotations
 import os
 import platform
 import sys
+import threading
+import time
 import warnings
 from pathlib import Path
 from typing import Any, Callable, Dict, Optional
@@ -393,14 +395,27 @@ class TelemetryClient:
         )
 
     def flush(self, timeout: float = 2.0) -> None:
-        """Flush pending events to the backend.
+        """Flush pending events to both backends.
+
+        Sentry and the PostHog usage queue are flushed in parallel, so the
+        call returns within ``timeout`` overall rather than per backend.
 
         Args:
             timeout: Maximum time to wait in seconds.
         """
-        if not self._enabled or not self._initialized:
-            return
-        sentry_sdk.flush(timeout=timeout)
+        from . import posthog
+
+        deadline = time.monotonic() + timeout
+        posthog_flush: Optional[threading.Thread] = None
+        if posthog._event_queue is not None:
+            posthog_flush = threading.Thread(
+                target=posthog.flush, args=(timeout,), daemon=True, name="oa-posthog-flush"
+            )
+            posthog_flush.start()
+        if self._enabled and self._initialized:
+            sentry_sdk.flush(timeout=timeout)
+        if posthog_flush is not None:
+            posthog_flush.join(max(0.0, deadline - time.monotonic()))
 
 
 # Convenience function for singleton access
@@ -0,0 +1,85 @@
+"""Request-body compression for telemetry uploads.
+
+JSON event batches are highly repetitive (the same keys, package names and
+platform strings in every event) and typically gzip to a fraction of their
+size.  :class:`BodyCompressor` gzips bodies above a size threshold and
+reports the ``Content-Encoding`` to send with them; bodies below the
+threshold, or that would not shrink, are sent as they are.
+
+Building a deflate state costs more than compressing a small batch, so each
+compressor keeps a pristine template and copies it per request instead of
+initializing a new one.
+
+:class:`DictionaryCodec` is zlib with a preset dictionary, for closed-schema
+streams whose keys and values are known in advance; both ends must hold the
+same dictionary, so it is for relays and exports rather than PostHog
+ingestion, which only accepts gzip.
+"""
+
+from __future__ import annotations
+
+import zlib
+
+DEFAULT_LEVEL = 6
+DEFAULT_MIN_BYTES = 1024
+# zlib window bits selecting the gzip container (header and CRC trailer).
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+# zlib header flag (second byte) set when a preset dictionary was used.
+_FDICT = 0x20
+
+
+class BodyCompressor:
+    """Gzips request bodies of at least ``min_bytes`` at ``level`` (1-9).
+
+    Thread-safe: the template is only ever copied, and zlib serializes
+    access to a compression object.
+    """
+
+    encoding = "gzip"
+
+    def __init__(self, level: int = DEFAULT_LEVEL, min_bytes: int = DEFAULT_MIN_BYTES) -> None:
+        self.level = min(9, max(1, level))
+        self.min_bytes = max(0, min_bytes)
+        self._template = zlib.compressobj(self.level, zlib.DEFLATED, _GZIP_WBITS)
+
+    def compress(self, body: bytes) -> bytes:
+        """Gzip ``body`` unconditionally."""
+        compressor = self._template.copy()
+        return compressor.compress(body) + compressor.flush()
+
+    def encode(self, body: bytes) -> tuple[bytes, str | None]:
+        """Return ``(body, content_encoding)``; the encoding is None when left as is."""
+        if len(body) < self.min_bytes:
+            return body, None
+        compressed = self.compress(body)
+        if len(compressed) >= len(body):
+            return body, None
+        return compressed, self.encoding
+
+
+class DictionaryCodec:
+    """zlib with a preset dictionary (``zdict``).
+
+    The zlib header carries the dictionary's Adler-32 checksum, so
+    decompressing with a different dictionary fails instead of producing
+    garbage.
+    """
+
+    def __init__(self, zdict: bytes, level: int = 9) -> None:
+        self.zdict = zdict
+        self.level = min(9, max(1, level))
+        self._template = zlib.compressobj(self.level, zlib.DEFLATED, zlib.MAX_WBITS, zdict=zdict)
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = self._template.copy()
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        """Inverse of :meth:`compress`; raises ``zlib.error`` on foreign input."""
+        if len(data) < 2 or not data[1] & _FDICT:
+            raise zlib.error("stream was not compressed with a preset dictionary")
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS, zdict=self.zdict)
+        result = decompressor.decompress(data) + decompressor.flush()
+        if not decompressor.eof:
+            raise zlib.error("truncated stream")
+        return result
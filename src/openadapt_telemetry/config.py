@@ -30,6 +30,7 @@ DEFAULTS = {
     "feature_usage": True,
     "send_default_pii": False,
     "anon_salt": None,
+    "usage_sample_rates": {},
 }
 
 # Config file location
@@ -53,6 +54,8 @@ class TelemetryConfig:
     feature_usage: bool = True
     send_default_pii: bool = False
     anon_salt: Optional[str] = None
+    # PostHog usage-event sampling: event-name glob pattern -> keep rate.
+    usage_sample_rates: dict[str, float] = field(default_factory=dict)
 
     _loaded: bool = field(default=False, repr=False)
 
@@ -64,6 +67,11 @@ class TelemetryConfig:
             raise ValueError(
                 f"traces_sample_rate must be between 0.0 and 1.0, got {self.traces_sample_rate}"
             )
+        for pattern, rate in self.usage_sample_rates.items():
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(
+                    f"usage_sample_rates[{pattern!r}] must be between 0.0 and 1.0, got {rate}"
+                )
 
 
 def _parse_bool(value: str) -> bool:
@@ -71,6 +79,71 @@ def _parse_bool(value: str) -> bool:
     return value.lower() in ("true", "1", "yes", "on")
 
 
+def _is_valid_sample_rate(rate: Any) -> bool:
+    """Check whether a usage sampling rate is a number between 0.0 and 1.0."""
+    return isinstance(rate, (int, float)) and not isinstance(rate, bool) and 0.0 <= rate <= 1.0
+
+
+def _warn_invalid_sample_rates(source: str, entries: list[str]) -> None:
+    warnings.warn(
+        f"Ignoring invalid {source} entries (rates must be 0.0-1.0): {', '.join(entries)}",
+        stacklevel=3,
+    )
+
+
+def _parse_sample_rates(value: str) -> dict[str, float]:
+    """Parse ``"pattern=rate,pattern=rate"`` into a sampling-rule table.
+
+    Malformed entries and rates outside 0.0-1.0 are skipped, with a warning,
+    without discarding the valid ones.
+    """
+    rules: dict[str, float] = {}
+    invalid: list[str] = []
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        pattern, sep, rate = entry.partition("=")
+        try:
+            parsed = float(rate) if sep and pattern.strip() else None
+        except ValueError:
+            parsed = None
+        if not _is_valid_sample_rate(parsed):
+            invalid.append(entry.strip())
+            continue
+        rules[pattern.strip()] = parsed
+    if invalid:
+        _warn_invalid_sample_rates("OPENADAPT_POSTHOG_SAMPLE_RATES", invalid)
+    return rules
+
+
+def _filter_sample_rates(rules: Any) -> dict[str, float]:
+    """Keep the valid entries of a config-file sampling-rule table."""
+    if not isinstance(rules, dict):
+        return {}
+    valid = {
+        pattern: float(rate)
+        for pattern, rate in rules.items()
+        if isinstance(pattern, str) and pattern and _is_valid_sample_rate(rate)
+    }
+    if len(valid) < len(rules):
+        invalid = [f"{pattern}={rate}" for pattern, rate in rules.items() if pattern not in valid]
+        _warn_invalid_sample_rates("usage_sample_rates", invalid)
+    return valid
+
+
+def load_usage_sample_rates() -> dict[str, float]:
+    """Load the PostHog usage sampling rules alone.
+
+    ``OPENADAPT_POSTHOG_SAMPLE_RATES`` replaces the config file's
+    ``usage_sample_rates``.  Unlike :func:`load_config`, an invalid Sentry
+    setting or a single bad rule never discards the remaining rules.
+    """
+    env_rules = os.getenv("OPENADAPT_POSTHOG_SAMPLE_RATES")
+    if env_rules:
+        return _parse_sample_rates(env_rules)
+    return _filter_sample_rates(_load_config_file().get("usage_sample_rates"))
+
+
 def _load_config_file() -> dict[str, Any]:
     """Load configuration from file if it exists."""
     if not CONFIG_FILE.exists():
@@ -128,6 +201,10 @@ def _get_env_config() -> dict[str, Any]:
         except ValueError:
             pass
 
+    usage_sample_rates = os.getenv("OPENADAPT_POSTHOG_SAMPLE_RATES")
+    if usage_sample_rates:
+        config["usage_sample_rates"] = _parse_sample_rates(usage_sample_rates)
+
     # Optional override for deterministic anonymization in controlled environments.
     anon_salt = os.getenv("OPENADAPT_TELEMETRY_ANON_SALT")
     if anon_salt:
@@ -210,6 +287,8 @@ def load_config() -> TelemetryConfig:
 
     # Layer in config file
     file_config = _load_config_file()
+    if "usage_sample_rates" in file_config:
+        file_config["usage_sample_rates"] = _filter_sample_rates(file_config["usage_sample_rates"])
     merged.update(file_config)
 
     # Layer in environment variables (highest priority)
@@ -242,6 +321,7 @@ def save_config(config: TelemetryConfig) -> None:
         "feature_usage": config.feature_usage,
         "send_default_pii": config.send_default_pii,
         "anon_salt": config.anon_salt,
+        "usage_sample_rates": config.usage_sample_rates,
     }
 
     with open(CONFIG_FILE, "w") as f:
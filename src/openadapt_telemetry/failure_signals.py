@@ -13,15 +13,20 @@ identity, effect, risk, or policy contract.
 
 from __future__ import annotations
 
+import functools
 import hashlib
 import json
 import re
+import zlib
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any
+from typing import Any, Iterable, Mapping
 
-from .posthog import _base_properties, _queue_capture_payload, _usage_enabled
+from .compression import DictionaryCodec
+from .posthog import _acapture, _admit, _build_payload, _submit, _usage_enabled
+from .queueing import QueuedEvent
+from .ratelimit import SUPPRESSED_PROPERTY
 
 FAILURE_SIGNAL_SCHEMA = "openadapt.automation-failure-signal/v1"
 FAILURE_SIGNAL_EVENT = "automation_failure_observed"
@@ -263,13 +268,99 @@ def capture_automation_failure(
     """
     if not isinstance(signal, AutomationFailureSignal):
         raise TypeError("signal must be an AutomationFailureSignal")
+    payload = _failure_payload(signal)
+    return payload is not None and _submit(payload)
+
+
+async def acapture_automation_failure(
+    signal: AutomationFailureSignal,
+) -> bool:
+    """Coroutine version of :func:`capture_automation_failure` for asyncio callers."""
+    if not isinstance(signal, AutomationFailureSignal):
+        raise TypeError("signal must be an AutomationFailureSignal")
+    return await _acapture(lambda: _failure_payload(signal))
+
+
+def _failure_payload(signal: AutomationFailureSignal) -> QueuedEvent | None:
     if not _usage_enabled():
-        return False
-    return _queue_capture_payload(
+        return None
+    suppressed = _admit(FAILURE_SIGNAL_EVENT, "openadapt-flow")
+    if suppressed is None:
+        return None
+    properties = signal.to_envelope()
+    if suppressed:
+        properties = {**properties, SUPPRESSED_PROPERTY: suppressed}
+    return _build_payload(
         event=FAILURE_SIGNAL_EVENT,
         distinct_id=f"failure:{signal.failure_signature}",
-        properties={
-            **_base_properties("openadapt-flow"),
-            **signal.to_envelope(),
-        },
+        properties=properties,
+        package_name="openadapt-flow",
     )
+
+
+# Envelope fields drawn from closed enums, in ``to_envelope`` order.
+_ENUM_FIELDS: tuple[tuple[str, type[Enum]], ...] = (
+    ("failure_kind", FailureKind),
+    ("substrate", Substrate),
+    ("action_kind", ActionKind),
+    ("risk_class", RiskClass),
+    ("resolution_rung", ResolutionRung),
+    ("identity_state", IdentityState),
+    ("effect_tier", EffectTier),
+    ("delivery_state", DeliveryState),
+    ("execution_profile", ExecutionProfile),
+    ("outcome", ExecutionOutcome),
+)
+
+
+def failure_signal_dictionary() -> bytes:
+    """Return the zlib preset dictionary for encoded failure-signal envelopes.
+
+    Built deterministically from the schema's keys and enum values, so every
+    release with the same schema produces the same bytes.  zlib references
+    the end of a dictionary most cheaply, so the framing every envelope starts
+    with goes last.
+    """
+    return _failure_signal_dictionary()
+
+
+@functools.lru_cache(maxsize=1)
+def _failure_signal_dictionary() -> bytes:
+    fragments = ['"model_calls":0,"external_network_calls":"unknown","occurred_at":"20']
+    fragments += [f'"external_network_calls":"{v}",' for v in ("none", "observed")]
+    fragments += [f'"severity":"{v}",' for v in sorted(set(_SEVERITY.values()))]
+    for name, enum_type in reversed(_ENUM_FIELDS):
+        fragments += [f'"{name}":"{member.value}",' for member in enum_type]
+    fragments.append(':00:00Z"}\n')
+    fragments.append(f'{{"schema":"{FAILURE_SIGNAL_SCHEMA}","failure_signature":"')
+    return "".join(fragments).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=1)
+def _failure_codec() -> DictionaryCodec:
+    return DictionaryCodec(_failure_signal_dictionary())
+
+
+def encode_failure_signals(
+    signals: Iterable[AutomationFailureSignal | Mapping[str, Any]],
+) -> bytes:
+    """Compress failure signals (or their envelopes) with the schema dictionary.
+
+    The result is zlib-compressed JSON lines, one envelope per line; decode it
+    with :func:`decode_failure_signals`.  It is meant for relays and exports
+    that control both ends; PostHog ingestion cannot read it.
+    """
+    lines = []
+    for signal in signals:
+        envelope = signal.to_envelope() if isinstance(signal, AutomationFailureSignal) else signal
+        lines.append(json.dumps(envelope, separators=(",", ":")) + "\n")
+    return _failure_codec().compress("".join(lines).encode("utf-8"))
+
+
+def decode_failure_signals(data: bytes) -> list[dict[str, Any]]:
+    """Return the envelopes in a stream from :func:`encode_failure_signals`."""
+    try:
+        text = _failure_codec().decompress(data).decode("utf-8")
+    except (zlib.error, UnicodeDecodeError) as exc:
+        raise ValueError("not a failure-signal stream for this schema") from exc
+    return [json.loads(line) for line in text.splitlines() if line]
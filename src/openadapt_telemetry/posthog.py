@@ -2,45 +2,149 @@
 
 This module captures lightweight, privacy-safe usage counters (for example:
 `agent_run`, `action_executed`, `demo_recorded`) to PostHog ingestion.
+
+Events are queued in memory and sent in batches by a pool of background
+sender threads.  One sender always runs; more are started while the backlog
+exceeds a full batch per live sender (up to ``OPENADAPT_POSTHOG_WORKERS``)
+and exit again after sitting idle, so one stalled request does not hold up
+everything queued behind it.
+
+Ordering: events within one batch keep their capture order, but with more
+than one sender, batches may reach PostHog out of order.  PostHog orders
+events by their timestamp, so this only matters to consumers that rely on
+ingestion order.
+
+Forked children (``multiprocessing`` with the fork start method, prefork
+servers) reset all sender state after the fork and lazily start their own
+sender and connection pool; events queued in the parent stay with the
+parent.
 """
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import functools
 import json
 import os
 import platform
 import queue
+import random
+import sys
 import threading
 import time
-import urllib.error
-import urllib.request
 import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from importlib import metadata
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, NamedTuple
 
+from .aggregation import DEFAULT_MAX_KEYS, EventAggregator
 from .client import is_ci_environment
+from .compression import DEFAULT_LEVEL, DEFAULT_MIN_BYTES, BodyCompressor
+from .config import load_usage_sample_rates
 from .privacy import scrub_dict
+from .queueing import ByteBoundedQueue, QueuedEvent, estimate_properties_size
+from .ratelimit import SUPPRESSED_PROPERTY, RateLimiter
+from .sampling import SAMPLE_WEIGHT_PROPERTY, UsageSampler
+from .spool import DEFAULT_SPOOL_DIR, SPOOL_MAX_BYTES, Spool
+from .transport import (
+    DEFAULT_CIRCUIT_COOLDOWN_SECONDS,
+    DEFAULT_CIRCUIT_FAILURES,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RETRY_BASE_SECONDS,
+    DEFAULT_RETRY_MAX_SECONDS,
+    CircuitBreaker,
+    ConnectionPool,
+    RetryPolicy,
+    send_with_retry,
+)
 
 DEFAULT_POSTHOG_HOST = "https://us.i.posthog.com"
 DEFAULT_POSTHOG_PROJECT_API_KEY = "phc_935iWKc6O7u6DCp2eFAmK5WmCwv35QXMa6LulTJ3uqh"
 DISTINCT_ID_FILE = Path.home() / ".openadapt" / "telemetry_distinct_id"
 MAX_STRING_LEN = 256
 QUEUE_MAXSIZE = 2048
+QUEUE_MAX_BYTES = 2 * 1024 * 1024
+BATCH_MAX_EVENTS = 100
+BATCH_MAX_BYTES = 512 * 1024
+BATCH_LINGER_SECONDS = 0.5
+FLUSH_TIMEOUT_SECONDS = 2.0
+MAX_WORKERS = 4
+WORKER_IDLE_SECONDS = 30.0
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block", "sample")
+OVERFLOW_BLOCK_SECONDS = 0.05
+OVERFLOW_SAMPLE_RATE = 0.5
+DROPPED_EVENT = "$telemetry_dropped"
 
-_event_queue: queue.Queue[dict[str, Any]] | None = None
-_worker_started = False
+_event_queue: queue.Queue[_QueueItem] | None = None
+_workers: list[threading.Thread] = []
 _worker_lock = threading.Lock()
+_transport: ConnectionPool | None = None
+_breaker: CircuitBreaker | None = None
+_spool: Spool | None = None
+_spool_lock = threading.Lock()
+_atexit_registered = False
+_drop_lock = threading.Lock()
+# Cumulative drops, and drops not yet reported, keyed by (event name, reason).
+_dropped_totals: Counter[tuple[str, str]] = Counter()
+_dropped_unreported: Counter[tuple[str, str]] = Counter()
+# Wakes a lingering sender so a flush does not wait out the batch linger time.
+_FLUSH_MARKER: dict[str, Any] = {}
+
+
+class _DeferredEvent(NamedTuple):
+    """A usage event queued before its payload is built (see ``OPENADAPT_POSTHOG_DEFER_BUILD``)."""
+
+    event: str
+    properties: dict[str, Any] | None
+    package_name: str
+    captured_at: float  # time.monotonic() at capture
+    weight: float = 1.0  # sample weight decided at capture
+    suppressed: int = 0  # rate-limited events carried, decided at capture
+
+
+_QueueItem = QueuedEvent | _DeferredEvent | dict[str, Any]
+# What the sender encodes: built events, plus plain dicts for rollups and reports.
+_Sendable = QueuedEvent | dict[str, Any]
+# Shared by every event captured without properties; never mutated.
+_NO_PROPERTIES: Mapping[str, Any] = MappingProxyType({})
+_aggregator: EventAggregator | None = None
 
 
 def _is_truthy(raw: str | None) -> bool:
     return str(raw or "").strip().lower() in {"1", "true", "yes", "on"}
 
 
-def _pyproject_telemetry_disabled() -> bool:
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        return max(minimum, int(os.getenv(name, "")))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float, minimum: float = 0.0) -> float:
+    try:
+        return max(minimum, float(os.getenv(name, "")))
+    except ValueError:
+        return default
+
+
+def _nearest_pyproject(start: Path) -> Path | None:
+    for parent in [start, *start.parents]:
+        pyproject = parent / "pyproject.toml"
+        if pyproject.is_file():
+            return pyproject
+    return None
+
+
+def _pyproject_telemetry_disabled(pyproject: Path | None) -> bool:
     """Check if telemetry is disabled via pyproject.toml [tool.openadapt].
 
-    Walks up from cwd looking for pyproject.toml with::
+    ``pyproject`` is the nearest pyproject.toml above cwd, which may contain::
 
         [tool.openadapt]
         telemetry = false
@@ -48,6 +152,8 @@ def _pyproject_telemetry_disabled() -> bool:
     This lets enterprises commit one file to their repo to disable
     telemetry for all developers — no per-user .env needed.
     """
+    if pyproject is None:
+        return False
     try:
         import tomllib
     except ImportError:
@@ -56,41 +162,149 @@ def _pyproject_telemetry_disabled() -> bool:
         except ImportError:
             return False
 
-    from pathlib import Path
-
-    for parent in [Path.cwd(), *Path.cwd().parents]:
-        pyproject = parent / "pyproject.toml"
-        if pyproject.is_file():
-            try:
-                data = tomllib.loads(pyproject.read_text())
-                val = data.get("tool", {}).get("openadapt", {}).get("telemetry")
-                if val is not None:
-                    return not _is_truthy(str(val))
-            except Exception:
-                pass
-            break  # only check the nearest pyproject.toml
+    try:
+        data = tomllib.loads(pyproject.read_text())
+        val = data.get("tool", {}).get("openadapt", {}).get("telemetry")
+        if val is not None:
+            return not _is_truthy(str(val))
+    except Exception:
+        pass
     return False
 
 
-def _usage_enabled() -> bool:
+def _mtime_ns(path: Path | None) -> int | None:
+    if path is None:
+        return None
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+@dataclass(frozen=True)
+class _UsageDecision:
+    """A resolved usage-enabled decision and what it was derived from.
+
+    ``cwd`` is None when an explicit env override decided, since the answer
+    then does not depend on the working directory.
+    """
+
+    overrides: tuple[str | None, str | None]
+    enabled: bool
+    cwd: str | None = None
+    pyproject: Path | None = None
+    pyproject_mtime_ns: int | None = None
+
+    def is_current(self) -> bool:
+        if self.cwd is None:
+            return True
+        try:
+            if os.getcwd() != self.cwd:
+                return False
+        except OSError:
+            return False
+        return self.pyproject is None or _mtime_ns(self.pyproject) == self.pyproject_mtime_ns
+
+
+_usage_decision: _UsageDecision | None = None
+
+
+def _resolve_usage_decision(overrides: tuple[str | None, str | None]) -> _UsageDecision:
+    do_not_track, explicit = overrides
+
     # 1. Standard DO_NOT_TRACK env var (consoledonottrack.com)
-    if _is_truthy(os.getenv("DO_NOT_TRACK")):
-        return False
+    if _is_truthy(do_not_track):
+        return _UsageDecision(overrides, False)
 
     # 2. Explicit env var
-    explicit = os.getenv("OPENADAPT_TELEMETRY_ENABLED")
     if explicit is not None:
-        return _is_truthy(explicit)
+        return _UsageDecision(overrides, _is_truthy(explicit))
 
     # 3. pyproject.toml [tool.openadapt] telemetry = false
-    if _pyproject_telemetry_disabled():
-        return False
+    cwd = os.getcwd()
+    pyproject = _nearest_pyproject(Path(cwd))
+    mtime_ns = _mtime_ns(pyproject)
+    enabled = not _pyproject_telemetry_disabled(pyproject)
 
     # 4. CI environments default to off
-    if is_ci_environment() and not _is_truthy(os.getenv("OPENADAPT_TELEMETRY_IN_CI")):
-        return False
+    if enabled and is_ci_environment():
+        enabled = _is_truthy(os.getenv("OPENADAPT_TELEMETRY_IN_CI"))
 
-    return True
+    return _UsageDecision(overrides, enabled, cwd, pyproject, mtime_ns)
+
+
+def _usage_enabled() -> bool:
+    """Return whether usage events may be sent.
+
+    The decision is resolved once and cached.  The opt-out env vars are read
+    on every call so they take effect immediately; the cached pyproject and
+    CI checks are redone when cwd or the pyproject's mtime changes.  Call
+    :func:`invalidate_usage_cache` after changing CI variables at runtime.
+    """
+    global _usage_decision
+
+    overrides = (os.getenv("DO_NOT_TRACK"), os.getenv("OPENADAPT_TELEMETRY_ENABLED"))
+    decision = _usage_decision
+    if decision is None or decision.overrides != overrides or not decision.is_current():
+        decision = _resolve_usage_decision(overrides)
+        _usage_decision = decision
+    return decision.enabled
+
+
+_sampler: tuple[str | None, UsageSampler] | None = None
+
+
+def _get_sampler() -> UsageSampler:
+    """Return the usage sampler, rebuilt when ``OPENADAPT_POSTHOG_SAMPLE_RATES`` changes.
+
+    Rules from the config file are read once, when the sampler is built.
+    """
+    global _sampler
+
+    raw = os.getenv("OPENADAPT_POSTHOG_SAMPLE_RATES")
+    cached = _sampler
+    if cached is not None and cached[0] == raw:
+        return cached[1]
+    sampler = UsageSampler(load_usage_sample_rates())
+    _sampler = (raw, sampler)
+    return sampler
+
+
+_rate_limiter: RateLimiter | None = None
+
+
+def _get_rate_limiter() -> RateLimiter:
+    """Return the event rate limiter; its limits are read from env once."""
+    global _rate_limiter
+
+    limiter = _rate_limiter
+    if limiter is None:
+        limiter = _rate_limiter = RateLimiter(
+            event_rate=_env_float("OPENADAPT_POSTHOG_RATE_LIMIT_PER_SECOND", 0.0),
+            event_burst=_env_float("OPENADAPT_POSTHOG_RATE_LIMIT_BURST", 0.0),
+            package_rate=_env_float("OPENADAPT_POSTHOG_PACKAGE_RATE_LIMIT_PER_SECOND", 0.0),
+            package_burst=_env_float("OPENADAPT_POSTHOG_PACKAGE_RATE_LIMIT_BURST", 0.0),
+        )
+    return limiter
+
+
+def _admit(event: str, package_name: str) -> int | None:
+    """Apply rate limits; None when suppressed, else the suppressed count to carry."""
+    limiter = _get_rate_limiter()
+    if not limiter.enabled:
+        return 0
+    return limiter.admit(event, package_name)
+
+
+def invalidate_usage_cache() -> None:
+    """Forget cached usage decisions (enabled check, sampling rules, rate limits)."""
+    global _usage_decision
+    global _sampler
+    global _rate_limiter
+
+    _usage_decision = None
+    _sampler = None
+    _rate_limiter = None
 
 
 def _posthog_host() -> str:
@@ -98,14 +312,22 @@ def _posthog_host() -> str:
 
 
 def _posthog_project_api_key() -> str:
-    return os.getenv("OPENADAPT_POSTHOG_PROJECT_API_KEY", DEFAULT_POSTHOG_PROJECT_API_KEY)
+    # Interned so every queued event shares one string.
+    return sys.intern(
+        os.getenv("OPENADAPT_POSTHOG_PROJECT_API_KEY", DEFAULT_POSTHOG_PROJECT_API_KEY)
+    )
 
 
 def _get_distinct_id() -> str:
     env_id = os.getenv("OPENADAPT_TELEMETRY_DISTINCT_ID")
     if env_id:
-        return env_id
+        return sys.intern(env_id)
+    return _installation_distinct_id()
 
+
+@functools.lru_cache(maxsize=1)
+def _installation_distinct_id() -> str:
+    """Read (or create) the installation pseudonym once per process."""
     try:
         if DISTINCT_ID_FILE.exists():
             existing = DISTINCT_ID_FILE.read_text(encoding="utf-8").strip()
@@ -116,6 +338,7 @@ def _get_distinct_id() -> str:
         DISTINCT_ID_FILE.write_text(generated, encoding="utf-8")
         return generated
     except OSError:
+        # Keep one pseudonym for the life of the process even if it cannot be stored.
         return str(uuid.uuid4())
 
 
@@ -140,85 +363,854 @@ def _package_version(package_name: str) -> str:
         return "unknown"
 
 
-def _base_properties(package_name: str) -> dict[str, Any]:
-    return {
-        "package": package_name,
-        "version": _package_version(package_name),
-        "python_version": platform.python_version(),
-        "platform": platform.system().lower(),
-        "timestamp": int(time.time()),
-    }
+@functools.lru_cache(maxsize=None)
+def _installation_context(package_name: str) -> Mapping[str, Any]:
+    """Static per-package event properties, resolved once per process.
 
+    Looking up the package version scans every distribution on ``sys.path``,
+    so it stays out of the per-event path.  The result is read-only because
+    it is shared by every event for the package.
+    """
+    return MappingProxyType(
+        {
+            "package": package_name,
+            "version": _package_version(package_name),
+            "python_version": platform.python_version(),
+            "platform": platform.system().lower(),
+        }
+    )
 
-def _queue_capture_payload(
+
+def _build_payload(
     *,
     event: str,
     distinct_id: str,
-    properties: dict[str, Any],
-) -> bool:
-    """Queue an already-bounded event payload.
+    properties: Mapping[str, Any],
+    package_name: str,
+    timestamp: float | None = None,
+) -> QueuedEvent:
+    """Wrap already-bounded properties in a compact queued event.
+
+    The event shares the package's installation context and the api_key with
+    every other queued event; :meth:`QueuedEvent.to_payload` merges them with
+    the event timestamp (``timestamp`` or now) and ``properties``, which may
+    override them, when the batch is encoded.
 
     This is deliberately private.  Public callers use :func:`capture_event`,
     which supplies the installation pseudonym.  Closed-schema aggregate events
     (for example automation failure signatures) may instead use a non-user
     grouping key without exposing an installation or tenant identifier.
     """
-    payload = {
-        "api_key": _posthog_project_api_key(),
-        "event": event,
-        "distinct_id": distinct_id,
-        # This client runs on end-user machines. Explicitly suppress PostHog's
-        # ingest-side IP geolocation for every event; callers cannot override
-        # the privacy boundary with a supplied property.
-        "properties": {**properties, "$geoip_disable": True},
-    }
+    return QueuedEvent(
+        api_key=_posthog_project_api_key(),
+        event=event,
+        distinct_id=distinct_id,
+        context=_installation_context(package_name),
+        properties=properties or _NO_PROPERTIES,
+        timestamp=time.time() if timestamp is None else timestamp,
+    )
+
+
+def _submit(payload: _QueueItem) -> bool:
+    if not _enqueue(_ensure_worker(), payload):
+        return False
+    _maybe_add_worker()
+    return True
+
+
+def _overflow_policy() -> str:
+    policy = os.getenv("OPENADAPT_POSTHOG_OVERFLOW_POLICY", "").strip().lower().replace("-", "_")
+    return policy if policy in OVERFLOW_POLICIES else "drop_newest"
+
+
+def _enqueue(event_queue: queue.Queue[_QueueItem], payload: _QueueItem) -> bool:
+    """Queue a payload, applying the configured overflow policy when full.
+
+    - ``drop_newest`` (default): the new event is dropped.
+    - ``drop_oldest``: the oldest queued events are evicted to make room.
+    - ``block``: wait up to ``OPENADAPT_POSTHOG_OVERFLOW_BLOCK_SECONDS``, then
+      drop the new event.
+    - ``sample``: evict the oldest event with probability
+      ``OPENADAPT_POSTHOG_OVERFLOW_SAMPLE_RATE``, otherwise drop the new one,
+      so a sustained overflow keeps a sample of both old and new traffic.
+
+    Every dropped event is counted by name; see :func:`dropped_event_counts`.
+    """
     try:
-        _ensure_worker().put_nowait(payload)
+        event_queue.put_nowait(payload)
         return True
     except queue.Full:
-        return False
+        pass
+
+    policy = _overflow_policy()
+    if policy == "block":
+        timeout = _env_float("OPENADAPT_POSTHOG_OVERFLOW_BLOCK_SECONDS", OVERFLOW_BLOCK_SECONDS)
+        try:
+            event_queue.put(payload, timeout=timeout)
+            return True
+        except queue.Full:
+            pass
+    elif policy == "drop_oldest" or (
+        policy == "sample"
+        and random.random()
+        < _env_float("OPENADAPT_POSTHOG_OVERFLOW_SAMPLE_RATE", OVERFLOW_SAMPLE_RATE)
+    ):
+        # The queue is bounded by bytes, so a large event may need several
+        # small ones evicted; an empty queue always accepts.
+        while True:
+            try:
+                evicted = event_queue.get_nowait()
+            except queue.Empty:
+                break
+            event_queue.task_done()
+            if evicted is not _FLUSH_MARKER:
+                _record_dropped([evicted], "queue_full")
+            try:
+                event_queue.put_nowait(payload)
+                return True
+            except queue.Full:
+                pass
+
+    _record_dropped([payload], "queue_full")
+    return False
+
+
+def _batch_limits() -> tuple[int, int, float]:
+    """Return ``(max_events, max_bytes, linger_seconds)`` for one batch."""
+    return (
+        _env_int("OPENADAPT_POSTHOG_BATCH_MAX_EVENTS", BATCH_MAX_EVENTS),
+        _env_int("OPENADAPT_POSTHOG_BATCH_MAX_BYTES", BATCH_MAX_BYTES),
+        _env_float("OPENADAPT_POSTHOG_BATCH_LINGER_SECONDS", BATCH_LINGER_SECONDS),
+    )
+
+
+def _encode_event(payload: _Sendable) -> bytes:
+    """Encode one queued payload as a ``/batch/`` item (the api_key is hoisted)."""
+    if isinstance(payload, QueuedEvent):
+        return payload.encode()
+    return json.dumps({k: v for k, v in payload.items() if k != "api_key"}).encode("utf-8")
+
 
+def _api_key(payload: _Sendable) -> str:
+    if isinstance(payload, QueuedEvent):
+        return payload.api_key
+    return str(payload.get("api_key", ""))
 
-def _send_payload(payload: dict[str, Any]) -> None:
+
+def _collect_batch(
+    event_queue: queue.Queue[_QueueItem],
+    first: _Sendable,
+    max_events: int,
+    max_bytes: int,
+    linger_seconds: float,
+) -> tuple[list[tuple[_Sendable, bytes]], _Sendable | None]:
+    """Drain queued payloads into one batch bounded by count, bytes and linger.
+
+    The sender lingers only when more events are already waiting behind
+    ``first``; an idle queue sends ``first`` immediately.
+
+    Returns the encoded batch and, when the byte cap was hit, the payload that
+    did not fit.  That payload has already been taken off the queue, so the
+    caller must start the next batch with it.  Deferred events are built as
+    they are taken; those that produce no payload, or that are spooled
+    because shutdown has begun, are marked done right away.  Every payload
+    taken is tracked in flight (see :class:`_InFlight`).
+    """
+    encoded = _encode_event(first)
+    batch = [(first, encoded)]
+    size = len(encoded)
+    if event_queue.qsize() == 0:
+        # No backlog: send at once rather than hold a lone event (often the
+        # only one a short-lived process captures) for the linger time.
+        linger_seconds = 0.0
+    deadline = time.monotonic() + linger_seconds
+    while len(batch) < max_events and size < max_bytes:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining > 0:
+                payload = event_queue.get(timeout=remaining)
+            else:
+                payload = event_queue.get_nowait()
+        except queue.Empty:
+            break
+        if payload is _FLUSH_MARKER:
+            event_queue.task_done()
+            break
+        payload = _prepare(payload)
+        if payload is None or not _take(payload):
+            event_queue.task_done()
+            continue
+        encoded = _encode_event(payload)
+        if size + len(encoded) + 1 > max_bytes:
+            return batch, payload
+        batch.append((payload, encoded))
+        size += len(encoded) + 1
+    return batch, None
+
+
+def _get_transport() -> tuple[ConnectionPool, CircuitBreaker]:
+    """Return the keep-alive pool and circuit breaker for the current host.
+
+    Both are rebuilt when the host or timeout changes.
+    """
+    global _transport
+    global _breaker
+
+    host = _posthog_host()
     timeout_seconds = float(os.getenv("OPENADAPT_TELEMETRY_TIMEOUT_SECONDS", "1.0"))
-    req = urllib.request.Request(
-        f"{_posthog_host()}/capture/",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Content-Type": "application/json",
-            "User-Agent": "openadapt-telemetry-posthog/1",
-        },
-        method="POST",
+    with _worker_lock:
+        pool = _transport
+        if (
+            pool is None
+            or _breaker is None
+            or pool.base_url != host
+            or pool.timeout != timeout_seconds
+        ):
+            if pool is not None:
+                pool.close()
+            pool = ConnectionPool(host, size=_max_workers(), timeout=timeout_seconds)
+            _transport = pool
+            _breaker = CircuitBreaker(
+                failure_threshold=_env_int(
+                    "OPENADAPT_POSTHOG_CIRCUIT_FAILURES", DEFAULT_CIRCUIT_FAILURES
+                ),
+                cooldown=_env_float(
+                    "OPENADAPT_POSTHOG_CIRCUIT_COOLDOWN_SECONDS", DEFAULT_CIRCUIT_COOLDOWN_SECONDS
+                ),
+            )
+        return pool, _breaker
+
+
+def _retry_policy() -> RetryPolicy:
+    return RetryPolicy(
+        max_retries=_env_int("OPENADAPT_POSTHOG_MAX_RETRIES", DEFAULT_MAX_RETRIES, minimum=0),
+        base_delay=_env_float("OPENADAPT_POSTHOG_RETRY_BASE_SECONDS", DEFAULT_RETRY_BASE_SECONDS),
+        max_delay=_env_float("OPENADAPT_POSTHOG_RETRY_MAX_SECONDS", DEFAULT_RETRY_MAX_SECONDS),
     )
+
+
+def _post(path: str, body: bytes) -> bool:
+    """POST a body; returns False only when the request should be retried later.
+
+    Retries and the circuit breaker live in :func:`send_with_retry`; while the
+    circuit is open this returns False without touching the network, so the
+    caller spools or counts the batch immediately.
+    """
     try:
-        with urllib.request.urlopen(req, timeout=timeout_seconds):
-            return
-    except (urllib.error.URLError, TimeoutError, OSError, ValueError):
+        pool, breaker = _get_transport()
+    except ValueError:
+        return False
+    headers = {"Content-Type": "application/json"}
+    compressor = _get_compressor()
+    if compressor is not None:
+        body, encoding = compressor.encode(body)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+    return send_with_retry(
+        pool,
+        "POST",
+        path,
+        body,
+        headers,
+        policy=_retry_policy(),
+        breaker=breaker,
+    )
+
+
+_compressor: tuple[tuple[str | None, ...], BodyCompressor | None] | None = None
+
+
+def _get_compressor() -> BodyCompressor | None:
+    """Return the request-body compressor, or None unless ``OPENADAPT_POSTHOG_COMPRESSION=gzip``.
+
+    Rebuilt only when one of its environment variables changes.
+    """
+    global _compressor
+
+    key = (
+        os.getenv("OPENADAPT_POSTHOG_COMPRESSION"),
+        os.getenv("OPENADAPT_POSTHOG_COMPRESSION_LEVEL"),
+        os.getenv("OPENADAPT_POSTHOG_COMPRESSION_MIN_BYTES"),
+    )
+    cached = _compressor
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    compressor = None
+    if str(key[0] or "").strip().lower() == "gzip":
+        compressor = BodyCompressor(
+            level=_env_int("OPENADAPT_POSTHOG_COMPRESSION_LEVEL", DEFAULT_LEVEL),
+            min_bytes=_env_int(
+                "OPENADAPT_POSTHOG_COMPRESSION_MIN_BYTES", DEFAULT_MIN_BYTES, minimum=0
+            ),
+        )
+    _compressor = (key, compressor)
+    return compressor
+
+
+def _send_batch(batch: list[tuple[_Sendable, bytes]]) -> list[_Sendable]:
+    """Send a batch as one ``/batch/`` request per project api_key.
+
+    Returns the payloads that could not be delivered.
+    """
+    by_key: dict[str, list[tuple[_Sendable, bytes]]] = {}
+    for item in batch:
+        by_key.setdefault(_api_key(item[0]), []).append(item)
+    failed: list[_Sendable] = []
+    for api_key, items in by_key.items():
+        body = b"".join(
+            (
+                b'{"api_key":',
+                json.dumps(api_key).encode("utf-8"),
+                b',"batch":[',
+                b",".join(encoded for _, encoded in items),
+                b"]}",
+            )
+        )
+        if not _post("/batch/", body):
+            failed.extend(payload for payload, _ in items)
+    return failed
+
+
+def _get_spool() -> Spool | None:
+    """Return the process spool when ``OPENADAPT_TELEMETRY_SPOOL`` is enabled."""
+    global _spool
+
+    if not _is_truthy(os.getenv("OPENADAPT_TELEMETRY_SPOOL")):
+        return None
+    with _spool_lock:
+        if _spool is None:
+            directory = os.getenv("OPENADAPT_TELEMETRY_SPOOL_DIR") or DEFAULT_SPOOL_DIR
+            try:
+                _spool = Spool(
+                    directory,
+                    max_bytes=_env_int("OPENADAPT_TELEMETRY_SPOOL_MAX_BYTES", SPOOL_MAX_BYTES),
+                    hoist_shared=_is_truthy(os.getenv("OPENADAPT_TELEMETRY_SPOOL_HOIST_SHARED")),
+                )
+            except OSError:
+                return None
+        return _spool
+
+
+def _spool_payloads(payloads: list[_Sendable]) -> bool:
+    """Persist undeliverable payloads; returns False when there is no spool."""
+    spool = _get_spool()
+    if spool is None or not payloads:
+        return False
+    records = []
+    for payload in payloads:
+        if isinstance(payload, QueuedEvent):
+            payload = payload.to_payload()
+        if "timestamp" not in payload:
+            # Pin the event time so a later replay is not attributed to replay time.
+            sent_at = payload.get("properties", {}).get("timestamp", time.time())
+            payload = {
+                **payload,
+                "timestamp": datetime.fromtimestamp(sent_at, timezone.utc).isoformat(),
+            }
+        records.append(payload)
+    try:
+        spool.append(records)
+    except (OSError, ValueError):  # ValueError: segment file closed under us
+        return False
+    return True
+
+
+def _replay_spool() -> None:
+    spool = _get_spool()
+    if spool is None:
+        return
+
+    def send(records: list[dict[str, Any]]) -> bool:
+        return not _send_batch([(record, _encode_event(record)) for record in records])
+
+    try:
+        spool.replay(send, chunk_size=_batch_limits()[0])
+    except OSError:
         return
 
 
-def _worker_loop() -> None:
-    assert _event_queue is not None
+def _event_name(item: _QueueItem) -> str:
+    if isinstance(item, (QueuedEvent, _DeferredEvent)):
+        return item.event
+    return str(item.get("event", ""))
+
+
+def _record_dropped(payloads: list[_QueueItem], reason: str) -> None:
+    counts = Counter((_event_name(p), reason) for p in payloads)
+    with _drop_lock:
+        _dropped_totals.update(counts)
+        _dropped_unreported.update(counts)
+
+
+def dropped_event_counts() -> dict[str, int]:
+    """Return how many usage events this process has dropped, by event name."""
+    with _drop_lock:
+        totals: Counter[str] = Counter()
+        for (event, _), count in _dropped_totals.items():
+            totals[event] += count
+    return dict(totals)
+
+
+def _take_drop_report() -> tuple[dict[str, Any], Counter[tuple[str, str]]] | None:
+    """Build a ``$telemetry_dropped`` payload for drops not yet reported.
+
+    The counts are removed from the pending tally and returned alongside the
+    payload; callers put them back with :func:`_restore_drop_counts` if the
+    report itself is not delivered.
+    """
+    with _drop_lock:
+        if not _dropped_unreported:
+            return None
+        pending = Counter(_dropped_unreported)
+        _dropped_unreported.clear()
+    by_event: Counter[str] = Counter()
+    by_reason: Counter[str] = Counter()
+    for (event, reason), count in pending.items():
+        by_event[event] += count
+        by_reason[reason] += count
+    report = {
+        "api_key": _posthog_project_api_key(),
+        "event": DROPPED_EVENT,
+        # A fixed non-user key: loss accounting needs totals, not installations.
+        "distinct_id": DROPPED_EVENT,
+        "properties": {
+            "dropped": dict(by_event),
+            "reasons": dict(by_reason),
+            "dropped_total": sum(pending.values()),
+            "timestamp": int(time.time()),
+            "$process_person_profile": False,
+            "$geoip_disable": True,
+        },
+    }
+    return report, pending
+
+
+def _restore_drop_counts(pending: Counter[tuple[str, str]]) -> None:
+    with _drop_lock:
+        _dropped_unreported.update(pending)
+
+
+def _drain_queue() -> list[_QueueItem]:
+    """Take everything still queued, marking it done for flush accounting."""
+    pending = []
+    if _event_queue is None:
+        return pending
     while True:
-        payload = _event_queue.get()
-        _send_payload(payload)
+        try:
+            payload = _event_queue.get_nowait()
+        except queue.Empty:
+            return pending
         _event_queue.task_done()
+        if payload is not _FLUSH_MARKER:
+            pending.append(payload)
+
+
+class _InFlight:
+    """Payloads that senders have taken off the queue but not yet settled.
+
+    A sender's batch is invisible to the queue while it lingers to fill up or
+    waits on a slow request.  :func:`shutdown` claims every such payload so
+    it can be spooled or counted; until the next capture, senders then spool
+    what they take instead of sending it, and skip the claimed payloads in
+    the batch they hold.  A request already under way when its batch is
+    claimed may still succeed, so a claimed event can arrive twice, but it is
+    never lost without being counted.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._held: dict[int, list[_Sendable]] = {}
+        # Per sender: how many of its next payloads were claimed by shutdown.
+        self._claimed: Counter[int] = Counter()
+        self.closing = False
+
+    def take(self, payload: _Sendable) -> bool:
+        """Track a payload the calling sender took; False once shutdown has claimed."""
+        with self._lock:
+            if self.closing:
+                return False
+            self._held.setdefault(threading.get_ident(), []).append(payload)
+            return True
+
+    def claimed(self, count: int) -> int:
+        """How many of the calling sender's next ``count`` payloads were claimed.
+
+        The claims are consumed, so each claimed payload is skipped once.
+        """
+        with self._lock:
+            return self._consume_claims_locked(threading.get_ident(), count)
+
+    def settle(self, count: int) -> bool:
+        """Stop tracking the calling sender's next ``count`` payloads.
+
+        Returns False when shutdown claimed them while they were being sent.
+        """
+        ident = threading.get_ident()
+        with self._lock:
+            claimed = self._consume_claims_locked(ident, count)
+            held = self._held.get(ident)
+            if held is not None:
+                del held[: count - claimed]
+                if not held:
+                    del self._held[ident]
+            return not claimed
+
+    def claim_all(self) -> list[_Sendable]:
+        """Take every tracked payload and make senders spool from now on."""
+        with self._lock:
+            self.closing = True
+            taken: list[_Sendable] = []
+            for ident, held in self._held.items():
+                taken.extend(held)
+                self._claimed[ident] += len(held)
+            self._held.clear()
+            return taken
+
+    def _consume_claims_locked(self, ident: int, count: int) -> int:
+        claimed = min(count, self._claimed.get(ident, 0))
+        if claimed:
+            self._claimed[ident] -= claimed
+            if not self._claimed[ident]:
+                del self._claimed[ident]
+        return claimed
+
+
+_in_flight = _InFlight()
+
+
+def _take(payload: _Sendable) -> bool:
+    """Track a payload a sender took off the queue; during shutdown, spool it instead."""
+    if _in_flight.take(payload):
+        return True
+    _spool_or_drop([payload], "shutdown")
+    return False
 
 
-def _ensure_worker() -> queue.Queue[dict[str, Any]]:
+def _spool_or_drop(payloads: list[_Sendable], reason: str) -> None:
+    if payloads and not _spool_payloads(payloads):
+        _record_dropped(payloads, reason)
+
+
+def _max_workers() -> int:
+    return _env_int("OPENADAPT_POSTHOG_WORKERS", MAX_WORKERS)
+
+
+def _deliver(batch: list[tuple[_Sendable, bytes]]) -> None:
+    """Send a batch plus any pending drop report; spool or count what fails.
+
+    Payloads that shutdown has claimed were already spooled or counted, so
+    they are skipped; if the batch is claimed mid-send, failures are left to
+    shutdown as well.
+    """
+    skipped = _in_flight.claimed(len(batch))
+    if skipped:
+        batch = batch[skipped:]
+        if not batch:
+            return
+    report = _take_drop_report()
+    sending = batch if report is None else [*batch, (report[0], _encode_event(report[0]))]
+    failed = _send_batch(sending)
+    if report is not None and any(payload is report[0] for payload in failed):
+        _restore_drop_counts(report[1])
+        failed = [payload for payload in failed if payload is not report[0]]
+    if _in_flight.settle(len(batch)):
+        _spool_or_drop(failed, "send_failed")
+
+
+def _worker_loop(primary: bool = True) -> None:
+    """Send batches until idle; only the primary sender runs forever.
+
+    The primary sender also replays the spool once at startup.  Each request
+    checks a connection out of the shared pool, which is sized to the worker
+    limit, so concurrent senders never share a socket.
+    """
+    event_queue = _event_queue
+    assert event_queue is not None
+    try:
+        if primary:
+            _replay_spool()
+        max_events, max_bytes, linger_seconds = _batch_limits()
+        carry: _Sendable | None = None
+        while True:
+            if carry is not None:
+                first = carry
+            elif primary:
+                first = event_queue.get()
+            else:
+                try:
+                    first = event_queue.get(timeout=WORKER_IDLE_SECONDS)
+                except queue.Empty:
+                    return
+            if first is _FLUSH_MARKER:
+                event_queue.task_done()
+                continue
+            if carry is None:
+                first = _prepare(first)
+                if first is None or not _take(first):
+                    event_queue.task_done()
+                    continue
+            batch, carry = _collect_batch(event_queue, first, max_events, max_bytes, linger_seconds)
+            try:
+                _deliver(batch)
+            finally:
+                for _ in batch:
+                    event_queue.task_done()
+            if carry is not None and _in_flight.claimed(1):
+                # Spooled or counted by shutdown along with the batch.
+                event_queue.task_done()
+                carry = None
+    finally:
+        with _worker_lock:
+            current = threading.current_thread()
+            _workers[:] = [t for t in _workers if t is not current]
+
+
+def _start_worker_locked(primary: bool) -> None:
+    name = "oa-posthog" if primary else f"oa-posthog-{len(_workers)}"
+    thread = threading.Thread(target=_worker_loop, args=(primary,), daemon=True, name=name)
+    _workers.append(thread)
+    thread.start()
+
+
+def _maybe_add_worker() -> None:
+    """Start another sender while the backlog exceeds one batch per live sender."""
+    event_queue = _event_queue
+    live = len(_workers)
+    if event_queue is None or live >= _max_workers():
+        return
+    if event_queue.qsize() <= live * _batch_limits()[0]:
+        return
+    with _worker_lock:
+        if 0 < len(_workers) < _max_workers():
+            _start_worker_locked(primary=False)
+
+
+def _item_size(item: _QueueItem) -> int:
+    """Estimated encoded size of a queued item, for the queue's byte bound."""
+    if isinstance(item, QueuedEvent):
+        return item.size
+    if isinstance(item, _DeferredEvent):
+        # Not built yet: count what the caller handed over plus typical context.
+        return 256 + len(item.event) + estimate_properties_size(item.properties or _NO_PROPERTIES)
+    if item is _FLUSH_MARKER:
+        return 0
+    return 256 + estimate_properties_size(item.get("properties", _NO_PROPERTIES))
+
+
+def _ensure_worker() -> queue.Queue[_QueueItem]:
     global _event_queue
-    global _worker_started
+    global _atexit_registered
 
     with _worker_lock:
         if _event_queue is None:
-            _event_queue = queue.Queue(maxsize=QUEUE_MAXSIZE)
-        if not _worker_started:
-            thread = threading.Thread(target=_worker_loop, daemon=True, name="oa-posthog")
-            thread.start()
-            _worker_started = True
+            _event_queue = ByteBoundedQueue(
+                _env_int("OPENADAPT_POSTHOG_QUEUE_MAX_BYTES", QUEUE_MAX_BYTES, minimum=0),
+                _item_size,
+            )
+        if not _workers:
+            _start_worker_locked(primary=True)
+        if _in_flight.closing:
+            _in_flight.closing = False
+        if not _atexit_registered and (
+            _is_truthy(os.getenv("OPENADAPT_TELEMETRY_SPOOL")) or _exit_flush_budget() > 0
+        ):
+            atexit.register(_at_exit)
+            _atexit_registered = True
     return _event_queue
 
 
+def _get_aggregator() -> EventAggregator | None:
+    """Return the usage-event aggregator when a rollup window is configured.
+
+    It is rebuilt (after emitting what it holds) when the window or key limit
+    changes.  Creating it also starts the sender, so rollups pending at exit
+    are covered by the same at-exit flush as queued events.
+    """
+    global _aggregator
+
+    window = _env_float("OPENADAPT_POSTHOG_AGGREGATE_WINDOW_SECONDS", 0.0)
+    aggregator = _aggregator
+    if window <= 0:
+        if aggregator is not None:
+            _aggregator = None
+            aggregator.flush()
+        return None
+    max_keys = _env_int("OPENADAPT_POSTHOG_AGGREGATE_MAX_KEYS", DEFAULT_MAX_KEYS)
+    if aggregator is not None and aggregator.window == window and aggregator.max_keys == max_keys:
+        return aggregator
+    with _worker_lock:
+        previous = _aggregator
+        if previous is None or previous.window != window or previous.max_keys != max_keys:
+            _aggregator = EventAggregator(window, _submit, max_keys=max_keys)
+        aggregator = _aggregator
+    if previous is not None and previous is not aggregator:
+        previous.flush()
+    _ensure_worker()
+    return aggregator
+
+
+def _aggregate(payload: QueuedEvent) -> bool:
+    """Fold ``payload`` into a rollup; False when aggregation is off."""
+    aggregator = _get_aggregator()
+    return aggregator is not None and aggregator.add(payload.to_payload())
+
+
+def _capture_usage(payload: QueuedEvent) -> bool:
+    return _aggregate(payload) or _submit(payload)
+
+
+def flush(timeout: float = FLUSH_TIMEOUT_SECONDS) -> bool:
+    """Block until every queued usage event has been sent, spooled or dropped.
+
+    Args:
+        timeout: Hard deadline in seconds.
+
+    Returns:
+        True if the queue drained before the deadline.  Events still pending
+        at the deadline stay queued.
+    """
+    deadline = time.monotonic() + max(0.0, timeout)
+    while True:
+        aggregator = _aggregator
+        if aggregator is not None:
+            aggregator.flush()
+        event_queue = _event_queue
+        if event_queue is None:
+            return True
+        if not _wait_for_queue(event_queue, deadline):
+            return False
+        # Deferred events are built by the sender, which may fold them into
+        # new rollups while the queue drains.
+        if aggregator is None or not aggregator.pending():
+            return True
+
+
+def _wait_for_queue(event_queue: queue.Queue[_QueueItem], deadline: float) -> bool:
+    # Wake every sender that is lingering to fill a batch.
+    for _ in range(max(1, len(_workers))):
+        try:
+            event_queue.put(_FLUSH_MARKER, timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Full:
+            break
+    with event_queue.all_tasks_done:
+        while event_queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            event_queue.all_tasks_done.wait(remaining)
+    return True
+
+
+def shutdown(timeout: float = FLUSH_TIMEOUT_SECONDS) -> bool:
+    """Flush within ``timeout``, then persist or drop whatever is left.
+
+    Events that miss the deadline, whether still queued or held by a sender
+    that is lingering or stuck on a slow request, go to the spool when one is
+    enabled and are counted as dropped otherwise.  The spool segment is sealed and pooled
+    connections are closed; capturing again afterwards reopens both lazily.
+
+    Returns:
+        True if every event was delivered before the deadline.
+    """
+    global _transport
+    global _breaker
+
+    delivered = flush(timeout)
+    leftover = _in_flight.claim_all()
+    leftover.extend(
+        payload
+        for payload in (_materialize(item, aggregate=False) for item in _drain_queue())
+        if payload is not None
+    )
+    _spool_or_drop(leftover, "shutdown")
+    event_queue = _event_queue
+    if event_queue is not None:
+        # Wake lingering senders so they let go of the batches claimed above.
+        for _ in range(len(_workers)):
+            try:
+                event_queue.put_nowait(_FLUSH_MARKER)
+            except queue.Full:
+                break
+    with _spool_lock:
+        spool = _spool
+    if spool is not None:
+        try:
+            spool.close()
+        except OSError:
+            pass
+    with _worker_lock:
+        pool, _transport = _transport, None
+        _breaker = None
+    if pool is not None:
+        pool.close()
+    return delivered and not leftover
+
+
+def _exit_flush_budget() -> float:
+    return _env_float("OPENADAPT_TELEMETRY_FLUSH_AT_EXIT_SECONDS", 0.0)
+
+
+def _at_exit() -> None:
+    """Spend at most the configured budget delivering events before exit."""
+    shutdown(_exit_flush_budget())
+
+
+def _reset_after_fork() -> None:
+    """Give a forked child its own sender state.
+
+    The child inherits the parent's globals but none of its threads, and any
+    lock (including the queue's) may have been held mid-operation at fork
+    time.  Everything is replaced rather than reused:
+
+    - the queue and in-flight batches are dropped, since the events in them
+      belong to the parent, which still sends them
+    - the sender list and all module locks are recreated
+    - the connection pool, circuit breaker and spool are abandoned without
+      closing them; they share sockets and a segment file with the parent
+    - drop counts restart, so the parent's losses are not reported twice
+    - pending rollups are dropped with the queue; the parent emits them
+    - the sampler, rate limiter and compressor are rebuilt on first use, since
+      the sampler's lock is taken on every event
+
+    The next capture in the child starts a fresh sender and pool lazily.
+    """
+    global _event_queue
+    global _workers
+    global _worker_lock
+    global _transport
+    global _breaker
+    global _spool
+    global _spool_lock
+    global _drop_lock
+    global _dropped_totals
+    global _dropped_unreported
+    global _aggregator
+    global _sampler
+    global _rate_limiter
+    global _compressor
+    global _in_flight
+
+    _event_queue = None
+    _in_flight = _InFlight()
+    _aggregator = None
+    _sampler = None
+    _rate_limiter = None
+    _compressor = None
+    _workers = []
+    _worker_lock = threading.Lock()
+    _transport = None
+    _breaker = None
+    _spool = None
+    _spool_lock = threading.Lock()
+    _drop_lock = threading.Lock()
+    _dropped_totals = Counter()
+    _dropped_unreported = Counter()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 def capture_event(
     event: str,
     properties: dict[str, Any] | None = None,
@@ -227,18 +1219,112 @@ def capture_event(
     """Queue a usage event for PostHog ingestion.
 
     Returns True when queued; False when disabled or dropped.
+
+    With ``OPENADAPT_POSTHOG_DEFER_BUILD`` enabled the calling thread only
+    checks the opt-out, samples and rate limits (so dropped events never take
+    queue capacity), and queues the event name, a shallow copy of
+    ``properties``, the package and a monotonic timestamp; scrubbing and
+    payload building happen on the sender thread.
     """
+    if _is_truthy(os.getenv("OPENADAPT_POSTHOG_DEFER_BUILD")):
+        event_name = str(event or "").strip()
+        if not event_name or not _usage_enabled():
+            return False
+        admitted = _admit_usage(event_name, package_name)
+        if admitted is None:
+            return False
+        snapshot = dict(properties) if properties else None
+        return _submit(
+            _DeferredEvent(event_name, snapshot, package_name, time.monotonic(), *admitted)
+        )
+    payload = _usage_payload(event, properties, package_name)
+    return payload is not None and _capture_usage(payload)
+
+
+def _prepare(item: _QueueItem, aggregate: bool = True) -> _Sendable | None:
+    """Turn a queued item into something the sender can encode.
+
+    Compact events and plain payload dicts (rollups) pass through unchanged.
+    A deferred event is built now, stamped with its capture time and carrying
+    the sampling and rate-limit decisions made at capture; None means usage
+    was disabled since capture, or (with ``aggregate``) the event was folded
+    into a rollup.
+    """
+    if not isinstance(item, _DeferredEvent):
+        return item
+    if not _usage_enabled():
+        return None
+    captured_at = time.time() - (time.monotonic() - item.captured_at)
+    built = _build_usage_payload(
+        item.event,
+        item.properties,
+        item.package_name,
+        item.weight,
+        item.suppressed,
+        timestamp=captured_at,
+    )
+    if aggregate and _aggregate(built):
+        return None
+    return built
+
+
+def _materialize(item: _QueueItem, aggregate: bool = True) -> dict[str, Any] | None:
+    """Like :func:`_prepare`, but always return the payload as a dict."""
+    payload = _prepare(item, aggregate)
+    if isinstance(payload, QueuedEvent):
+        return payload.to_payload()
+    return payload
+
+
+def _usage_payload(
+    event: str,
+    properties: dict[str, Any] | None,
+    package_name: str,
+    timestamp: float | None = None,
+) -> QueuedEvent | None:
+    """Build a usage-event payload, or None when disabled, unnamed, sampled out or rate limited."""
     event_name = str(event or "").strip()
     if not event_name or not _usage_enabled():
-        return False
+        return None
+    admitted = _admit_usage(event_name, package_name)
+    if admitted is None:
+        return None
+    return _build_usage_payload(
+        event_name, properties, package_name, *admitted, timestamp=timestamp
+    )
+
 
-    return _queue_capture_payload(
+def _admit_usage(event_name: str, package_name: str) -> tuple[float, int] | None:
+    """Sample and rate limit; None when dropped, else ``(weight, suppressed)``."""
+    weight = _get_sampler().weight(event_name)
+    if weight is None:
+        return None
+    suppressed = _admit(event_name, package_name)
+    if suppressed is None:
+        return None
+    return weight, suppressed
+
+
+def _build_usage_payload(
+    event_name: str,
+    properties: dict[str, Any] | None,
+    package_name: str,
+    weight: float,
+    suppressed: int,
+    timestamp: float | None = None,
+) -> QueuedEvent:
+    """Scrub ``properties`` and build the event with its sampling and rate-limit markers."""
+    sanitized = _sanitize_properties(properties)
+    if weight != 1.0:
+        sanitized[SAMPLE_WEIGHT_PROPERTY] = weight
+    if suppressed:
+        sanitized[SUPPRESSED_PROPERTY] = suppressed
+    return _build_payload(
         event=event_name,
         distinct_id=_get_distinct_id(),
-        properties={
-            **_base_properties(package_name),
-            **_sanitize_properties(properties),
-        },
+        properties=sanitized,
+        package_name=package_name,
+        timestamp=timestamp,
     )
 
 
@@ -249,3 +1335,63 @@ def capture_usage_event(
 ) -> bool:
     """Alias for capture_event to make usage intent explicit."""
     return capture_event(event=event, properties=properties, package_name=package_name)
+
+
+async def _acapture(
+    build: Callable[[], QueuedEvent | None],
+    aggregate: bool = False,
+) -> bool:
+    """Build a payload off the event loop, then queue it without blocking.
+
+    ``build`` may touch the filesystem (opt-out config, installation ID,
+    package metadata), so it always runs in a worker thread.  When an
+    :class:`~openadapt_telemetry.aio.AsyncPostHogTransport` is running on this
+    loop the payload goes onto its asyncio queue; otherwise it is handed to
+    the threaded sender from the same worker thread.
+
+    With ``aggregate``, payloads are first offered to the rollup aggregator
+    (in the worker thread); rollups are later emitted to the threaded sender.
+    """
+    from .aio import running_transport
+
+    transport = running_transport()
+    if transport is None:
+
+        def build_and_submit() -> bool:
+            payload = build()
+            if payload is None:
+                return False
+            return (aggregate and _aggregate(payload)) or _submit(payload)
+
+        return await asyncio.to_thread(build_and_submit)
+
+    def build_unless_aggregated() -> tuple[QueuedEvent | None, bool]:
+        payload = build()
+        if payload is not None and aggregate and _aggregate(payload):
+            return None, True
+        return payload, False
+
+    payload, aggregated = await asyncio.to_thread(build_unless_aggregated)
+    if payload is None:
+        return aggregated
+    return transport.enqueue(payload)
+
+
+async def acapture_event(
+    event: str,
+    properties: dict[str, Any] | None = None,
+    package_name: str = "openadapt",
+) -> bool:
+    """Coroutine version of :func:`capture_event` that never blocks the event loop."""
+    return await _acapture(
+        functools.partial(_usage_payload, event, properties, package_name), aggregate=True
+    )
+
+
+async def acapture_usage_event(
+    event: str,
+    properties: dict[str, Any] | None = None,
+    package_name: str = "openadapt",
+) -> bool:
+    """Alias for acapture_event to make usage intent explicit."""
+    return await acapture_event(event=event, properties=properties, package_name=package_name)
@@ -13,72 +13,112 @@ import hashlib
 import hmac
 import re
 from functools import lru_cache
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Pattern, Set, Tuple
 
 from .config import get_or_create_anon_salt
 
+
+class _DenyList(set):
+    """A set that counts its mutations, so derived matchers know when to rebuild."""
+
+    version = 0
+
+
+def _bump_version(name: str) -> Callable[..., Any]:
+    method = getattr(set, name)
+
+    def mutate(self: _DenyList, *args: Any) -> Any:
+        try:
+            return method(self, *args)
+        finally:
+            self.version += 1
+
+    mutate.__name__ = name
+    return mutate
+
+
+for _name in (
+    "add",
+    "clear",
+    "discard",
+    "difference_update",
+    "intersection_update",
+    "pop",
+    "remove",
+    "symmetric_difference_update",
+    "update",
+    "__iand__",
+    "__ior__",
+    "__isub__",
+    "__ixor__",
+):
+    setattr(_DenyList, _name, _bump_version(_name))
+del _name
+
 # Sensitive field names that should have their values redacted
-PII_DENYLIST: Set[str] = {
-    # Authentication
-    "password",
-    "passwd",
-    "pwd",
-    "secret",
-    "token",
-    "api_key",
-    "apikey",
-    "api-key",
-    "access_token",
-    "refresh_token",
-    "auth",
-    "authorization",
-    "bearer",
-    "credential",
-    "credentials",
-    # Session/cookies
-    "cookie",
-    "session",
-    "session_id",
-    "sessionid",
-    "csrf",
-    "csrf_token",
-    # Personal information
-    "email",
-    "e-mail",
-    "mail",
-    "phone",
-    "telephone",
-    "mobile",
-    "address",
-    "street",
-    "city",
-    "zip",
-    "zipcode",
-    "postal",
-    "ssn",
-    "social_security",
-    "tax_id",
-    # Financial
-    "credit_card",
-    "creditcard",
-    "card_number",
-    "cvv",
-    "cvc",
-    "expiry",
-    "bank_account",
-    "routing_number",
-    # Database
-    "database_url",
-    "db_password",
-    "connection_string",
-    # Cloud/API
-    "aws_secret",
-    "aws_access_key",
-    "private_key",
-    "public_key",
-    "encryption_key",
-    "signing_key",
-}
+PII_DENYLIST: Set[str] = _DenyList(
+    {
+        # Authentication
+        "password",
+        "passwd",
+        "pwd",
+        "secret",
+        "token",
+        "api_key",
+        "apikey",
+        "api-key",
+        "access_token",
+        "refresh_token",
+        "auth",
+        "authorization",
+        "bearer",
+        "credential",
+        "credentials",
+        # Session/cookies
+        "cookie",
+        "session",
+        "session_id",
+        "sessionid",
+        "csrf",
+        "csrf_token",
+        # Personal information
+        "email",
+        "e-mail",
+        "mail",
+        "phone",
+        "telephone",
+        "mobile",
+        "address",
+        "street",
+        "city",
+        "zip",
+        "zipcode",
+        "postal",
+        "ssn",
+        "social_security",
+        "tax_id",
+        # Financial
+        "credit_card",
+        "creditcard",
+        "card_number",
+        "cvv",
+        "cvc",
+        "expiry",
+        "bank_account",
+        "routing_number",
+        # Database
+        "database_url",
+        "db_password",
+        "connection_string",
+        # Cloud/API
+        "aws_secret",
+        "aws_access_key",
+        "private_key",
+        "public_key",
+        "encryption_key",
+        "signing_key",
+    }
+)
 
 # Patterns for detecting sensitive data in string values
 SENSITIVE_PATTERNS = [
@@ -99,6 +139,32 @@ SENSITIVE_PATTERNS = [
     re.compile(r"[A-Za-z0-9+/]{40,}={0,2}"),
 ]
 
+# Detection-only rewrites of SENSITIVE_PATTERNS, keyed by the original source.
+# Each one matches somewhere in a string exactly when the original does, but
+# fails faster on text with no match: a leading \b moves into a lookbehind so
+# the scan can skip ahead by character class, and open-ended runs are cut to
+# their minimum length.
+_DETECTION_REWRITES: Dict[str, str] = {
+    r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}": (
+        r"[a-zA-Z0-9._%+-]@[a-zA-Z0-9.-]+\.[a-zA-Z]{2}"
+    ),
+    r"\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b": r"\d(?<=\b\d)\d{2}[-.\s]?\d{3}[-.\s]?\d{4}\b",
+    r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b": (
+        r"\d(?<=\b\d)\d{3}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b"
+    ),
+    r"\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b": r"\d(?<=\b\d)\d{2}[-\s]?\d{2}[-\s]?\d{4}\b",
+    r"\b[A-Za-z0-9]{32,}\b": r"[A-Za-z0-9](?<=\b[A-Za-z0-9])[A-Za-z0-9]{31,}\b",
+    r"Bearer\s+[A-Za-z0-9._-]+": r"Bearer\s+[A-Za-z0-9._-]",
+    r"[A-Za-z0-9+/]{40,}={0,2}": r"[A-Za-z0-9+/]{40}",
+}
+
+# The shipped patterns, for which _could_be_sensitive is a sound pre-filter.
+_BUILTIN_PATTERN_SOURCES = frozenset(p.pattern for p in SENSITIVE_PATTERNS)
+# Shortest match of a pattern with no required literal (\b[A-Za-z0-9]{32,}\b).
+_MIN_RUN_LENGTH = 32
+_DIGIT_RUN = re.compile(r"\d{3}")
+_ASCII_DIGITS = b"0123456789"
+
 # Whitelisted tags that retain observability value and are safe to keep.
 ALLOWED_OBSERVABILITY_KEYS: Set[str] = {
     "package",
@@ -122,16 +188,34 @@ def _get_anon_salt_cached() -> str:
     return get_or_create_anon_salt()
 
 
+@lru_cache(maxsize=16)
+def _anonymized_format(prefix: str) -> Pattern:
+    """Compile the canonical anonymous ID formats for ``prefix`` once."""
+    escaped_prefix = re.escape(prefix)
+    # <prefix>:v2:<hex16>, <prefix>:v1:<hex16>, <prefix>:<hex16>, <prefix>:v2:unknown
+    return re.compile(rf"{escaped_prefix}:(?:(?:v[12]:)?[0-9a-f]{{16}}|v2:unknown)$")
+
+
 def _is_already_anonymized(value: str, prefix: str = "anon") -> bool:
     """Return True only for canonical anonymous ID formats."""
-    escaped_prefix = re.escape(prefix)
-    patterns = (
-        rf"^{escaped_prefix}:v2:[0-9a-f]{{16}}$",
-        rf"^{escaped_prefix}:v1:[0-9a-f]{{16}}$",
-        rf"^{escaped_prefix}:[0-9a-f]{{16}}$",
-        rf"^{escaped_prefix}:v2:unknown$",
-    )
-    return any(re.match(pattern, value) for pattern in patterns)
+    return _anonymized_format(prefix).match(value) is not None
+
+
+@lru_cache(maxsize=4)
+def _hmac_template(salt: str) -> hmac.HMAC:
+    """Keyed HMAC-SHA256 state for ``salt``; callers ``.copy()`` it per value."""
+    return hmac.new(salt.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+# The salt is part of the key, so a new salt never serves old pseudonyms.
+MAX_CACHED_PSEUDONYMS = 4096
+
+
+@lru_cache(maxsize=MAX_CACHED_PSEUDONYMS)
+def _pseudonym(salt: str, prefix: str, normalized: str) -> str:
+    mac = _hmac_template(salt).copy()
+    mac.update(normalized.encode("utf-8"))
+    return f"{prefix}:{ANON_VERSION}:{mac.hexdigest()[:16]}"
 
 
 def _scrub_top_level_messages(event: Dict[str, Any]) -> None:
@@ -210,47 +294,162 @@ def sanitize_path(path: str) -> str:
         >>> sanitize_path("C:\\\\Users\\\\bob\\\\code\\\\file.py")
         'C:\\\\Users\\\\<user>\\\\code\\\\file.py'
     """
-    # macOS: /Users/username/
-    path = re.sub(r"/Users/[^/]+/", "/Users/<user>/", path)
+    return _sanitize_path_cached(path)
 
-    # Linux: /home/username/
-    path = re.sub(r"/home/[^/]+/", "/home/<user>/", path)
 
+# Applied in order; later patterns see the output of earlier ones.
+_USER_DIR_PATTERNS = (
+    # macOS: /Users/username/
+    (re.compile(r"/Users/[^/]+/"), "/Users/<user>/"),
+    # Linux: /home/username/
+    (re.compile(r"/home/[^/]+/"), "/home/<user>/"),
     # Windows: C:\Users\username\ (handle both escaped and unescaped)
-    path = re.sub(r"C:\\Users\\[^\\]+\\", r"C:\\Users\\<user>\\", path)
-    path = re.sub(r"C:\\\\Users\\\\[^\\\\]+\\\\", r"C:\\\\Users\\\\<user>\\\\", path)
-
+    (re.compile(r"C:\\Users\\[^\\]+\\"), r"C:\\Users\\<user>\\"),
+    (re.compile(r"C:\\\\Users\\\\[^\\\\]+\\\\"), r"C:\\\\Users\\\\<user>\\\\"),
     # Also handle forward slashes on Windows (git bash, etc.)
-    path = re.sub(r"C:/Users/[^/]+/", "C:/Users/<user>/", path)
-
+    (re.compile(r"C:/Users/[^/]+/"), "C:/Users/<user>/"),
+)
+# Distinct frame paths in a process are few and stable, so results are memoized.
+SANITIZED_PATH_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=SANITIZED_PATH_CACHE_SIZE)
+def _sanitize_path_cached(path: str) -> str:
+    # Every pattern contains "Users" or "/home/"; most paths have neither.
+    if "Users" not in path and "/home/" not in path:
+        return path
+    for pattern, replacement in _USER_DIR_PATTERNS:
+        path = pattern.sub(replacement, path)
     return path
 
 
+# (denylist, version, compiled matcher, {key: verdict}) for the current PII_DENYLIST.
+_key_classifier: Optional[tuple] = None
+MAX_CACHED_KEY_VERDICTS = 4096
+
+
 def is_sensitive_key(key: str) -> bool:
     """Check if a key name indicates sensitive data.
 
+    True when any PII_DENYLIST entry is a substring of the lowercased key
+    (dashes read as underscores).  The denylist is compiled into one regex
+    and verdicts are cached per key; both are rebuilt when PII_DENYLIST is
+    mutated or replaced.
+
     Args:
         key: The key/field name to check.
 
     Returns:
         True if the key suggests sensitive data.
     """
-    key_lower = key.lower().replace("-", "_")
-    return any(denylist_key in key_lower for denylist_key in PII_DENYLIST)
+    denylist = PII_DENYLIST
+    state = _key_classifier
+    if state is None or state[0] is not denylist or state[1] != denylist.version:
+        if not isinstance(denylist, _DenyList):
+            # A replacement plain set cannot report mutations; match it directly.
+            key_lower = key.lower().replace("-", "_")
+            return any(denylist_key in key_lower for denylist_key in denylist)
+        state = _build_key_classifier(denylist)
+    verdicts = state[3]
+    verdict = verdicts.get(key)
+    if verdict is None:
+        key_lower = key.lower().replace("-", "_")
+        matcher = state[2]
+        verdict = matcher is not None and matcher.search(key_lower) is not None
+        if len(verdicts) >= MAX_CACHED_KEY_VERDICTS:
+            verdicts.clear()
+        verdicts[key] = verdict
+    return verdict
+
+
+def _build_key_classifier(denylist: _DenyList) -> tuple:
+    """Compile ``denylist`` into one alternation; returns the classifier state."""
+    global _key_classifier
+
+    version = denylist.version
+    entries = sorted(denylist, key=len, reverse=True)
+    matcher = re.compile("|".join(map(re.escape, entries))) if entries else None
+    state = (denylist, version, matcher, {})
+    _key_classifier = state
+    return state
+
+
+_detector_cache: Optional[tuple] = None
+
+
+def _sensitive_detector() -> Tuple[bool, Optional[Pattern[str]]]:
+    """Return ``(prefilter, detector)`` for the current SENSITIVE_PATTERNS.
+
+    ``detector`` is one regex matching wherever any pattern would, or None if
+    a pattern carries flags that cannot be merged into a single alternation.
+    ``prefilter`` is True while only shipped patterns are in use, so
+    :func:`_could_be_sensitive` may rule strings out.  Rebuilt when
+    SENSITIVE_PATTERNS is modified.
+    """
+    global _detector_cache
+
+    cached = _detector_cache
+    if cached is not None and cached[0] == SENSITIVE_PATTERNS:
+        return cached[1]
+    patterns = list(SENSITIVE_PATTERNS)
+    detector = None
+    if all(p.flags == re.UNICODE for p in patterns):
+        detector = re.compile(
+            "|".join(f"(?:{_DETECTION_REWRITES.get(p.pattern, p.pattern)})" for p in patterns)
+        )
+    prefilter = all(
+        p.pattern in _BUILTIN_PATTERN_SOURCES and p.flags == re.UNICODE for p in patterns
+    )
+    _detector_cache = (patterns, (prefilter, detector))
+    return prefilter, detector
+
+
+def _could_be_sensitive(value: str) -> bool:
+    """Cheap necessary condition for any shipped pattern to match ``value``.
+
+    Every shipped pattern needs one of: 32+ characters (the key and base64
+    runs), an ``@`` (email), a ``+`` (international phone), ``Bearer``, or
+    a run of three digits (phone, card and SSN numbers); an ASCII string
+    with fewer than three digits has no such run.
+    """
+    if len(value) >= _MIN_RUN_LENGTH or "@" in value or "+" in value or "Bearer" in value:
+        return True
+    if value.isascii():
+        # Counting digits with a C-level delete is cheaper than a regex search.
+        digits = len(value) - len(value.encode("ascii").translate(None, _ASCII_DIGITS))
+        return digits >= 3
+    return _DIGIT_RUN.search(value) is not None
+
+
+def _scrub_string_sequential(value: str) -> str:
+    """Apply SENSITIVE_PATTERNS one after another; the reference semantics."""
+    for pattern in SENSITIVE_PATTERNS:
+        value = pattern.sub("[REDACTED]", value)
+    return value
 
 
 def scrub_string(value: str) -> str:
     """Scrub sensitive patterns from a string value.
 
+    Short strings with no ``@``, ``+``, ``Bearer`` or digit run cannot match
+    and are returned as they are without a regex scan.  For the rest, one
+    merged scan decides whether any pattern matches; only strings that
+    contain something sensitive go through the patterns in order.  The
+    patterns must still run in order there, because each one sees the
+    previous one's redactions (a ``[REDACTED]`` marker adds a word boundary).
+
     Args:
         value: The string to scrub.
 
     Returns:
         The scrubbed string with sensitive patterns replaced.
     """
-    for pattern in SENSITIVE_PATTERNS:
-        value = pattern.sub("[REDACTED]", value)
-    return value
+    prefilter, detector = _sensitive_detector()
+    if prefilter and not _could_be_sensitive(value):
+        return value
+    if detector is not None and detector.search(value) is None:
+        return value
+    return _scrub_string_sequential(value)
 
 
 def anonymize_identifier(value: str, prefix: str = "anon") -> str:
@@ -261,13 +460,7 @@ def anonymize_identifier(value: str, prefix: str = "anon") -> str:
     if _is_already_anonymized(normalized, prefix=prefix):
         return normalized
 
-    salt = _get_anon_salt_cached()
-    digest = hmac.new(
-        salt.encode("utf-8"),
-        normalized.encode("utf-8"),
-        hashlib.sha256,
-    ).hexdigest()[:16]
-    return f"{prefix}:{ANON_VERSION}:{digest}"
+    return _pseudonym(_get_anon_salt_cached(), prefix, normalized)
 
 
 def scrub_dict(
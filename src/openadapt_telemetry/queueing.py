@@ -0,0 +1,202 @@
+"""Compact queued events and a byte-bounded queue for the PostHog sender.
+
+A built usage event used to sit in the send queue as a nested dict repeating
+the api_key, the package's base properties and ``$geoip_disable``.
+:class:`QueuedEvent` keeps only the per-event fields and shares references
+to the per-package context and the key; the wire dict is built by
+:meth:`QueuedEvent.to_payload` just before encoding.
+
+:meth:`QueuedEvent.encode` writes the ``/batch/`` item directly.  The
+constant sections (the event/distinct_id head and the per-package context)
+are serialized once and cached as bytes; only the timestamp and the
+caller's properties are encoded per event.  ``orjson`` is used for those
+properties when it is installed.
+
+:class:`ByteBoundedQueue` bounds the queue by the estimated encoded size of
+its items instead of their count, so memory stays predictable whether events
+are small or large.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import time
+from collections import deque
+from typing import Any, Callable, Mapping
+
+try:
+    import orjson as _orjson
+except ImportError:  # optional accelerator
+    _orjson = None
+
+# Rough JSON framing per event: keys, quotes, braces, the timestamp and
+# "$geoip_disable":true.
+_EVENT_OVERHEAD_BYTES = 96
+_PROPERTY_OVERHEAD_BYTES = 6
+_SCALAR_BYTES = 8
+# Keys the encoder writes itself; caller properties using them take the slow path.
+_RESERVED_KEYS = frozenset({"timestamp", "$geoip_disable"})
+_TAIL = b', "$geoip_disable": true}}'
+# Cached fragments are dropped past this many entries to bound memory.
+MAX_CACHED_FRAGMENTS = 1024
+
+# (event, distinct_id) -> b'{"event": ..., "distinct_id": ..., "properties": {'
+_heads: dict[tuple[str, str], bytes] = {}
+# id(context) -> (context, b'<context items>, "timestamp": ', reserved keys)
+_contexts: dict[int, tuple[Mapping[str, Any], bytes, frozenset[str]]] = {}
+
+
+def estimate_properties_size(properties: Mapping[str, Any]) -> int:
+    """Approximate encoded size of a flat properties mapping."""
+    size = 0
+    for key, value in properties.items():
+        size += len(key) + _PROPERTY_OVERHEAD_BYTES
+        size += len(value) if isinstance(value, str) else _SCALAR_BYTES
+    return size
+
+
+class QueuedEvent:
+    """One queued event: per-event fields plus shared per-package references."""
+
+    __slots__ = ("api_key", "event", "distinct_id", "context", "properties", "timestamp", "size")
+
+    def __init__(
+        self,
+        api_key: str,
+        event: str,
+        distinct_id: str,
+        context: Mapping[str, Any],
+        properties: Mapping[str, Any],
+        timestamp: float,
+    ) -> None:
+        self.api_key = api_key
+        self.event = event
+        self.distinct_id = distinct_id
+        self.context = context
+        self.properties = properties
+        self.timestamp = timestamp
+        self.size = (
+            _EVENT_OVERHEAD_BYTES
+            + len(event)
+            + len(distinct_id)
+            + estimate_properties_size(context)
+            + estimate_properties_size(properties)
+        )
+
+    def encode(self) -> bytes:
+        """Encode as a ``/batch/`` item: ``to_payload()`` without the api_key.
+
+        Without ``orjson`` the bytes are identical to ``json.dumps`` of that
+        dict; with it, only the properties section differs in whitespace and
+        escaping.
+        """
+        head = _heads.get((self.event, self.distinct_id))
+        if head is None:
+            if len(_heads) >= MAX_CACHED_FRAGMENTS:
+                _heads.clear()
+            head = _heads[(self.event, self.distinct_id)] = (
+                f'{{"event": {json.dumps(self.event)}, '
+                f'"distinct_id": {json.dumps(self.distinct_id)}, "properties": {{'
+            ).encode("utf-8")
+        cached = _contexts.get(id(self.context))
+        if cached is None or cached[0] is not self.context:
+            cached = _context_fragment(self.context)
+        properties = self.properties
+        if not properties:
+            body = b""
+        elif cached[2].isdisjoint(properties):
+            body = b", " + _encode_properties(properties)[1:-1]
+        else:
+            # Properties override context keys; let the reference encoder merge them.
+            payload = self.to_payload()
+            del payload["api_key"]
+            return json.dumps(payload).encode("utf-8")
+        return b"".join((head, cached[1], str(int(self.timestamp)).encode(), body, _TAIL))
+
+    def to_payload(self) -> dict[str, Any]:
+        """Build the PostHog payload dict for this event."""
+        return {
+            "api_key": self.api_key,
+            "event": self.event,
+            "distinct_id": self.distinct_id,
+            # This client runs on end-user machines. Explicitly suppress PostHog's
+            # ingest-side IP geolocation for every event; callers cannot override
+            # the privacy boundary with a supplied property.
+            "properties": {
+                **self.context,
+                "timestamp": int(self.timestamp),
+                **self.properties,
+                "$geoip_disable": True,
+            },
+        }
+
+
+class ByteBoundedQueue(queue.Queue):  # type: ignore[type-arg]
+    """A FIFO queue bounded by the summed size of its items rather than their count.
+
+    ``item_size`` is called once per item on the way in.  An item larger than
+    ``max_bytes`` is still accepted into an empty queue, so it is never stuck.
+    A ``max_bytes`` of 0 means unbounded.
+    """
+
+    def __init__(self, max_bytes: int, item_size: Callable[[Any], int]) -> None:
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._item_size = item_size
+        self._sizes: deque[int] = deque()
+
+    def _fits(self, size: int) -> bool:
+        return self.max_bytes <= 0 or not self.bytes or self.bytes + size <= self.max_bytes
+
+    def put(self, item: Any, block: bool = True, timeout: float | None = None) -> None:
+        size = self._item_size(item)
+        with self.not_full:
+            if not block:
+                if not self._fits(size):
+                    raise queue.Full
+            elif timeout is None:
+                while not self._fits(size):
+                    self.not_full.wait()
+            elif timeout < 0:
+                raise ValueError("'timeout' must be a non-negative number")
+            else:
+                endtime = time.monotonic() + timeout
+                while not self._fits(size):
+                    remaining = endtime - time.monotonic()
+                    if remaining <= 0.0:
+                        raise queue.Full
+                    self.not_full.wait(remaining)
+            self.queue.append(item)
+            self._sizes.append(size)
+            self.bytes += size
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def _get(self) -> Any:
+        self.bytes -= self._sizes.popleft()
+        return self.queue.popleft()
+
+
+def _context_fragment(
+    context: Mapping[str, Any],
+) -> tuple[Mapping[str, Any], bytes, frozenset[str]]:
+    items = json.dumps(dict(context))[1:-1]
+    fragment = f'{items}, "timestamp": ' if items else '"timestamp": '
+    cached = (context, fragment.encode("utf-8"), _RESERVED_KEYS | frozenset(context))
+    if len(_contexts) >= MAX_CACHED_FRAGMENTS:
+        _contexts.clear()
+    _contexts[id(context)] = cached
+    return cached
+
+
+def _encode_properties(properties: Mapping[str, Any]) -> bytes:
+    if type(properties) is not dict:
+        properties = dict(properties)
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(properties)
+        except TypeError:
+            pass  # out-of-range ints and other values orjson rejects
+    return json.dumps(properties).encode("utf-8")
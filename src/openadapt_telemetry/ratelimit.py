@@ -0,0 +1,108 @@
+"""Token-bucket rate limiting for PostHog events.
+
+A runaway loop calling ``capture_usage_event`` can fill the send queue and
+starve every other event.  :class:`RateLimiter` keeps one token bucket per
+event name and one per package; an event is admitted only if both have a
+token.  Calls that are suppressed are counted per event name and the count is
+attached to the next admitted event with that name, so totals can be
+reconstructed downstream.
+
+The buckets take no locks.  Under the GIL a bucket update can interleave
+with another thread's, which at worst admits or suppresses an extra event;
+in exchange a check costs a clock read and a few float operations.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+SUPPRESSED_PROPERTY = "$rate_limited"
+# Buckets are forgotten past this many keys to bound memory.
+MAX_BUCKETS = 1024
+
+
+class TokenBucket:
+    """Allows ``burst`` events at once, refilled at ``rate`` tokens per second."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        tokens = self.tokens + (now - self.updated) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        self.updated = now
+        if tokens < 1.0:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - 1.0
+        return True
+
+
+class RateLimiter:
+    """Per-event-name and per-package token buckets.
+
+    A rate of 0 disables that dimension.
+    """
+
+    def __init__(
+        self,
+        event_rate: float = 0.0,
+        event_burst: float = 0.0,
+        package_rate: float = 0.0,
+        package_burst: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.event_rate = event_rate
+        self.event_burst = event_burst or event_rate
+        self.package_rate = package_rate
+        self.package_burst = package_burst or package_rate
+        self._clock = clock
+        self._event_buckets: dict[str, TokenBucket] = {}
+        self._package_buckets: dict[str, TokenBucket] = {}
+        self._suppressed: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.event_rate > 0 or self.package_rate > 0
+
+    def _bucket(
+        self, buckets: dict[str, TokenBucket], key: str, rate: float, burst: float, now: float
+    ) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= MAX_BUCKETS:
+                buckets.clear()
+            bucket = buckets.setdefault(key, TokenBucket(rate, burst, now))
+        return bucket
+
+    def admit(self, event: str, package: str) -> int | None:
+        """Return None if the event is suppressed.
+
+        Otherwise return how many calls with this event name were suppressed
+        since the last admitted one (usually 0).
+        """
+        now = self._clock()
+        allowed = True
+        if self.event_rate > 0:
+            bucket = self._bucket(
+                self._event_buckets, event, self.event_rate, self.event_burst, now
+            )
+            allowed = bucket.take(now)
+        if allowed and self.package_rate > 0:
+            bucket = self._bucket(
+                self._package_buckets, package, self.package_rate, self.package_burst, now
+            )
+            allowed = bucket.take(now)
+        if not allowed:
+            if len(self._suppressed) >= MAX_BUCKETS and event not in self._suppressed:
+                return None
+            self._suppressed[event] = self._suppressed.get(event, 0) + 1
+            return None
+        return self._suppressed.pop(event, 0) if self._suppressed else 0
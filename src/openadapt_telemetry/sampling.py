@@ -0,0 +1,67 @@
+"""Per-event-name sampling for PostHog usage events.
+
+Rules map event-name glob patterns (``fnmatch`` syntax, case-sensitive) to a
+keep rate between 0 and 1; the first matching rule wins and unmatched events
+are always kept.  Rules come from ``TelemetryConfig.usage_sample_rates`` or
+``OPENADAPT_POSTHOG_SAMPLE_RATES`` (``"action_*=0.01,agent_run=1"``).
+
+Sampling is deterministic rather than random per event: each event name has
+an accumulator that gains ``rate`` per call and keeps the call whenever it
+crosses 1, so exactly one in ``1 / rate`` calls is kept.  The accumulator
+starts at a random phase (one RNG call per event name, not per event), so
+short-lived processes are not biased toward keeping or skipping their first
+calls.  Kept events carry ``$sample_weight = 1 / rate`` so downstream counts
+can be re-weighted.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import random
+import threading
+from typing import Mapping
+
+SAMPLE_WEIGHT_PROPERTY = "$sample_weight"
+# Resolved per-name state is cleared past this many names to bound memory.
+MAX_TRACKED_EVENTS = 1024
+
+
+class UsageSampler:
+    """Decides which usage events to keep under a sampling-rule table."""
+
+    def __init__(self, rules: Mapping[str, float]) -> None:
+        self.rules = tuple((pattern, min(1.0, max(0.0, rate))) for pattern, rate in rules.items())
+        self._lock = threading.Lock()
+        # event name -> [rate, accumulator]
+        self._state: dict[str, list[float]] = {}
+
+    def _rate(self, event: str) -> float:
+        for pattern, rate in self.rules:
+            if fnmatch.fnmatchcase(event, pattern):
+                return rate
+        return 1.0
+
+    def weight(self, event: str) -> float | None:
+        """Return the sample weight if ``event`` is kept, or None if sampled out.
+
+        A weight of 1.0 means the event is not sampled at all.
+        """
+        if not self.rules:
+            return 1.0
+        with self._lock:
+            state = self._state.get(event)
+            if state is None:
+                if len(self._state) >= MAX_TRACKED_EVENTS:
+                    self._state.clear()
+                rate = self._rate(event)
+                state = self._state[event] = [rate, random.random()]
+            rate = state[0]
+            if rate >= 1.0:
+                return 1.0
+            if rate <= 0.0:
+                return None
+            state[1] += rate
+            if state[1] < 1.0:
+                return None
+            state[1] -= 1.0
+        return 1.0 / rate
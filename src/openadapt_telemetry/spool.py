@@ -0,0 +1,355 @@
+"""Durable on-disk spool for PostHog events.
+
+Events that cannot be delivered (host unreachable, process exiting) are
+appended to segment files under ``~/.openadapt/telemetry_spool`` and replayed,
+oldest first, the next time a sender starts.  The layout is built for several
+short-lived processes sharing one directory:
+
+- each process appends JSON lines to its own ``<time_ns>-<pid>.open`` segment
+- a segment is sealed (renamed to ``.seg``) when it reaches the rotation size
+  or its writer closes; only sealed segments are ever replayed
+- a replaying process claims a segment by renaming it to ``.claimed``, so two
+  processes never send the same segment
+- ``fsync`` is batched by record count and elapsed time rather than paid per
+  event
+- the directory is capped in bytes; the oldest sealed segments are evicted
+  first when the cap is exceeded
+
+A crash can lose at most the records written since the last ``fsync``; a torn
+final line is skipped on replay.
+
+With ``hoist_shared`` the records of one ``append`` call are written as a
+single JSON array line: a header holding the scalar fields and properties
+every record shares (the api_key, package, version, platform, ...) followed
+by the records without them.  Replay expands the header back into each
+record.  Readers that predate this skip array lines instead of misreading them.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+DEFAULT_SPOOL_DIR = Path.home() / ".openadapt" / "telemetry_spool"
+SEGMENT_MAX_BYTES = 1024 * 1024
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+FSYNC_EVERY_RECORDS = 64
+FSYNC_INTERVAL_SECONDS = 1.0
+# Claims left behind by a replayer that died (and, on Windows, where writer
+# liveness cannot be probed, open segments) are recovered after this.
+STALE_SEGMENT_SECONDS = 600.0
+# Records per hoisted line, bounding what one torn write can lose.
+HOIST_MAX_RECORDS = 100
+
+_OPEN_SUFFIX = ".open"
+_SEALED_SUFFIX = ".seg"
+_CLAIMED_SUFFIX = ".claimed"
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class Spool:
+    """Append-only segment spool shared by every process on the machine."""
+
+    def __init__(
+        self,
+        directory: Path | str = DEFAULT_SPOOL_DIR,
+        segment_max_bytes: int = SEGMENT_MAX_BYTES,
+        max_bytes: int = SPOOL_MAX_BYTES,
+        fsync_every: int = FSYNC_EVERY_RECORDS,
+        fsync_interval: float = FSYNC_INTERVAL_SECONDS,
+        hoist_shared: bool = False,
+    ) -> None:
+        self.directory = Path(directory)
+        self.segment_max_bytes = max(1, segment_max_bytes)
+        self.max_bytes = max(self.segment_max_bytes, max_bytes)
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self.hoist_shared = hoist_shared
+        self.evicted_segments = 0
+        self._lock = threading.Lock()
+        self._file: Any = None
+        self._path: Path | None = None
+        self._segment_bytes = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._recover_stale()
+
+    # -- writing -----------------------------------------------------------
+
+    def append(self, records: Iterable[dict[str, Any]]) -> int:
+        """Append records to the active segment; returns how many were written."""
+        lines = _encode_lines(list(records), self.hoist_shared)
+        if not lines:
+            return 0
+        with self._lock:
+            for data, count in lines:
+                if self._file is None:
+                    self._open_segment()
+                self._file.write(data)
+                self._segment_bytes += len(data)
+                self._unsynced += count
+                if self._segment_bytes >= self.segment_max_bytes:
+                    self._seal_segment()
+            if self._file is not None:
+                self._file.flush()
+                if (
+                    self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval
+                ):
+                    self._sync_locked()
+        return sum(count for _, count in lines)
+
+    def sync(self) -> None:
+        """Force buffered records to stable storage."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._sync_locked()
+
+    def close(self) -> None:
+        """Sync and seal the active segment so it becomes replayable."""
+        with self._lock:
+            self._seal_segment()
+
+    def _open_segment(self) -> None:
+        name = f"{time.time_ns():020d}-{os.getpid()}{_OPEN_SUFFIX}"
+        self._path = self.directory / name
+        self._file = open(self._path, "ab")
+        self._segment_bytes = 0
+
+    def _sync_locked(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _seal_segment(self) -> None:
+        if self._file is None or self._path is None:
+            return
+        try:
+            self._file.flush()
+            self._sync_locked()
+        finally:
+            file, path = self._file, self._path
+            self._file = None
+            self._path = None
+            file.close()
+        try:
+            os.replace(path, path.with_suffix(_SEALED_SUFFIX))
+        except FileNotFoundError:
+            pass  # already recovered by another process
+        self._enforce_cap()
+
+    def _enforce_cap(self) -> None:
+        segments = self._sealed_segments()
+        total = sum(size for _, size in segments)
+        for path, size in segments:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evicted_segments += 1
+
+    # -- replay ------------------------------------------------------------
+
+    def _sealed_segments(self) -> list[tuple[Path, int]]:
+        segments = []
+        for path in sorted(self.directory.glob(f"*{_SEALED_SUFFIX}")):
+            try:
+                segments.append((path, path.stat().st_size))
+            except OSError:
+                continue
+        return segments
+
+    def _recover_stale(self) -> None:
+        now = time.time()
+        for path in self.directory.glob(f"*{_OPEN_SUFFIX}"):
+            pid = -1
+            try:
+                pid = int(path.stem.rsplit("-", 1)[1])
+                if os.name == "nt":
+                    # Liveness cannot be probed here, and renaming a segment its
+                    # writer still holds open fails on Windows anyway.
+                    stale = now - path.stat().st_mtime > STALE_SEGMENT_SECONDS
+                else:
+                    # A live writer's segment is never taken over, however idle.
+                    stale = not _pid_alive(pid)
+            except (IndexError, ValueError, OSError):
+                stale = True
+            if stale and pid != os.getpid():
+                try:
+                    os.replace(path, path.with_suffix(_SEALED_SUFFIX))
+                except OSError:
+                    continue
+        for path in self.directory.glob(f"*{_CLAIMED_SUFFIX}"):
+            try:
+                if now - path.stat().st_mtime > STALE_SEGMENT_SECONDS:
+                    os.replace(path, path.with_suffix(_SEALED_SUFFIX))
+            except OSError:
+                continue
+
+    def pending_segments(self) -> int:
+        """Number of sealed segments waiting for replay."""
+        return len(self._sealed_segments())
+
+    def replay(self, send: Callable[[list[dict[str, Any]]], bool], chunk_size: int = 100) -> int:
+        """Send spooled records oldest-first through ``send`` in chunks.
+
+        ``send`` returns True when a chunk was delivered.  On the first failed
+        chunk the undelivered remainder of that segment is written back in
+        place and replay stops, preserving order for the next attempt.
+
+        Returns:
+            The number of records delivered.
+        """
+        delivered = 0
+        for path, _ in self._sealed_segments():
+            claimed = path.with_suffix(_CLAIMED_SUFFIX)
+            try:
+                os.replace(path, claimed)
+            except OSError:
+                continue  # another process claimed it first
+            try:
+                os.utime(claimed)  # keep a live claim from looking stale to others
+            except OSError:
+                pass
+            records = _read_records(claimed)
+            for start in range(0, len(records), max(1, chunk_size)):
+                chunk = records[start : start + chunk_size]
+                if not send(chunk):
+                    _rewrite(claimed, records[start:], self.hoist_shared)
+                    os.replace(claimed, path)
+                    return delivered
+                delivered += len(chunk)
+            try:
+                claimed.unlink()
+            except OSError:
+                pass
+        return delivered
+
+
+def _is_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float))
+
+
+def _same(a: Any, b: Any) -> bool:
+    # type check first: 1, 1.0 and True compare equal but encode differently
+    return type(a) is type(b) and a == b
+
+
+def _hoist(records: list[dict[str, Any]]) -> list[Any] | None:
+    """Pack records as ``[header, *stripped]``, or None when nothing is shared."""
+    first = records[0]
+    fields = {k: v for k, v in first.items() if k != "properties" and _is_scalar(v)}
+    properties = first.get("properties")
+    shared_props = (
+        {k: v for k, v in properties.items() if _is_scalar(v)}
+        if isinstance(properties, dict)
+        else {}
+    )
+    for record in records[1:]:
+        fields = {k: v for k, v in fields.items() if k in record and _same(record[k], v)}
+        other = record.get("properties")
+        if not isinstance(other, dict):
+            shared_props = {}
+        elif shared_props:
+            shared_props = {
+                k: v for k, v in shared_props.items() if k in other and _same(other[k], v)
+            }
+        if not fields and not shared_props:
+            return None
+    header: dict[str, Any] = dict(fields)
+    if shared_props:
+        header["properties"] = shared_props
+    stripped = []
+    for record in records:
+        rest = {k: v for k, v in record.items() if k not in fields}
+        if shared_props:
+            rest["properties"] = {
+                k: v for k, v in record["properties"].items() if k not in shared_props
+            }
+        stripped.append(rest)
+    return [header, *stripped]
+
+
+def _expand(line: list[Any]) -> list[dict[str, Any]]:
+    """Inverse of :func:`_hoist`; malformed lines yield no records."""
+    if not line or not isinstance(line[0], dict):
+        return []
+    header = line[0]
+    shared_props = header.get("properties")
+    records = []
+    for rest in line[1:]:
+        if not isinstance(rest, dict):
+            continue
+        record = {**header, **rest}
+        if isinstance(shared_props, dict):
+            record["properties"] = {**shared_props, **rest.get("properties", {})}
+        records.append(record)
+    return records
+
+
+def _encode_lines(records: list[dict[str, Any]], hoist_shared: bool) -> list[tuple[bytes, int]]:
+    """Encode records as ``(line, record_count)`` pairs."""
+    lines = []
+    if hoist_shared and len(records) > 1:
+        for start in range(0, len(records), HOIST_MAX_RECORDS):
+            chunk = records[start : start + HOIST_MAX_RECORDS]
+            packed = _hoist(chunk) if len(chunk) > 1 else None
+            if packed is None:
+                lines.extend(_encode_lines(chunk, False))
+            else:
+                lines.append((_dumps(packed), len(chunk)))
+        return lines
+    return [(_dumps(record), 1) for record in records]
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _read_records(path: Path) -> list[dict[str, Any]]:
+    records = []
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash
+                if isinstance(record, dict):
+                    records.append(record)
+                elif isinstance(record, list):
+                    records.extend(_expand(record))
+    except OSError:
+        return []
+    return records
+
+
+def _rewrite(path: Path, records: list[dict[str, Any]], hoist_shared: bool = False) -> None:
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        for data, _ in _encode_lines(records, hoist_shared):
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,418 @@
+"""Keep-alive HTTP transport for telemetry ingestion.
+
+The PostHog sender posts small JSON bodies to a single host.  Opening a fresh
+``urllib`` connection for each request costs a DNS lookup, a TCP connect and a
+TLS handshake every time, which dominates latency on slow links.  This module
+keeps a small pool of persistent ``http.client`` connections per host instead:
+
+- idle connections are reused in LIFO order so the warmest socket goes first
+- a request on a reused connection that the server closed while idle is
+  transparently retried once on a fresh connection
+- TLS sessions are cached per pool so reconnects resume instead of doing a
+  full handshake
+- ``HTTPS_PROXY``/``HTTP_PROXY``/``NO_PROXY`` are honored the way ``urllib``
+  honored them before: HTTPS is tunnelled with CONNECT, plain HTTP is sent to
+  the proxy with an absolute URI, and credentials in the proxy URL are sent
+  as ``Proxy-Authorization: Basic``
+
+:func:`send_with_retry` layers bounded retries (exponential backoff with
+full jitter, honoring ``Retry-After``) and a :class:`CircuitBreaker` on top,
+so an ingestion outage costs a lock and a clock read per request instead of
+a network timeout.
+"""
+
+from __future__ import annotations
+
+import base64
+import email.utils
+import http.client
+import queue
+import random
+import ssl
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Any, Callable, Mapping
+from urllib.parse import unquote, urlsplit
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_RETRY_BASE_SECONDS = 0.25
+DEFAULT_RETRY_MAX_SECONDS = 5.0
+DEFAULT_CIRCUIT_FAILURES = 5
+DEFAULT_CIRCUIT_COOLDOWN_SECONDS = 30.0
+USER_AGENT = "openadapt-telemetry-posthog/1"
+
+# Errors that mean a reused keep-alive socket went stale while idle.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+@dataclass(frozen=True)
+class TransportResponse:
+    """Status and headers of a completed request (header names lowercased)."""
+
+    status: int
+    headers: Mapping[str, str] = field(default_factory=dict)
+
+
+class _SessionCache:
+    """Holds the most recent TLS session so reconnects can resume it."""
+
+    def __init__(self) -> None:
+        self.session: ssl.SSLSession | None = None
+
+
+class _ResumingHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection that offers the pool's cached TLS session on connect."""
+
+    def __init__(self, *args: Any, session_cache: _SessionCache, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._session_cache = session_cache
+
+    def connect(self) -> None:
+        http.client.HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        session = self._session_cache.session
+        try:
+            self.sock = self._context.wrap_socket(
+                self.sock, server_hostname=server_hostname, session=session
+            )
+        except ssl.SSLError:
+            if session is None:
+                raise
+            # The server rejected the cached session; fall back to a full handshake.
+            self._session_cache.session = None
+            self.sock.close()
+            http.client.HTTPConnection.connect(self)
+            self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname)
+
+    def remember_session(self) -> None:
+        """Cache the current TLS session (TLS 1.3 tickets arrive after the handshake)."""
+        sock = self.sock
+        if isinstance(sock, ssl.SSLSocket) and sock.session is not None:
+            self._session_cache.session = sock.session
+
+
+class _ForwardProxyConnection(http.client.HTTPConnection):
+    """Plain-HTTP connection to a forward proxy, sending absolute-URI requests."""
+
+    def __init__(
+        self, *args: Any, origin: str, proxy_headers: Mapping[str, str], **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self._origin = origin
+        self._proxy_headers = dict(proxy_headers)
+
+    def request(  # type: ignore[override]
+        self,
+        method: str,
+        url: str,
+        body: Any = None,
+        headers: Mapping[str, str] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        # http.client derives the Host header from an absolute URI.
+        super().request(
+            method,
+            self._origin + url,
+            body=body,
+            headers={**(headers or {}), **self._proxy_headers},
+            **kwargs,
+        )
+
+
+def _proxy_auth_headers(username: str | None, password: str | None) -> dict[str, str]:
+    """``Proxy-Authorization`` for credentials in a proxy URL, as ``urllib`` sends it."""
+    if not username or not password:
+        return {}
+    credentials = f"{unquote(username)}:{unquote(password)}".encode()
+    return {"Proxy-Authorization": f"Basic {base64.b64encode(credentials).decode('ascii')}"}
+
+
+class ConnectionPool:
+    """A small pool of persistent connections to one ``scheme://host[:port]``.
+
+    Thread-safe: each caller checks a connection out for the duration of one
+    request, so up to ``size`` requests can be in flight concurrently without
+    sharing a socket.  Connections beyond ``size`` are opened on demand and
+    closed after use instead of being returned to the pool.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        size: int = DEFAULT_POOL_SIZE,
+        timeout: float = 1.0,
+        ssl_context: ssl.SSLContext | None = None,
+    ) -> None:
+        parts = urlsplit(base_url)
+        if parts.scheme not in {"http", "https"} or not parts.hostname:
+            raise ValueError(f"unsupported telemetry host: {base_url!r}")
+        self.base_url = base_url.rstrip("/")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._ssl_context = ssl_context
+        self._session_cache = _SessionCache()
+        self._idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _proxy(self) -> tuple[str, int | None, dict[str, str]] | None:
+        """Return ``(host, port, auth headers)`` of the proxy for this pool, if any."""
+        proxy_url = urllib.request.getproxies().get(self.scheme)
+        if not proxy_url or urllib.request.proxy_bypass(self.host):
+            return None
+        proxy = urlsplit(proxy_url if "://" in proxy_url else f"http://{proxy_url}")
+        if not proxy.hostname:
+            return None
+        return proxy.hostname, proxy.port, _proxy_auth_headers(proxy.username, proxy.password)
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        proxy = self._proxy()
+        if self.scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            host, port = (self.host, self.port) if proxy is None else proxy[:2]
+            conn = _ResumingHTTPSConnection(
+                host,
+                port,
+                timeout=self.timeout,
+                context=self._ssl_context,
+                session_cache=self._session_cache,
+            )
+            if proxy is not None:
+                conn.set_tunnel(self.host, self.port, headers=proxy[2])
+            return conn
+        if proxy is not None:
+            origin = self.host if self.port is None else f"{self.host}:{self.port}"
+            return _ForwardProxyConnection(
+                proxy[0],
+                proxy[1],
+                timeout=self.timeout,
+                origin=f"http://{origin}",
+                proxy_headers=proxy[2],
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _checkout(self) -> tuple[http.client.HTTPConnection, bool]:
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _checkin(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if not self._closed and self._idle.qsize() < self.size:
+                self._idle.put_nowait(conn)
+                return
+        conn.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes,
+        headers: Mapping[str, str] | None = None,
+    ) -> TransportResponse:
+        """Send one request and fully read its response so the socket is reusable.
+
+        Raises:
+            OSError / http.client.HTTPException: when the request fails on a
+                fresh connection.  Failures on a reused idle connection are
+                retried once before surfacing.
+        """
+        all_headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive"}
+        all_headers.update(headers or {})
+        url = f"{self.base_path}{path}"
+        conn, reused = self._checkout()
+        while True:
+            try:
+                conn.request(method, url, body=body, headers=all_headers)
+                response = conn.getresponse()
+                response.read()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                conn, reused = self._new_connection(), False
+                continue
+            except BaseException:
+                conn.close()
+                raise
+            break
+        if isinstance(conn, _ResumingHTTPSConnection):
+            conn.remember_session()
+        result = TransportResponse(
+            status=response.status,
+            headers={name.lower(): value for name, value in response.getheaders()},
+        )
+        if response.will_close:
+            conn.close()
+        else:
+            self._checkin(conn)
+        return result
+
+    def close(self) -> None:
+        """Close all idle connections; in-flight ones close when checked back in."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _is_retryable(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a ``Retry-After`` header given as seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Bounded exponential backoff with full jitter."""
+
+    max_retries: int = DEFAULT_MAX_RETRIES
+    base_delay: float = DEFAULT_RETRY_BASE_SECONDS
+    max_delay: float = DEFAULT_RETRY_MAX_SECONDS
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float | None:
+        """Return the delay before retry number ``attempt`` (1-based), or None to give up.
+
+        A server-supplied ``Retry-After`` is honored as a lower bound; when it
+        exceeds ``max_delay`` the request is not retried at all.
+        """
+        if attempt > self.max_retries:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0.0, ceiling)
+
+
+class CircuitBreaker:
+    """Stops dialing a host after consecutive failures, for a cooldown period.
+
+    closed -> open after ``failure_threshold`` consecutive failures (or as soon
+    as the server asks for a ``Retry-After`` pause).  Once the cooldown
+    elapses a single probe request is let through (half-open); its success
+    closes the circuit and its failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_CIRCUIT_FAILURES,
+        cooldown: float = DEFAULT_CIRCUIT_COOLDOWN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._open_until = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Return True if a request may be attempted now."""
+        if self._state == self.CLOSED:
+            return True
+        with self._lock:
+            if self._state == self.OPEN and self._clock() >= self._open_until:
+                self._state = self.HALF_OPEN
+                return True
+            return self._state == self.CLOSED
+
+    def record_success(self) -> None:
+        if self._state == self.CLOSED and not self._failures:
+            return
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        with self._lock:
+            self._failures += 1
+            pause = 0.0
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                pause = self.cooldown
+            if retry_after is not None:
+                pause = max(pause, retry_after)
+            if pause > 0:
+                self._state = self.OPEN
+                self._open_until = max(self._open_until, self._clock() + pause)
+
+
+def send_with_retry(
+    pool: ConnectionPool,
+    method: str,
+    path: str,
+    body: bytes,
+    headers: Mapping[str, str] | None = None,
+    *,
+    policy: RetryPolicy | None = None,
+    breaker: CircuitBreaker | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> bool:
+    """Send a request, retrying connection errors, 5xx and 429 responses.
+
+    Returns:
+        True when the server accepted or permanently rejected the request
+        (any non-retryable status); False when it should be kept for later,
+        including when the circuit breaker is open.
+    """
+    policy = policy or RetryPolicy()
+    breaker = breaker or CircuitBreaker()
+    attempt = 0
+    while breaker.allow():
+        retry_after = None
+        try:
+            response = pool.request(method, path, body, headers)
+        except (http.client.HTTPException, OSError):
+            response = None
+        if response is not None and not _is_retryable(response.status):
+            breaker.record_success()
+            return True
+        if response is not None:
+            retry_after = _parse_retry_after(response.headers.get("retry-after"))
+        breaker.record_failure(retry_after)
+        attempt += 1
+        delay = policy.backoff(attempt, retry_after)
+        if delay is None:
+            return False
+        sleep(delay)
+    return False
@@ -5,15 +5,20 @@ from unittest.mock import patch
 
 import pytest
 
+from openadapt_telemetry import posthog
 from openadapt_telemetry.client import TelemetryClient
 
 
 @pytest.fixture(autouse=True)
 def reset_telemetry():
-    """Reset telemetry singleton before and after each test."""
+    """Reset telemetry singleton, cached usage decision and in-flight tracking around each test."""
     TelemetryClient.reset_instance()
+    posthog.invalidate_usage_cache()
+    posthog._in_flight = posthog._InFlight()
     yield
     TelemetryClient.reset_instance()
+    posthog.invalidate_usage_cache()
+    posthog._in_flight = posthog._InFlight()
 
 
 @pytest.fixture
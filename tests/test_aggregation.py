@@ -0,0 +1,88 @@
+"""Tests for client-side usage-event rollups."""
+
+from __future__ import annotations
+
+import threading
+
+from openadapt_telemetry.aggregation import EventAggregator
+
+
+def _payload(event: str = "action_executed", timestamp: int = 0, **properties) -> dict:  # noqa: ANN003
+    return {
+        "api_key": "phc_test",
+        "event": event,
+        "distinct_id": "test-id",
+        "properties": {"timestamp": timestamp, **properties},
+    }
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_identical_events_fold_into_one_rollup() -> None:
+    emitted: list[dict] = []
+    clock = _Clock()
+    aggregator = EventAggregator(60.0, emitted.append, clock=clock)
+    for i in range(500):
+        clock.now = 1_000.0 + i * 0.01
+        assert aggregator.add(_payload(timestamp=int(clock.now), kind="click")) is True
+    assert emitted == []
+    assert aggregator.flush() == 1
+    (rollup,) = emitted
+    assert rollup["event"] == "action_executed"
+    assert rollup["properties"]["kind"] == "click"
+    assert rollup["properties"]["count"] == 500
+    assert rollup["properties"]["first_seen"] == 1_000.0
+    assert rollup["properties"]["last_seen"] == 1_004.99
+    assert rollup["properties"]["timestamp"] == 1_000
+    assert rollup["timestamp"].startswith("1970-01-01T00:16:40")
+
+
+def test_distinct_properties_keep_separate_rollups() -> None:
+    emitted: list[dict] = []
+    aggregator = EventAggregator(60.0, emitted.append)
+    for kind in ("click", "type", "click", "click"):
+        aggregator.add(_payload(kind=kind))
+    aggregator.add(_payload("demo_recorded", kind="click"))
+    assert aggregator.pending() == 3
+    aggregator.flush()
+    counts = {(p["event"], p["properties"]["kind"]): p["properties"]["count"] for p in emitted}
+    assert counts == {
+        ("action_executed", "click"): 3,
+        ("action_executed", "type"): 1,
+        ("demo_recorded", "click"): 1,
+    }
+
+
+def test_least_recently_used_rollup_is_emitted_on_eviction() -> None:
+    emitted: list[dict] = []
+    aggregator = EventAggregator(60.0, emitted.append, max_keys=2)
+    aggregator.add(_payload(kind="a"))
+    aggregator.add(_payload(kind="b"))
+    aggregator.add(_payload(kind="a"))
+    aggregator.add(_payload(kind="c"))
+    assert [(p["properties"]["kind"], p["properties"]["count"]) for p in emitted] == [("b", 1)]
+    assert aggregator.pending() == 2
+    aggregator.flush()
+    assert sorted(p["properties"]["kind"] for p in emitted) == ["a", "b", "c"]
+
+
+def test_window_expiry_emits_pending_rollups() -> None:
+    emitted: list[dict] = []
+    done = threading.Event()
+
+    def emit(payload: dict) -> None:
+        emitted.append(payload)
+        done.set()
+
+    aggregator = EventAggregator(0.05, emit)
+    aggregator.add(_payload(kind="click"))
+    aggregator.add(_payload(kind="click"))
+    assert done.wait(timeout=2.0)
+    assert [p["properties"]["count"] for p in emitted] == [2]
+    assert aggregator.pending() == 0
@@ -0,0 +1,131 @@
+"""Tests for the asyncio capture API and transport."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+
+import openadapt_telemetry.posthog as posthog
+from openadapt_telemetry.aio import AsyncPostHogTransport, running_transport
+from openadapt_telemetry.failure_signals import (
+    AutomationFailureSignal,
+    FailureKind,
+    Substrate,
+    acapture_automation_failure,
+)
+from openadapt_telemetry.posthog import acapture_event
+
+
+class _CaptureQueue:
+    def __init__(self) -> None:
+        self.payload = None
+
+    def put_nowait(self, payload):  # noqa: ANN001
+        self.payload = posthog._materialize(payload)
+
+
+@pytest.fixture
+def usage_env(monkeypatch):  # noqa: ANN001, ANN201
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "true")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_DISTINCT_ID", "test-id")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_PROJECT_API_KEY", "phc_test")
+    monkeypatch.delenv("DO_NOT_TRACK", raising=False)
+    monkeypatch.delenv("OPENADAPT_TELEMETRY_SPOOL", raising=False)
+
+
+@pytest.fixture
+def recorded_posts(monkeypatch):  # noqa: ANN001, ANN201
+    bodies: list[dict] = []
+    monkeypatch.setattr(
+        posthog, "_post", lambda path, body: bodies.append(json.loads(body)) or True
+    )
+    return bodies
+
+
+def test_acapture_without_transport_uses_threaded_sender(usage_env) -> None:  # noqa: ANN001
+    queue = _CaptureQueue()
+    with patch("openadapt_telemetry.posthog._ensure_worker", return_value=queue):
+        assert asyncio.run(acapture_event("agent_run", {"mode": "live"})) is True
+    assert queue.payload["event"] == "agent_run"
+    assert queue.payload["properties"]["mode"] == "live"
+
+
+def test_acapture_respects_do_not_track() -> None:
+    with patch.dict(os.environ, {"DO_NOT_TRACK": "1"}, clear=False):
+        assert asyncio.run(acapture_event("agent_run")) is False
+
+
+def test_payload_is_built_off_the_loop_thread(usage_env) -> None:  # noqa: ANN001
+    threads = []
+    original = posthog._usage_payload
+
+    def spy(*args):  # noqa: ANN002, ANN202
+        threads.append(threading.get_ident())
+        return original(*args)
+
+    async def main() -> None:
+        async with AsyncPostHogTransport() as transport:
+            with patch("openadapt_telemetry.posthog._usage_payload", spy):
+                await acapture_event("agent_run")
+            await transport.flush(timeout=0.0)
+
+    with patch("openadapt_telemetry.posthog._post", return_value=True):
+        asyncio.run(main())
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_transport_batches_on_running_loop(usage_env, recorded_posts, monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_POSTHOG_BATCH_LINGER_SECONDS", "30")
+
+    async def main() -> bool:
+        async with AsyncPostHogTransport() as transport:
+            assert running_transport() is transport
+            for name in ("a", "b", "c"):
+                assert await acapture_event(name) is True
+            flushed = await transport.flush(timeout=5.0)
+        assert running_transport() is None
+        return flushed
+
+    assert asyncio.run(main()) is True
+    assert len(recorded_posts) == 1
+    assert [e["event"] for e in recorded_posts[0]["batch"]] == ["a", "b", "c"]
+
+
+def test_transport_counts_overflow_as_dropped(usage_env, monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setattr(posthog, "_dropped_totals", posthog.Counter())
+    monkeypatch.setattr(posthog, "_dropped_unreported", posthog.Counter())
+
+    async def main() -> None:
+        transport = AsyncPostHogTransport(maxsize=1)
+        await transport.start()
+        payload = posthog._usage_payload("kept", None, "openadapt")
+        assert transport.enqueue(payload) is True
+        assert transport.enqueue(posthog._usage_payload("lost", None, "openadapt")) is False
+        with patch("openadapt_telemetry.posthog._post", return_value=True):
+            await transport.aclose(timeout=5.0)
+
+    asyncio.run(main())
+    assert posthog.dropped_event_counts() == {"lost": 1}
+
+
+def test_acapture_automation_failure(usage_env, recorded_posts) -> None:  # noqa: ANN001
+    signal = AutomationFailureSignal(
+        failure_kind=FailureKind.TARGET_NOT_FOUND, substrate=Substrate.WEB
+    )
+
+    async def main() -> bool:
+        async with AsyncPostHogTransport() as transport:
+            ok = await acapture_automation_failure(signal)
+            await transport.flush(timeout=5.0)
+        return ok
+
+    assert asyncio.run(main()) is True
+    (event,) = recorded_posts[0]["batch"]
+    assert event["distinct_id"] == f"failure:{signal.failure_signature}"
+    with pytest.raises(TypeError):
+        asyncio.run(acapture_automation_failure("not a signal"))
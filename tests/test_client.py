@@ -370,3 +370,24 @@ class TestGetTelemetry:
         client2 = get_telemetry()
         assert client1 is client2
         assert isinstance(client1, TelemetryClient)
+
+
+class TestFlush:
+    """Tests for flushing both telemetry backends."""
+
+    def test_flush_covers_sentry_and_posthog(self, enabled_telemetry, mock_sentry):
+        """Flush drains the PostHog queue alongside Sentry."""
+        with patch("openadapt_telemetry.posthog._event_queue", object()):
+            with patch("openadapt_telemetry.posthog.flush") as posthog_flush:
+                enabled_telemetry.flush(timeout=1.0)
+        mock_sentry.flush.assert_called_once_with(timeout=1.0)
+        posthog_flush.assert_called_once_with(1.0)
+
+    def test_flush_posthog_when_sentry_not_initialized(self, clean_env, mock_sentry):
+        """PostHog usage events are flushed even without a Sentry DSN."""
+        client = TelemetryClient.get_instance()
+        with patch("openadapt_telemetry.posthog._event_queue", object()):
+            with patch("openadapt_telemetry.posthog.flush") as posthog_flush:
+                client.flush(timeout=0.5)
+        mock_sentry.flush.assert_not_called()
+        posthog_flush.assert_called_once_with(0.5)
@@ -0,0 +1,59 @@
+"""Tests for telemetry request-body compression."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import zlib
+
+import pytest
+
+from openadapt_telemetry.compression import BodyCompressor, DictionaryCodec
+
+
+def _batch(n: int) -> bytes:
+    events = [
+        {"event": "action_executed", "properties": {"package": "openadapt", "step": i}}
+        for i in range(n)
+    ]
+    return json.dumps({"api_key": "phc_test", "batch": events}).encode("utf-8")
+
+
+def test_large_body_is_gzipped() -> None:
+    body = _batch(50)
+    encoded, encoding = BodyCompressor(min_bytes=100).encode(body)
+    assert encoding == "gzip"
+    assert len(encoded) < len(body) // 3
+    assert gzip.decompress(encoded) == body
+
+
+def test_small_body_is_sent_as_is() -> None:
+    body = _batch(1)
+    assert BodyCompressor(min_bytes=len(body) + 1).encode(body) == (body, None)
+
+
+def test_incompressible_body_is_sent_as_is() -> None:
+    body = os.urandom(4096)
+    assert BodyCompressor(min_bytes=0).encode(body) == (body, None)
+
+
+def test_compressor_is_reusable_across_requests() -> None:
+    compressor = BodyCompressor(level=1, min_bytes=0)
+    bodies = [_batch(10), _batch(20), _batch(10)]
+    assert [gzip.decompress(compressor.compress(b)) for b in bodies] == bodies
+    assert compressor.compress(bodies[0]) == compressor.compress(bodies[2])
+
+
+def test_level_is_clamped() -> None:
+    assert BodyCompressor(level=0).level == 1
+    assert BodyCompressor(level=42).level == 9
+
+
+def test_dictionary_codec_round_trips_and_checks_dictionary() -> None:
+    codec = DictionaryCodec(b'"event":"action_executed","package":"openadapt"')
+    body = _batch(3)
+    assert codec.decompress(codec.compress(body)) == body
+    assert codec.compress(body) == codec.compress(body)
+    with pytest.raises(zlib.error):
+        DictionaryCodec(b"something else").decompress(codec.compress(body))
@@ -16,8 +16,10 @@ from openadapt_telemetry.config import (
     _is_valid_anon_salt,
     _load_config_file,
     _parse_bool,
+    _parse_sample_rates,
     get_or_create_anon_salt,
     load_config,
+    load_usage_sample_rates,
     save_config,
 )
 
@@ -336,3 +338,54 @@ class TestAnonSalt:
                     if "Ignoring invalid OPENADAPT_TELEMETRY_ANON_SALT" in str(warning.message)
                 ]
                 assert len(matches) == 1
+
+
+class TestUsageSampleRates:
+    """Tests for the PostHog usage sampling-rule table."""
+
+    def test_parse_sample_rates(self):
+        """Rules parse from pattern=rate pairs, skipping malformed entries."""
+        with pytest.warns(UserWarning, match="bad, x=nope, =0.5"):
+            rules = _parse_sample_rates("action_*=0.01, agent_run=1,bad,x=nope,=0.5")
+        assert rules == {"action_*": 0.01, "agent_run": 1.0}
+
+    def test_out_of_range_entry_keeps_other_rules(self):
+        """One rate outside 0.0-1.0 is skipped on its own."""
+        with pytest.warns(UserWarning, match="debug_\\*=1.5"):
+            rules = _parse_sample_rates("action_*=0.01,debug_*=1.5,x=-1,y=nan")
+        assert rules == {"action_*": 0.01}
+
+    def test_bad_sentry_sample_rate_does_not_disable_usage_sampling(self):
+        """Usage rules load independently of the Sentry settings."""
+        env = {
+            "OPENADAPT_POSTHOG_SAMPLE_RATES": "action_*=0.01",
+            "OPENADAPT_TELEMETRY_SAMPLE_RATE": "5",
+        }
+        with patch.dict(os.environ, env):
+            with pytest.raises(ValueError, match="sample_rate"):
+                load_config()
+            assert load_usage_sample_rates() == {"action_*": 0.01}
+
+    def test_config_file_rules_are_filtered_per_entry(self):
+        """Invalid config-file rules are dropped without failing load_config."""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+            json.dump({"usage_sample_rates": {"action_*": 0.1, "debug_*": 2, "flag": True}}, f)
+        try:
+            with patch("openadapt_telemetry.config.CONFIG_FILE", Path(f.name)):
+                with patch.dict(os.environ, {}, clear=True):
+                    with pytest.warns(UserWarning, match="usage_sample_rates"):
+                        assert load_usage_sample_rates() == {"action_*": 0.1}
+                    with pytest.warns(UserWarning, match="usage_sample_rates"):
+                        assert load_config().usage_sample_rates == {"action_*": 0.1}
+        finally:
+            os.unlink(f.name)
+
+    def test_env_sample_rates(self):
+        """OPENADAPT_POSTHOG_SAMPLE_RATES populates usage_sample_rates."""
+        with patch.dict(os.environ, {"OPENADAPT_POSTHOG_SAMPLE_RATES": "action_*=0.5"}):
+            assert _get_env_config()["usage_sample_rates"] == {"action_*": 0.5}
+
+    def test_invalid_rate_rejected(self):
+        """Rates outside 0.0-1.0 are rejected."""
+        with pytest.raises(ValueError, match="usage_sample_rates"):
+            TelemetryConfig(usage_sample_rates={"action_*": 2.0})
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import gzip
 import json
 import os
+import zlib
 from unittest.mock import patch
 
 import pytest
 
+import openadapt_telemetry.posthog as posthog
 from openadapt_telemetry.failure_signals import (
     FAILURE_SIGNAL_EVENT,
     ActionKind,
@@ -20,6 +23,9 @@ from openadapt_telemetry.failure_signals import (
     RiskClass,
     Substrate,
     capture_automation_failure,
+    decode_failure_signals,
+    encode_failure_signals,
+    failure_signal_dictionary,
 )
 
 
@@ -28,7 +34,7 @@ class _CaptureQueue:
         self.payload = None
 
     def put_nowait(self, payload):  # noqa: ANN001
-        self.payload = payload
+        self.payload = posthog._materialize(payload)
 
 
 def _signal(**overrides) -> AutomationFailureSignal:  # noqa: ANN003
@@ -107,3 +113,32 @@ def test_capture_groups_by_failure_not_installation() -> None:
 def test_capture_respects_do_not_track() -> None:
     with patch.dict(os.environ, {"DO_NOT_TRACK": "1"}, clear=False):
         assert capture_automation_failure(_signal()) is False
+
+
+def test_encoded_signals_round_trip() -> None:
+    signals = [_signal(), _signal(substrate=Substrate.WEB, model_calls=3)]
+    envelopes = [signal.to_envelope() for signal in signals]
+    assert decode_failure_signals(encode_failure_signals(signals)) == envelopes
+    assert decode_failure_signals(encode_failure_signals(envelopes)) == envelopes
+    assert decode_failure_signals(encode_failure_signals([])) == []
+
+
+def test_dictionary_encoding_beats_gzip_for_small_batches() -> None:
+    envelope = _signal().to_envelope()
+    raw = (json.dumps(envelope, separators=(",", ":")) + "\n").encode()
+    assert len(encode_failure_signals([envelope])) < len(gzip.compress(raw, 9)) // 2
+
+
+def test_dictionary_covers_every_enum_value() -> None:
+    dictionary = failure_signal_dictionary()
+    for enum_type in (FailureKind, Substrate, ActionKind, RiskClass, ResolutionRung):
+        for member in enum_type:
+            assert f'"{member.value}"'.encode() in dictionary
+    assert dictionary is failure_signal_dictionary()
+
+
+def test_decode_rejects_foreign_streams() -> None:
+    with pytest.raises(ValueError):
+        decode_failure_signals(zlib.compress(b'{"schema":"other"}\n'))
+    with pytest.raises(ValueError):
+        decode_failure_signals(encode_failure_signals([_signal()])[:-4])
@@ -2,10 +2,20 @@
 
 from __future__ import annotations
 
+import gzip
+import json
 import os
-from unittest.mock import patch
+import queue
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
 
 import openadapt_telemetry.posthog as posthog
+from openadapt_telemetry.spool import Spool
 
 
 class _CaptureQueue:
@@ -13,7 +23,7 @@ class _CaptureQueue:
         self.payload = None
 
     def put_nowait(self, payload):  # noqa: ANN001
-        self.payload = payload
+        self.payload = posthog._materialize(payload)
 
 
 def test_capture_event_respects_do_not_track() -> None:
@@ -73,3 +83,782 @@ def test_capture_event_scrubs_sensitive_properties() -> None:
             assert props["entrypoint"] == "oa evals run"
             assert "api_key" not in props
             assert "password" not in props
+
+
+def _payload(event: str, api_key: str = "phc_test") -> dict:
+    return {
+        "api_key": api_key,
+        "event": event,
+        "distinct_id": "test-id",
+        "properties": {"$geoip_disable": True},
+    }
+
+
+def test_collect_batch_caps_event_count() -> None:
+    event_queue = queue.Queue()
+    for i in range(5):
+        event_queue.put_nowait(_payload(f"e{i}"))
+    batch, carry = posthog._collect_batch(event_queue, _payload("first"), 3, 1_000_000, 0.0)
+    assert [p["event"] for p, _ in batch] == ["first", "e0", "e1"]
+    assert carry is None
+    assert event_queue.qsize() == 3
+
+
+def test_collect_batch_carries_payload_over_byte_cap() -> None:
+    event_queue = queue.Queue()
+    event_queue.put_nowait(_payload("second"))
+    event_queue.put_nowait(_payload("third"))
+    first_size = len(posthog._encode_event(_payload("first")))
+    batch, carry = posthog._collect_batch(event_queue, _payload("first"), 100, first_size + 10, 0.0)
+    assert [p["event"] for p, _ in batch] == ["first"]
+    assert carry is not None and carry["event"] == "second"
+    assert event_queue.qsize() == 1
+
+
+def test_collect_batch_stops_after_linger() -> None:
+    event_queue = queue.Queue()
+    event_queue.put_nowait(_payload("waiting"))
+    started = time.monotonic()
+    batch, carry = posthog._collect_batch(event_queue, _payload("first"), 100, 1_000_000, 0.05)
+    assert len(batch) == 2 and carry is None
+    assert time.monotonic() - started >= 0.04
+
+
+def test_collect_batch_sends_lone_event_without_lingering() -> None:
+    started = time.monotonic()
+    batch, carry = posthog._collect_batch(queue.Queue(), _payload("only"), 100, 1_000_000, 30.0)
+    assert len(batch) == 1 and carry is None
+    assert time.monotonic() - started < 1.0
+
+
+def test_send_batch_posts_once_per_api_key() -> None:
+    batch = [
+        (p, posthog._encode_event(p))
+        for p in (_payload("a"), _payload("b"), _payload("c", api_key="phc_other"))
+    ]
+    with patch("openadapt_telemetry.posthog._post") as mock_post:
+        posthog._send_batch(batch)
+    assert mock_post.call_count == 2
+    path, body = mock_post.call_args_list[0].args
+    assert path == "/batch/"
+    decoded = json.loads(body)
+    assert decoded["api_key"] == "phc_test"
+    assert [e["event"] for e in decoded["batch"]] == ["a", "b"]
+    assert all("api_key" not in e for e in decoded["batch"])
+
+
+def test_undeliverable_batch_is_spooled_and_replayed(tmp_path, monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_SPOOL", "1")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(posthog, "_spool", None)
+    batch = [(p, posthog._encode_event(p)) for p in (_payload("a"), _payload("b"))]
+    batch[0][0]["properties"]["timestamp"] = 1_700_000_000
+    with patch("openadapt_telemetry.posthog._post", return_value=False):
+        failed = posthog._send_batch(batch)
+    assert [p["event"] for p in failed] == ["a", "b"]
+    assert posthog._spool_payloads(failed) is True
+    posthog._spool.close()
+
+    bodies = []
+    with patch(
+        "openadapt_telemetry.posthog._post",
+        side_effect=lambda path, body: bodies.append(json.loads(body)) or True,
+    ):
+        posthog._replay_spool()
+    events = [e for body in bodies for e in body["batch"]]
+    assert [e["event"] for e in events] == ["a", "b"]
+    assert events[0]["timestamp"].startswith("2023-11-14T22:13:20")
+    assert posthog._spool.pending_segments() == 0
+
+
+def test_spool_hoisting_is_opt_in(tmp_path, monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_SPOOL", "1")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_SPOOL_DIR", str(tmp_path))
+    monkeypatch.delenv("OPENADAPT_TELEMETRY_SPOOL_HOIST_SHARED", raising=False)
+    monkeypatch.setattr(posthog, "_spool", None)
+    assert posthog._get_spool().hoist_shared is False
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_SPOOL_HOIST_SHARED", "1")
+    monkeypatch.setattr(posthog, "_spool", None)
+    assert posthog._get_spool().hoist_shared is True
+
+
+def test_spool_write_errors_are_not_fatal(monkeypatch) -> None:  # noqa: ANN001
+    spool = MagicMock()
+    spool.append.side_effect = ValueError("write to closed file")
+    monkeypatch.setattr(posthog, "_get_spool", lambda: spool)
+    assert posthog._spool_payloads([_payload("a")]) is False
+
+
+def test_spool_disabled_by_default(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.delenv("OPENADAPT_TELEMETRY_SPOOL", raising=False)
+    assert posthog._get_spool() is None
+    assert posthog._spool_payloads([_payload("a")]) is False
+
+
+@pytest.fixture
+def live_worker(monkeypatch):  # noqa: ANN001, ANN201
+    """Run a real sender thread against a private queue with a recording transport."""
+    bodies: list[dict] = []
+    event_queue: queue.Queue = queue.Queue()
+    monkeypatch.setenv("OPENADAPT_POSTHOG_BATCH_LINGER_SECONDS", "30")
+    monkeypatch.delenv("OPENADAPT_TELEMETRY_SPOOL", raising=False)
+    monkeypatch.setattr(posthog, "_event_queue", event_queue)
+    monkeypatch.setattr(
+        posthog, "_post", lambda path, body: bodies.append(json.loads(body)) or True
+    )
+    threading.Thread(target=posthog._worker_loop, daemon=True).start()
+    return event_queue, bodies
+
+
+def test_flush_without_queue_is_immediate(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setattr(posthog, "_event_queue", None)
+    assert posthog.flush(timeout=0.0) is True
+
+
+def test_flush_wakes_lingering_sender(live_worker) -> None:  # noqa: ANN001
+    event_queue, bodies = live_worker
+    for name in ("a", "b", "c"):
+        event_queue.put_nowait(_payload(name))
+    started = time.monotonic()
+    assert posthog.flush(timeout=5.0) is True
+    assert time.monotonic() - started < 5.0
+    assert [e["event"] for body in bodies for e in body["batch"]] == ["a", "b", "c"]
+
+
+def test_flush_respects_deadline(monkeypatch) -> None:  # noqa: ANN001
+    event_queue: queue.Queue = queue.Queue()
+    event_queue.put_nowait(_payload("stuck"))
+    monkeypatch.setattr(posthog, "_event_queue", event_queue)
+    started = time.monotonic()
+    assert posthog.flush(timeout=0.1) is False
+    assert time.monotonic() - started < 1.0
+
+
+def test_shutdown_counts_unsent_events_as_dropped(monkeypatch) -> None:  # noqa: ANN001
+    event_queue: queue.Queue = queue.Queue()
+    event_queue.put_nowait(_payload("a"))
+    event_queue.put_nowait(_payload("b"))
+    monkeypatch.delenv("OPENADAPT_TELEMETRY_SPOOL", raising=False)
+    monkeypatch.setattr(posthog, "_event_queue", event_queue)
+    monkeypatch.setattr(posthog, "_dropped_totals", posthog.Counter())
+    monkeypatch.setattr(posthog, "_dropped_unreported", posthog.Counter())
+    assert posthog.shutdown(timeout=0.0) is False
+    assert posthog.dropped_event_counts() == {"a": 1, "b": 1}
+    assert event_queue.unfinished_tasks == 0
+
+
+@pytest.fixture
+def stalled_host(monkeypatch):  # noqa: ANN001, ANN201
+    """A PostHog host that accepts connections but never answers."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(16)
+    host, port = listener.getsockname()
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "true")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_DISTINCT_ID", "test-id")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_HOST", f"http://{host}:{port}")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_TIMEOUT_SECONDS", "0.5")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_MAX_RETRIES", "0")
+    monkeypatch.delenv("OPENADAPT_POSTHOG_AGGREGATE_WINDOW_SECONDS", raising=False)
+    for name in ("_event_queue", "_transport", "_breaker", "_spool"):
+        monkeypatch.setattr(posthog, name, None)
+    monkeypatch.setattr(posthog, "_workers", [])
+    monkeypatch.setattr(posthog, "_dropped_totals", posthog.Counter())
+    monkeypatch.setattr(posthog, "_dropped_unreported", posthog.Counter())
+    yield
+    # Let the stalled request time out so its sender settles within this test.
+    event_queue = posthog._event_queue
+    deadline = time.monotonic() + 10.0
+    while event_queue is not None and event_queue.unfinished_tasks:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    listener.close()
+
+
+@pytest.mark.parametrize("linger", ["0", "30"])
+def test_shutdown_counts_batches_held_by_senders(stalled_host, monkeypatch, linger) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_POSTHOG_BATCH_LINGER_SECONDS", linger)
+    monkeypatch.delenv("OPENADAPT_TELEMETRY_SPOOL", raising=False)
+    for name in ("a", "b", "c"):
+        assert posthog.capture_event(name) is True
+    time.sleep(0.05)
+    assert posthog._event_queue.qsize() == 0  # the sender holds the batch
+    assert posthog.shutdown(timeout=0.0) is False
+    assert posthog.dropped_event_counts() == {"a": 1, "b": 1, "c": 1}
+    # The stalled request fails later; shutdown already counted its events.
+    deadline = time.monotonic() + 5.0
+    while posthog._event_queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert posthog.dropped_event_counts() == {"a": 1, "b": 1, "c": 1}
+
+
+def test_shutdown_spools_batches_held_by_senders(stalled_host, tmp_path, monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_SPOOL", "1")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_SPOOL_DIR", str(tmp_path))
+    for name in ("a", "b", "c"):
+        assert posthog.capture_event(name) is True
+    time.sleep(0.05)
+    assert posthog.shutdown(timeout=0.0) is False
+    assert posthog.dropped_event_counts() == {}
+    replayed = []
+    Spool(tmp_path).replay(lambda records: replayed.extend(records) or True)
+    assert [r["event"] for r in replayed] == ["a", "b", "c"]
+
+
+def test_shutdown_spools_unsent_events(tmp_path, monkeypatch) -> None:  # noqa: ANN001
+    event_queue: queue.Queue = queue.Queue()
+    event_queue.put_nowait(_payload("a"))
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_SPOOL", "1")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(posthog, "_spool", None)
+    monkeypatch.setattr(posthog, "_event_queue", event_queue)
+    assert posthog.shutdown(timeout=0.0) is False
+    assert posthog._spool.pending_segments() == 1
+
+
+def test_backlog_adds_sender_up_to_limit(monkeypatch) -> None:  # noqa: ANN001
+    event_queue: queue.Queue = queue.Queue()
+    for i in range(posthog.BATCH_MAX_EVENTS + 1):
+        event_queue.put_nowait(_payload(f"e{i}"))
+    started = []
+    monkeypatch.setattr(posthog, "_event_queue", event_queue)
+    monkeypatch.setattr(posthog, "_workers", [threading.current_thread()])
+    monkeypatch.setattr(posthog, "_start_worker_locked", lambda primary: started.append(primary))
+    monkeypatch.delenv("OPENADAPT_POSTHOG_BATCH_MAX_EVENTS", raising=False)
+    monkeypatch.setenv("OPENADAPT_POSTHOG_WORKERS", "2")
+    posthog._maybe_add_worker()
+    assert started == [False]
+
+    monkeypatch.setenv("OPENADAPT_POSTHOG_WORKERS", "1")
+    posthog._maybe_add_worker()
+    assert started == [False]
+
+
+def test_backlog_threshold_uses_configured_batch_size(monkeypatch) -> None:  # noqa: ANN001
+    event_queue: queue.Queue = queue.Queue()
+    for i in range(6):
+        event_queue.put_nowait(_payload(f"e{i}"))
+    started = []
+    monkeypatch.setattr(posthog, "_event_queue", event_queue)
+    monkeypatch.setattr(posthog, "_workers", [threading.current_thread()])
+    monkeypatch.setattr(posthog, "_start_worker_locked", lambda primary: started.append(primary))
+    monkeypatch.setenv("OPENADAPT_POSTHOG_WORKERS", "2")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_BATCH_MAX_EVENTS", "6")
+    posthog._maybe_add_worker()
+    assert started == []
+
+    monkeypatch.setenv("OPENADAPT_POSTHOG_BATCH_MAX_EVENTS", "5")
+    posthog._maybe_add_worker()
+    assert started == [False]
+
+
+def test_idle_secondary_sender_exits(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setattr(posthog, "_event_queue", queue.Queue())
+    monkeypatch.setattr(posthog, "WORKER_IDLE_SECONDS", 0.05)
+    monkeypatch.setattr(posthog, "_workers", [])
+    with posthog._worker_lock:
+        posthog._start_worker_locked(primary=False)
+    (thread,) = posthog._workers
+    thread.join(timeout=2.0)
+    assert not thread.is_alive()
+    assert posthog._workers == []
+
+
+def test_stalled_request_does_not_block_other_senders(monkeypatch) -> None:  # noqa: ANN001
+    release = threading.Event()
+    sent = []
+
+    def post(path, body):  # noqa: ANN001, ANN202
+        events = [e["event"] for e in json.loads(body)["batch"]]
+        if events == ["slow"]:
+            release.wait(timeout=5.0)
+        sent.extend(events)
+        return True
+
+    event_queue: queue.Queue = queue.Queue()
+    monkeypatch.setenv("OPENADAPT_POSTHOG_BATCH_MAX_EVENTS", "1")
+    monkeypatch.setattr(posthog, "_event_queue", event_queue)
+    monkeypatch.setattr(posthog, "_workers", [])
+    monkeypatch.setattr(posthog, "_post", post)
+    with posthog._worker_lock:
+        posthog._start_worker_locked(primary=False)
+        posthog._start_worker_locked(primary=False)
+    event_queue.put_nowait(_payload("slow"))
+    event_queue.put_nowait(_payload("fast"))
+    deadline = time.monotonic() + 2.0
+    while "fast" not in sent and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sent == ["fast"]
+    release.set()
+    assert posthog.flush(timeout=2.0) is True
+    assert sorted(sent) == ["fast", "slow"]
+
+
+@pytest.fixture
+def drop_counters(monkeypatch):  # noqa: ANN001, ANN201
+    monkeypatch.setattr(posthog, "_dropped_totals", posthog.Counter())
+    monkeypatch.setattr(posthog, "_dropped_unreported", posthog.Counter())
+
+
+def _full_queue(*events: str) -> queue.Queue:
+    event_queue: queue.Queue = queue.Queue(maxsize=len(events))
+    for name in events:
+        event_queue.put_nowait(_payload(name))
+    return event_queue
+
+
+def _queued(event_queue: queue.Queue) -> list[str]:
+    return [p["event"] for p in list(event_queue.queue)]
+
+
+def test_overflow_drop_newest_is_default(monkeypatch, drop_counters) -> None:  # noqa: ANN001
+    monkeypatch.delenv("OPENADAPT_POSTHOG_OVERFLOW_POLICY", raising=False)
+    event_queue = _full_queue("old1", "old2")
+    assert posthog._enqueue(event_queue, _payload("new")) is False
+    assert _queued(event_queue) == ["old1", "old2"]
+    assert posthog.dropped_event_counts() == {"new": 1}
+
+
+def test_overflow_drop_oldest(monkeypatch, drop_counters) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_POSTHOG_OVERFLOW_POLICY", "drop-oldest")
+    event_queue = _full_queue("old1", "old2")
+    assert posthog._enqueue(event_queue, _payload("new")) is True
+    assert _queued(event_queue) == ["old2", "new"]
+    assert posthog.dropped_event_counts() == {"old1": 1}
+    assert event_queue.unfinished_tasks == 2
+
+
+def test_overflow_drop_oldest_evicts_until_large_event_fits(monkeypatch, drop_counters) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_POSTHOG_OVERFLOW_POLICY", "drop_oldest")
+    big = posthog._build_payload(
+        event="big", distinct_id="d", properties={"note": "x" * 900}, package_name="openadapt"
+    )
+    small = [
+        posthog._build_payload(
+            event=f"s{i}", distinct_id="d", properties={}, package_name="openadapt"
+        )
+        for i in range(4)
+    ]
+    event_queue = posthog.ByteBoundedQueue(small[0].size * 4, posthog._item_size)
+    for item in small:
+        event_queue.put_nowait(item)
+    assert posthog._enqueue(event_queue, big) is True
+    assert [item.event for item in event_queue.queue] == ["big"]
+    assert posthog.dropped_event_counts() == {"s0": 1, "s1": 1, "s2": 1, "s3": 1}
+
+
+def test_overflow_block_waits_for_room(monkeypatch, drop_counters) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_POSTHOG_OVERFLOW_POLICY", "block")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_OVERFLOW_BLOCK_SECONDS", "2")
+    event_queue = _full_queue("old")
+    threading.Timer(0.05, event_queue.get_nowait).start()
+    assert posthog._enqueue(event_queue, _payload("new")) is True
+    assert posthog.dropped_event_counts() == {}
+
+    monkeypatch.setenv("OPENADAPT_POSTHOG_OVERFLOW_BLOCK_SECONDS", "0.01")
+    assert posthog._enqueue(event_queue, _payload("late")) is False
+    assert posthog.dropped_event_counts() == {"late": 1}
+
+
+def test_overflow_sample_mixes_old_and_new(monkeypatch, drop_counters) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_POSTHOG_OVERFLOW_POLICY", "sample")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_OVERFLOW_SAMPLE_RATE", "0.5")
+    event_queue = _full_queue("old1", "old2")
+    with patch("openadapt_telemetry.posthog.random.random", side_effect=[0.9, 0.1]):
+        assert posthog._enqueue(event_queue, _payload("new1")) is False
+        assert posthog._enqueue(event_queue, _payload("new2")) is True
+    assert _queued(event_queue) == ["old2", "new2"]
+    assert posthog.dropped_event_counts() == {"new1": 1, "old1": 1}
+
+
+def test_drop_report_rides_next_successful_batch(monkeypatch, drop_counters) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_POSTHOG_PROJECT_API_KEY", "phc_test")
+    monkeypatch.delenv("OPENADAPT_TELEMETRY_SPOOL", raising=False)
+    posthog._record_dropped([_payload("a"), _payload("a"), _payload("b")], "queue_full")
+    bodies = []
+    with patch("openadapt_telemetry.posthog._post", return_value=False):
+        posthog._deliver([(_payload("x"), posthog._encode_event(_payload("x")))])
+    with patch(
+        "openadapt_telemetry.posthog._post",
+        side_effect=lambda path, body: bodies.append(json.loads(body)) or True,
+    ):
+        posthog._deliver([(_payload("y"), posthog._encode_event(_payload("y")))])
+        posthog._deliver([(_payload("z"), posthog._encode_event(_payload("z")))])
+    first, second = (body["batch"] for body in bodies)
+    report = first[-1]
+    assert report["event"] == posthog.DROPPED_EVENT
+    # The failed first send adds "x" (send_failed) to the same report.
+    assert report["properties"]["dropped"] == {"a": 2, "b": 1, "x": 1}
+    assert report["properties"]["reasons"] == {"queue_full": 3, "send_failed": 1}
+    assert report["properties"]["dropped_total"] == 4
+    assert [e["event"] for e in second] == ["z"]
+
+
+class _BatchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        with self.server.lock:
+            self.server.events.extend(json.loads(body)["batch"])
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):  # noqa: A002, ANN001, ANN002
+        return
+
+
+def test_gzip_compression_delivers_batches(monkeypatch) -> None:  # noqa: ANN001
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _BatchHandler)
+    httpd.events = []
+    httpd.lock = threading.Lock()
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    host, port = httpd.server_address[:2]
+    monkeypatch.setenv("OPENADAPT_POSTHOG_HOST", f"http://{host}:{port}")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_COMPRESSION", "gzip")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_COMPRESSION_MIN_BYTES", "0")
+    monkeypatch.setattr(posthog, "_transport", None)
+    monkeypatch.setattr(posthog, "_breaker", None)
+    sent = []
+    real_send = posthog.send_with_retry
+    monkeypatch.setattr(
+        posthog,
+        "send_with_retry",
+        lambda *args, **kwargs: sent.append(args[4]) or real_send(*args, **kwargs),
+    )
+    try:
+        failed = posthog._send_batch(
+            [(p, posthog._encode_event(p)) for p in (_payload("a"), _payload("b"))]
+        )
+    finally:
+        httpd.shutdown()
+    assert failed == []
+    assert sent[0]["Content-Encoding"] == "gzip"
+    assert [e["event"] for e in httpd.events] == ["a", "b"]
+
+    monkeypatch.delenv("OPENADAPT_POSTHOG_COMPRESSION")
+    assert posthog._get_compressor() is None
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_forked_children_deliver_their_own_events(monkeypatch) -> None:  # noqa: ANN001
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _BatchHandler)
+    httpd.events = []
+    httpd.lock = threading.Lock()
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    host, port = httpd.server_address[:2]
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "true")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_DISTINCT_ID", "test-id")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_HOST", f"http://{host}:{port}")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_PROJECT_API_KEY", "phc_test")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_BATCH_LINGER_SECONDS", "0.01")
+    monkeypatch.delenv("OPENADAPT_TELEMETRY_SPOOL", raising=False)
+    for name in ("_event_queue", "_transport", "_breaker"):
+        monkeypatch.setattr(posthog, name, None)
+    monkeypatch.setattr(posthog, "_workers", [])
+    try:
+        # The parent has a live sender, queue and keep-alive connection at fork time.
+        assert posthog.capture_event("parent") is True
+        assert posthog.flush(timeout=5.0) is True
+
+        children, per_child = 32, 5
+        pids = []
+        for index in range(children):
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    for seq in range(per_child):
+                        posthog.capture_event("child", {"index": index, "seq": seq})
+                    status = 0 if posthog.flush(timeout=10.0) else 1
+                finally:
+                    os._exit(status)
+            pids.append(pid)
+        statuses = [os.waitpid(pid, 0)[1] for pid in pids]
+        assert all(os.waitstatus_to_exitcode(s) == 0 for s in statuses)
+    finally:
+        posthog.shutdown(timeout=1.0)
+        httpd.shutdown()
+        httpd.server_close()
+
+    delivered = [e for e in httpd.events if e["event"] != posthog.DROPPED_EVENT]
+    assert [e["event"] for e in delivered].count("parent") == 1
+    received = sorted(
+        (e["properties"]["index"], e["properties"]["seq"])
+        for e in delivered
+        if e["event"] == "child"
+    )
+    assert received == [(i, s) for i in range(children) for s in range(per_child)]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_forked_child_does_not_inherit_a_held_sampler_lock(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "true")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_SAMPLE_RATES", "child=1,other=0.5")
+    monkeypatch.setattr(posthog, "_ensure_worker", lambda: queue.Queue())
+    posthog.invalidate_usage_cache()
+    sampler = posthog._get_sampler()
+    rate_limiter = posthog._get_rate_limiter()
+    try:
+        # As if another thread were mid-sample when the fork happened.
+        with sampler._lock:
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    fresh = posthog._get_sampler() is not sampler
+                    fresh = fresh and posthog._get_rate_limiter() is not rate_limiter
+                    if fresh and posthog.capture_event("child") is True:
+                        status = 0
+                finally:
+                    os._exit(status)
+        deadline = time.monotonic() + 10.0
+        while True:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            if time.monotonic() > deadline:
+                os.kill(pid, 9)
+                os.waitpid(pid, 0)
+                pytest.fail("forked child hung on the inherited sampler lock")
+            time.sleep(0.01)
+        assert os.waitstatus_to_exitcode(status) == 0
+    finally:
+        posthog.invalidate_usage_cache()
+
+
+@pytest.fixture
+def usage_env(monkeypatch, tmp_path):  # noqa: ANN001, ANN201
+    """Run from an empty project directory with no env overrides or CI vars."""
+    for name in ("DO_NOT_TRACK", "OPENADAPT_TELEMETRY_ENABLED", "CI", "GITHUB_ACTIONS"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(posthog, "is_ci_environment", lambda: False)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _write_pyproject(directory, telemetry: str, mtime_ns: int) -> None:  # noqa: ANN001
+    pyproject = directory / "pyproject.toml"
+    pyproject.write_text(f"[tool.openadapt]\ntelemetry = {telemetry}\n")
+    os.utime(pyproject, ns=(mtime_ns, mtime_ns))
+
+
+def test_usage_decision_is_cached(usage_env) -> None:  # noqa: ANN001
+    with patch.object(posthog, "_nearest_pyproject", wraps=posthog._nearest_pyproject) as nearest:
+        assert posthog._usage_enabled() is True
+        assert posthog._usage_enabled() is True
+    assert nearest.call_count == 1
+
+
+def test_usage_decision_follows_pyproject_mtime(usage_env) -> None:  # noqa: ANN001
+    _write_pyproject(usage_env, "true", 1_000_000_000)
+    assert posthog._usage_enabled() is True
+    _write_pyproject(usage_env, "false", 2_000_000_000)
+    assert posthog._usage_enabled() is False
+
+
+def test_usage_decision_follows_cwd(usage_env, monkeypatch) -> None:  # noqa: ANN001
+    disabled = usage_env / "disabled"
+    disabled.mkdir()
+    _write_pyproject(disabled, "false", 1_000_000_000)
+    assert posthog._usage_enabled() is True
+    monkeypatch.chdir(disabled)
+    assert posthog._usage_enabled() is False
+
+
+def test_opt_out_env_applies_without_invalidation(usage_env, monkeypatch) -> None:  # noqa: ANN001
+    assert posthog._usage_enabled() is True
+    monkeypatch.setenv("DO_NOT_TRACK", "1")
+    assert posthog._usage_enabled() is False
+    monkeypatch.delenv("DO_NOT_TRACK")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "false")
+    assert posthog._usage_enabled() is False
+
+
+def test_invalidate_usage_cache_rechecks_ci(usage_env, monkeypatch) -> None:  # noqa: ANN001
+    assert posthog._usage_enabled() is True
+    monkeypatch.setattr(posthog, "is_ci_environment", lambda: True)
+    assert posthog._usage_enabled() is True
+    posthog.invalidate_usage_cache()
+    assert posthog._usage_enabled() is False
+
+
+def test_distinct_id_file_is_read_once(monkeypatch, tmp_path) -> None:  # noqa: ANN001
+    id_file = tmp_path / "telemetry_distinct_id"
+    id_file.write_text("stored-id", encoding="utf-8")
+    monkeypatch.setattr(posthog, "DISTINCT_ID_FILE", id_file)
+    monkeypatch.delenv("OPENADAPT_TELEMETRY_DISTINCT_ID", raising=False)
+    posthog._installation_distinct_id.cache_clear()
+    try:
+        assert posthog._get_distinct_id() == "stored-id"
+        id_file.write_text("changed-id", encoding="utf-8")
+        assert posthog._get_distinct_id() == "stored-id"
+        monkeypatch.setenv("OPENADAPT_TELEMETRY_DISTINCT_ID", "env-id")
+        assert posthog._get_distinct_id() == "env-id"
+    finally:
+        posthog._installation_distinct_id.cache_clear()
+
+
+def test_installation_context_is_resolved_once_per_package(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_POSTHOG_PROJECT_API_KEY", "phc_test")
+    posthog._installation_context.cache_clear()
+    try:
+        with patch("openadapt_telemetry.posthog.metadata.version", return_value="1.2.3") as version:
+            first = posthog._build_payload(
+                event="a", distinct_id="d", properties={}, package_name="openadapt-x"
+            ).to_payload()
+            with patch("openadapt_telemetry.posthog.time.time", return_value=2_000_000_000):
+                second = posthog._build_payload(
+                    event="b",
+                    distinct_id="d",
+                    properties={"platform": "custom", "$geoip_disable": False},
+                    package_name="openadapt-x",
+                ).to_payload()
+        version.assert_called_once_with("openadapt-x")
+    finally:
+        posthog._installation_context.cache_clear()
+    assert first["properties"]["version"] == "1.2.3"
+    assert first["properties"]["package"] == "openadapt-x"
+    assert second["properties"]["timestamp"] == 2_000_000_000
+    assert first["properties"]["timestamp"] != second["properties"]["timestamp"]
+    assert second["properties"]["platform"] == "custom"
+    assert second["properties"]["$geoip_disable"] is True
+
+
+def test_aggregation_rolls_up_repeated_usage_events(monkeypatch) -> None:  # noqa: ANN001
+    sent: queue.Queue = queue.Queue()
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "true")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_DISTINCT_ID", "test-id")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_AGGREGATE_WINDOW_SECONDS", "60")
+    monkeypatch.setattr(posthog, "_aggregator", None)
+    monkeypatch.setattr(posthog, "_event_queue", None)
+    monkeypatch.setattr(posthog, "_ensure_worker", lambda: sent)
+    for _ in range(1000):
+        assert posthog.capture_usage_event("action_executed", {"kind": "click"}) is True
+    assert posthog.capture_usage_event("action_executed", {"kind": "type"}) is True
+    assert sent.qsize() == 0
+    assert posthog.flush(timeout=1.0) is True
+    rollups = {p["properties"]["kind"]: p["properties"]["count"] for p in _drain(sent)}
+    assert rollups == {"click": 1000, "type": 1}
+
+    monkeypatch.setenv("OPENADAPT_POSTHOG_AGGREGATE_WINDOW_SECONDS", "0")
+    assert posthog.capture_usage_event("action_executed", {"kind": "click"}) is True
+    assert "count" not in posthog._materialize(sent.get_nowait())["properties"]
+
+
+def _drain(event_queue: queue.Queue) -> list[dict]:
+    items = []
+    while not event_queue.empty():
+        items.append(posthog._materialize(event_queue.get_nowait()))
+    return items
+
+
+def test_sampled_usage_events_carry_sample_weight(monkeypatch) -> None:  # noqa: ANN001
+    sent: queue.Queue = queue.Queue()
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "true")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_DISTINCT_ID", "test-id")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_SAMPLE_RATES", "action_*=0.1")
+    monkeypatch.delenv("OPENADAPT_POSTHOG_AGGREGATE_WINDOW_SECONDS", raising=False)
+    monkeypatch.setattr(posthog, "_event_queue", None)
+    monkeypatch.setattr(posthog, "_ensure_worker", lambda: sent)
+    results = [posthog.capture_usage_event("action_executed") for _ in range(100)]
+    assert results.count(True) == 10
+    assert posthog.capture_usage_event("agent_run") is True
+    events = _drain(sent)
+    weights = [e["properties"].get("$sample_weight") for e in events]
+    assert weights == [10.0] * 10 + [None]
+
+
+def test_invalid_sampling_entries_do_not_disable_valid_rules(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("OPENADAPT_POSTHOG_SAMPLE_RATES", "action_*=0.01,debug_*=1.5")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_SAMPLE_RATE", "5")
+    monkeypatch.setattr(posthog, "_sampler", None)
+    with pytest.warns(UserWarning, match="debug_"):
+        sampler = posthog._get_sampler()
+    assert sampler.rules == (("action_*", 0.01),)
+
+
+def test_rate_limited_usage_events_carry_suppressed_count(monkeypatch) -> None:  # noqa: ANN001
+    sent: queue.Queue = queue.Queue()
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "true")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_DISTINCT_ID", "test-id")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_RATE_LIMIT_PER_SECOND", "0.001")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_RATE_LIMIT_BURST", "2")
+    monkeypatch.delenv("OPENADAPT_POSTHOG_AGGREGATE_WINDOW_SECONDS", raising=False)
+    monkeypatch.setattr(posthog, "_event_queue", None)
+    monkeypatch.setattr(posthog, "_ensure_worker", lambda: sent)
+    posthog.invalidate_usage_cache()
+    results = [posthog.capture_usage_event("action_executed") for _ in range(10)]
+    assert results == [True, True] + [False] * 8
+    assert posthog.capture_usage_event("agent_run") is True
+
+    posthog._get_rate_limiter()._event_buckets["action_executed"].tokens = 1.0
+    assert posthog.capture_usage_event("action_executed") is True
+    events = _drain(sent)
+    assert [e["properties"].get("$rate_limited") for e in events] == [None, None, None, 8]
+
+
+def test_deferred_capture_queues_snapshot_and_builds_on_sender(monkeypatch) -> None:  # noqa: ANN001
+    sent: queue.Queue = queue.Queue()
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "true")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_DISTINCT_ID", "test-id")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_DEFER_BUILD", "1")
+    monkeypatch.delenv("OPENADAPT_POSTHOG_AGGREGATE_WINDOW_SECONDS", raising=False)
+    monkeypatch.setattr(posthog, "_event_queue", None)
+    monkeypatch.setattr(posthog, "_ensure_worker", lambda: sent)
+    properties = {"mode": "live", "api_token": "secret"}
+    with patch.object(posthog, "_sanitize_properties") as sanitize:
+        assert posthog.capture_event("agent_run", properties, package_name="openadapt-x") is True
+    sanitize.assert_not_called()
+    properties["mode"] = "changed"
+
+    item = sent.get_nowait()
+    assert isinstance(item, posthog._DeferredEvent)
+    assert (item.event, item.package_name) == ("agent_run", "openadapt-x")
+    payload = posthog._materialize(item)
+    assert payload["event"] == "agent_run"
+    assert payload["distinct_id"] == "test-id"
+    assert payload["properties"]["mode"] == "live"
+    assert "api_token" not in payload["properties"]
+    assert payload["properties"]["package"] == "openadapt-x"
+    assert abs(payload["properties"]["timestamp"] - time.time()) <= 2
+
+
+def test_sender_builds_deferred_events(live_worker, monkeypatch) -> None:  # noqa: ANN001
+    event_queue, bodies = live_worker
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "true")
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_DISTINCT_ID", "test-id")
+    now = time.monotonic()
+    event_queue.put_nowait(posthog._DeferredEvent("a", {"k": 1}, "openadapt", now))
+    event_queue.put_nowait(posthog._DeferredEvent("b", None, "openadapt", now, 4.0, 3))
+    assert posthog.flush(timeout=5.0) is True
+    events = [e for body in bodies for e in body["batch"]]
+    assert [e["event"] for e in events] == ["a", "b"]
+    assert events[0]["properties"]["k"] == 1
+    assert events[1]["properties"][posthog.SAMPLE_WEIGHT_PROPERTY] == 4.0
+    assert events[1]["properties"][posthog.SUPPRESSED_PROPERTY] == 3
+
+
+def test_deferred_capture_samples_and_rate_limits_on_caller(monkeypatch) -> None:  # noqa: ANN001
+    sent: queue.Queue = queue.Queue()
+    monkeypatch.setenv("OPENADAPT_TELEMETRY_ENABLED", "true")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_DEFER_BUILD", "1")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_SAMPLE_RATES", "skipped=0,half=0.5")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_RATE_LIMIT_PER_SECOND", "0.001")
+    monkeypatch.setenv("OPENADAPT_POSTHOG_RATE_LIMIT_BURST", "2")
+    posthog.invalidate_usage_cache()
+    monkeypatch.setattr(posthog, "_ensure_worker", lambda: sent)
+    monkeypatch.setattr(posthog, "_dropped_totals", posthog.Counter())
+    try:
+        assert posthog.capture_event("skipped") is False
+        assert [posthog.capture_event("half") for _ in range(4)].count(True) == 2
+        assert [posthog.capture_event("limited") for _ in range(3)] == [True, True, False]
+    finally:
+        posthog.invalidate_usage_cache()
+    items = [sent.get_nowait() for _ in range(sent.qsize())]
+    assert [item.event for item in items] == ["half", "half", "limited", "limited"]
+    assert all(item.weight == 2.0 for item in items[:2])
+    assert not posthog._dropped_totals
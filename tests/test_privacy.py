@@ -1,10 +1,18 @@
 """Tests for privacy filtering and PII scrubbing."""
 
-from unittest.mock import patch
+import hashlib
+import hmac
+import random
+import re
+from unittest.mock import MagicMock, patch
 
+import pytest
+
+from openadapt_telemetry import privacy
 from openadapt_telemetry.privacy import (
     ALLOWED_OBSERVABILITY_KEYS,
     MAX_TAGS,
+    PII_DENYLIST,
     anonymize_identifier,
     create_before_send_filter,
     is_sensitive_key,
@@ -59,6 +67,30 @@ class TestSanitizePath:
         expected = "/Users/<user>/code/file.py:/Users/<user>/lib/module.py"
         assert sanitize_path(path) == expected
 
+    def test_matches_sequential_substitution(self):
+        """Precompiled, cached sanitization must match the original re.sub cascade."""
+        def reference(path):
+            path = re.sub(r"/Users/[^/]+/", "/Users/<user>/", path)
+            path = re.sub(r"/home/[^/]+/", "/home/<user>/", path)
+            path = re.sub(r"C:\\Users\\[^\\]+\\", r"C:\\Users\\<user>\\", path)
+            path = re.sub(r"C:\\\\Users\\\\[^\\\\]+\\\\", r"C:\\\\Users\\\\<user>\\\\", path)
+            return re.sub(r"C:/Users/[^/]+/", "C:/Users/<user>/", path)
+
+        rng = random.Random(0)
+        fragments = ["/", "\\", "\\\\", "C:", "Users", "home", "bob", "a b", ".py", ":", "<user>"]
+        for _ in range(5000):
+            path = "".join(rng.choice(fragments) for _ in range(rng.randint(1, 14)))
+            assert sanitize_path(path) == reference(path), path
+
+    def test_repeated_paths_are_cached(self):
+        """Repeated frame paths should be served from the cache."""
+        privacy._sanitize_path_cached.cache_clear()
+        for _ in range(3):
+            assert sanitize_path("/home/alice/app/main.py") == "/home/<user>/app/main.py"
+        info = privacy._sanitize_path_cached.cache_info()
+        assert (info.hits, info.misses) == (2, 1)
+        assert info.maxsize == privacy.SANITIZED_PATH_CACHE_SIZE
+
 
 class TestIsSensitiveKey:
     """Tests for sensitive key detection."""
@@ -98,6 +130,44 @@ class TestIsSensitiveKey:
         assert not is_sensitive_key("version")
         assert not is_sensitive_key("debug")
 
+    def test_matches_linear_denylist_scan(self):
+        rng = random.Random(0)
+        words = sorted(PII_DENYLIST) + ["name", "count", "user", "id", "x", "-", "_", "Api", "KEY"]
+        for _ in range(5000):
+            key = "".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+            normalized = key.lower().replace("-", "_")
+            expected = any(entry in normalized for entry in PII_DENYLIST)
+            assert is_sensitive_key(key) is expected, key
+            assert is_sensitive_key(key) is expected, key
+
+    def test_denylist_mutation_is_picked_up(self):
+        assert not is_sensitive_key("tenant_name")
+        PII_DENYLIST.add("tenant")
+        try:
+            assert is_sensitive_key("tenant_name")
+        finally:
+            PII_DENYLIST.discard("tenant")
+        assert not is_sensitive_key("tenant_name")
+
+        denylist = PII_DENYLIST
+        denylist |= {"workspace"}
+        try:
+            assert is_sensitive_key("workspace_id")
+        finally:
+            PII_DENYLIST.remove("workspace")
+        assert not is_sensitive_key("workspace_id")
+
+    def test_replaced_denylist_is_used(self, monkeypatch):
+        monkeypatch.setattr(privacy, "PII_DENYLIST", {"tenant"})
+        assert is_sensitive_key("Tenant-Name")
+        assert not is_sensitive_key("password")
+        privacy.PII_DENYLIST.add("password")
+        assert is_sensitive_key("password")
+
+    def test_empty_denylist_flags_nothing(self, monkeypatch):
+        monkeypatch.setattr(privacy, "PII_DENYLIST", privacy._DenyList())
+        assert not is_sensitive_key("password")
+
 
 class TestScrubString:
     """Tests for string content scrubbing."""
@@ -132,6 +202,112 @@ class TestScrubString:
         assert scrub_string(original) == original
 
 
+def _random_strings(count, seed=0):
+    """Strings built from fragments that sit near the sensitive patterns' edges."""
+    rng = random.Random(seed)
+    fragments = [
+        "a", "Z", "_", "é", " ", "\n", "-", ".", "+", "/", "=", "@", "%", "[", "]",
+        "com", "io", "x.y", "Bearer", "Bearer ", "bearer ", "user",
+        "555", "1234", "12", "0", "4111-1111-1111-1111", "555-123-4567", "123-45-6789",
+        "+1 5551234567", "user@example.com",
+    ]
+
+    def run(alphabet):
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(28, 44)))
+
+    strings = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 10)):
+            roll = rng.random()
+            if roll < 0.1:
+                parts.append(run("abcXYZ0189"))
+            elif roll < 0.15:
+                parts.append(run("abcXYZ0189+/"))
+            elif roll < 0.25:
+                parts.append("".join(rng.choice("0123456789") for _ in range(rng.randint(1, 17))))
+            else:
+                parts.append(rng.choice(fragments))
+        strings.append("".join(parts))
+    return strings
+
+
+class TestScrubStringEngine:
+    """The merged detector must never change what scrub_string redacts."""
+
+    def test_matches_sequential_reference(self):
+        for value in _random_strings(5000):
+            assert scrub_string(value) == privacy._scrub_string_sequential(value), value
+
+    @pytest.mark.parametrize("pattern", privacy.SENSITIVE_PATTERNS, ids=lambda p: p.pattern)
+    def test_each_rewrite_detects_exactly_its_pattern(self, pattern):
+        rewrite = re.compile(privacy._DETECTION_REWRITES.get(pattern.pattern, pattern.pattern))
+        for value in _random_strings(3000, seed=1):
+            assert (rewrite.search(value) is None) == (pattern.search(value) is None), value
+
+    def test_clean_string_is_returned_unchanged(self):
+        value = "module openadapt_telemetry.posthog loaded"
+        assert scrub_string(value) is value
+
+    def test_redactions_cascade_as_before(self):
+        # The email's redaction puts a word boundary in front of the digits.
+        assert scrub_string("user@example.com5551234567") == "[REDACTED][REDACTED]"
+
+    def test_detector_follows_pattern_list_changes(self, monkeypatch):
+        monkeypatch.setattr(
+            privacy, "SENSITIVE_PATTERNS", [*privacy.SENSITIVE_PATTERNS, re.compile("hunter2")]
+        )
+        assert scrub_string("pw hunter2") == "pw [REDACTED]"
+        monkeypatch.setattr(
+            privacy, "SENSITIVE_PATTERNS", [re.compile("secret", re.IGNORECASE)]
+        )
+        assert scrub_string("a SECRET") == "a [REDACTED]"
+
+
+class TestScrubPrefilter:
+    """Strings the pre-filter rules out must be ones no pattern matches."""
+
+    ALPHABET = "abzAZ_é -./:=@+%01239٣\n\tBearer"
+
+    def _short_strings(self, count, seed):
+        rng = random.Random(seed)
+        return [
+            "".join(rng.choice(self.ALPHABET) for _ in range(rng.randint(0, 45)))
+            for _ in range(count)
+        ]
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_never_skips_a_string_the_scrubber_would_change(self, seed):
+        strings = self._short_strings(4000, seed) + _random_strings(1000, seed=seed + 10)
+        skipped = 0
+        for value in strings:
+            if privacy._could_be_sensitive(value):
+                continue
+            skipped += 1
+            assert privacy._scrub_string_sequential(value) == value, value
+            for pattern in privacy.SENSITIVE_PATTERNS:
+                assert pattern.search(value) is None, (pattern.pattern, value)
+        assert skipped > 500
+
+    def test_common_strings_are_returned_without_scanning(self):
+        detector = MagicMock()
+        with patch.object(privacy, "_sensitive_detector", return_value=(True, detector)):
+            for value in ("openadapt_telemetry.posthog", "KeyError: 'missing_key'", "step 12"):
+                assert scrub_string(value) is value
+        detector.search.assert_not_called()
+
+    def test_boundary_cases_still_scrubbed(self):
+        assert scrub_string("id 123-45-6789") == "id [REDACTED]"
+        assert scrub_string("a@b.co") == "[REDACTED]"
+        assert scrub_string("Bearer x") == "[REDACTED]"
+        assert scrub_string("+1 555") == "[REDACTED]"
+        assert scrub_string("x" * 32) == "[REDACTED]"
+
+    def test_disabled_for_custom_patterns(self, monkeypatch):
+        monkeypatch.setattr(privacy, "SENSITIVE_PATTERNS", [re.compile("internal-host")])
+        assert scrub_string("at internal-host") == "at [REDACTED]"
+
+
 class TestScrubDict:
     """Tests for dictionary scrubbing."""
 
@@ -314,6 +490,45 @@ class TestAnonymizeIdentifier:
         assert value.startswith("anon:v2:")
         assert value != "anon:user@example.com"
 
+    def test_digest_matches_fresh_hmac(self):
+        """Cloned HMAC state must produce the same digest as a freshly keyed one."""
+        for salt in ("a" * 32, "b" * 32):
+            with patch("openadapt_telemetry.privacy._get_anon_salt_cached", return_value=salt):
+                for value in ("user@example.com", "42", "ü-ß", "x" * 200):
+                    digest = hmac.new(salt.encode(), value.encode(), hashlib.sha256).hexdigest()
+                    assert anonymize_identifier(value) == f"anon:v2:{digest[:16]}"
+                    assert anonymize_identifier(value, prefix="user") == f"user:v2:{digest[:16]}"
+
+    def test_canonical_format_check_matches_original_patterns(self):
+        """The compiled format check must agree with the four original patterns."""
+        rng = random.Random(0)
+        fragments = ["anon", "a.n", "user", ":", "v1", "v2", "v3", "unknown", "0123456789abcdef", "f", "G", "\n"]
+        for _ in range(5000):
+            value = "".join(rng.choice(fragments) for _ in range(rng.randint(1, 6)))
+            for prefix in ("anon", "a.n"):
+                escaped = re.escape(prefix)
+                expected = any(
+                    re.match(pattern, value)
+                    for pattern in (
+                        rf"^{escaped}:v2:[0-9a-f]{{16}}$",
+                        rf"^{escaped}:v1:[0-9a-f]{{16}}$",
+                        rf"^{escaped}:[0-9a-f]{{16}}$",
+                        rf"^{escaped}:v2:unknown$",
+                    )
+                )
+                assert privacy._is_already_anonymized(value, prefix=prefix) == expected, value
+
+    def test_repeated_identifiers_are_cached_per_salt(self):
+        privacy._pseudonym.cache_clear()
+        with patch("openadapt_telemetry.privacy._get_anon_salt_cached", return_value="a" * 32):
+            first = anonymize_identifier("user@example.com")
+            assert anonymize_identifier(" user@example.com ") == first
+        with patch("openadapt_telemetry.privacy._get_anon_salt_cached", return_value="b" * 32):
+            assert anonymize_identifier("user@example.com") != first
+        info = privacy._pseudonym.cache_info()
+        assert (info.hits, info.misses) == (1, 2)
+        assert info.maxsize == privacy.MAX_CACHED_PSEUDONYMS
+
 
 class TestBeforeSendUserScrubbing:
     """Tests for user context anonymization in before_send."""
@@ -0,0 +1,133 @@
+"""Tests for compact queued events and the byte-bounded queue."""
+
+from __future__ import annotations
+
+import json
+import queue
+import threading
+
+import pytest
+
+from openadapt_telemetry import queueing
+from openadapt_telemetry.queueing import ByteBoundedQueue, QueuedEvent
+
+
+def _event(**properties) -> QueuedEvent:  # noqa: ANN003
+    return QueuedEvent(
+        api_key="phc_test",
+        event="agent_run",
+        distinct_id="d",
+        context={"package": "openadapt", "version": "1.0"},
+        properties=properties,
+        timestamp=1_700_000_000.5,
+    )
+
+
+def test_queued_event_payload_matches_wire_shape() -> None:
+    payload = _event(mode="live", package="override", **{"$geoip_disable": False}).to_payload()
+    assert payload == {
+        "api_key": "phc_test",
+        "event": "agent_run",
+        "distinct_id": "d",
+        "properties": {
+            "package": "override",
+            "version": "1.0",
+            "timestamp": 1_700_000_000,
+            "mode": "live",
+            "$geoip_disable": True,
+        },
+    }
+
+
+def test_queued_event_size_grows_with_properties() -> None:
+    assert _event(note="x" * 1000).size - _event().size >= 1000
+
+
+def test_queue_is_bounded_by_bytes() -> None:
+    q = ByteBoundedQueue(max_bytes=100, item_size=len)
+    q.put_nowait("a" * 60)
+    with pytest.raises(queue.Full):
+        q.put_nowait("b" * 60)
+    q.put_nowait("c" * 40)
+    assert q.bytes == 100
+    assert q.get_nowait() == "a" * 60
+    assert q.bytes == 40
+    q.put_nowait("b" * 60)
+    assert q.qsize() == 2
+
+
+def test_oversized_item_is_accepted_into_empty_queue() -> None:
+    q = ByteBoundedQueue(max_bytes=10, item_size=len)
+    q.put_nowait("x" * 50)
+    with pytest.raises(queue.Full):
+        q.put_nowait("y")
+    assert q.get_nowait() == "x" * 50
+    assert q.bytes == 0
+
+
+def test_zero_max_bytes_is_unbounded() -> None:
+    q = ByteBoundedQueue(max_bytes=0, item_size=len)
+    for _ in range(100):
+        q.put_nowait("x" * 1000)
+    assert q.bytes == 100_000
+
+
+def test_blocking_put_waits_for_room() -> None:
+    q = ByteBoundedQueue(max_bytes=10, item_size=len)
+    q.put_nowait("x" * 10)
+    with pytest.raises(queue.Full):
+        q.put("y", timeout=0.01)
+    threading.Timer(0.05, q.get_nowait).start()
+    q.put("y", timeout=2.0)
+    assert q.get_nowait() == "y"
+    q.task_done()
+    q.task_done()
+    q.join()
+
+
+@pytest.fixture
+def stdlib_json(monkeypatch):  # noqa: ANN001, ANN201
+    monkeypatch.setattr(queueing, "_orjson", None)
+
+
+def _reference(event: QueuedEvent) -> bytes:
+    payload = event.to_payload()
+    del payload["api_key"]
+    return json.dumps(payload).encode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "properties",
+    [
+        {},
+        {"mode": "live", "step": 3, "ok": True, "ratio": 0.25, "none": None},
+        {"note": 'café ☃ "quoted"\n'},
+        {"package": "override", "version": 2},  # overrides the context
+        {"timestamp": 5, "$geoip_disable": False},  # reserved keys
+        {"tags": ["a", "b"], "nested": {"k": 1}},
+    ],
+)
+def test_encode_matches_reference_encoder(stdlib_json, properties) -> None:  # noqa: ANN001
+    event = _event(**properties)
+    assert event.encode() == _reference(event)
+    assert event.encode() == _reference(event)  # from the cached fragments
+
+
+def test_encode_with_empty_context(stdlib_json) -> None:  # noqa: ANN001
+    event = QueuedEvent("k", "e", "d", {}, {"a": 1}, 10.0)
+    assert event.encode() == _reference(event)
+
+
+def test_encode_does_not_reuse_fragments_of_another_context(stdlib_json) -> None:  # noqa: ANN001
+    first = QueuedEvent("k", "e", "d", {"package": "one"}, {}, 10.0)
+    assert first.encode() == _reference(first)
+    second = QueuedEvent("k", "e", "d", {"package": "two"}, {}, 10.0)
+    assert b'"two"' in second.encode()
+
+
+def test_encode_with_orjson_decodes_to_reference() -> None:
+    pytest.importorskip("orjson")
+    # orjson rejects integers beyond 64 bits; those fall back to the stdlib.
+    for properties in ({"mode": "live", "note": "café"}, {"big": 2**70}):
+        event = QueuedEvent("k", "e", "d", {"package": "openadapt"}, properties, 10.0)
+        assert json.loads(event.encode()) == json.loads(_reference(event))
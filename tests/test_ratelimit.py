@@ -0,0 +1,51 @@
+"""Tests for PostHog event rate limiting."""
+
+from __future__ import annotations
+
+from openadapt_telemetry.ratelimit import RateLimiter, TokenBucket
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_allows_burst_then_refills() -> None:
+    bucket = TokenBucket(rate=2.0, burst=3.0, now=0.0)
+    assert [bucket.take(0.0) for _ in range(4)] == [True, True, True, False]
+    assert bucket.take(0.4) is False
+    assert bucket.take(0.5) is True
+    # Refill is capped at the burst size.
+    assert [bucket.take(100.0) for _ in range(4)] == [True, True, True, False]
+
+
+def test_suppressed_count_rides_next_admitted_event() -> None:
+    clock = _Clock()
+    limiter = RateLimiter(event_rate=1.0, event_burst=1.0, clock=clock)
+    assert limiter.admit("action_executed", "openadapt") == 0
+    assert [limiter.admit("action_executed", "openadapt") for _ in range(5)] == [None] * 5
+    assert limiter.admit("agent_run", "openadapt") == 0
+    clock.now += 1.0
+    assert limiter.admit("action_executed", "openadapt") == 5
+    clock.now += 1.0
+    assert limiter.admit("action_executed", "openadapt") == 0
+
+
+def test_package_bucket_is_shared_across_event_names() -> None:
+    clock = _Clock()
+    limiter = RateLimiter(package_rate=1.0, package_burst=2.0, clock=clock)
+    assert limiter.admit("a", "openadapt-evals") == 0
+    assert limiter.admit("b", "openadapt-evals") == 0
+    assert limiter.admit("c", "openadapt-evals") is None
+    assert limiter.admit("d", "openadapt-ml") == 0
+    clock.now += 1.0
+    assert limiter.admit("c", "openadapt-evals") == 1
+
+
+def test_zero_rates_disable_limiting() -> None:
+    limiter = RateLimiter()
+    assert limiter.enabled is False
+    assert all(limiter.admit("a", "p") == 0 for _ in range(100))
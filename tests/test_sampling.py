@@ -0,0 +1,37 @@
+"""Tests for per-event-name usage sampling."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from openadapt_telemetry.sampling import UsageSampler
+
+
+def test_keeps_exactly_rate_fraction_with_weight() -> None:
+    sampler = UsageSampler({"action_*": 0.25})
+    weights = [sampler.weight("action_executed") for _ in range(1000)]
+    kept = [w for w in weights if w is not None]
+    assert len(kept) == 250
+    assert set(kept) == {4.0}
+
+
+def test_first_matching_rule_wins_and_unmatched_events_are_kept() -> None:
+    sampler = UsageSampler({"action_click": 1.0, "action_*": 0.0})
+    assert sampler.weight("action_click") == 1.0
+    assert sampler.weight("action_type") is None
+    assert sampler.weight("agent_run") == 1.0
+    assert sampler.weight("Action_type") == 1.0  # patterns are case-sensitive
+
+
+def test_random_phase_is_drawn_once_per_event_name() -> None:
+    sampler = UsageSampler({"*": 0.5})
+    with patch("openadapt_telemetry.sampling.random.random", return_value=0.0) as rng:
+        for _ in range(100):
+            sampler.weight("a")
+            sampler.weight("b")
+    assert rng.call_count == 2
+
+
+def test_no_rules_keeps_everything() -> None:
+    sampler = UsageSampler({})
+    assert all(sampler.weight("anything") == 1.0 for _ in range(10))
@@ -0,0 +1,177 @@
+"""Tests for the durable PostHog event spool."""
+
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+from openadapt_telemetry.spool import Spool
+
+
+def _records(n: int, start: int = 0) -> list[dict]:
+    return [{"event": f"e{i}", "properties": {"i": i}} for i in range(start, start + n)]
+
+
+def _replay_all(spool: Spool) -> list[dict]:
+    sent: list[dict] = []
+
+    def send(chunk):  # noqa: ANN001, ANN202
+        sent.extend(chunk)
+        return True
+
+    spool.replay(send, chunk_size=3)
+    return sent
+
+
+def test_records_replay_in_order_after_close(tmp_path) -> None:  # noqa: ANN001
+    spool = Spool(tmp_path)
+    spool.append(_records(4))
+    spool.append(_records(3, start=4))
+    assert spool.pending_segments() == 0  # the active segment is not replayable yet
+    spool.close()
+    assert [r["event"] for r in _replay_all(spool)] == [f"e{i}" for i in range(7)]
+    assert spool.pending_segments() == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_segments_rotate_at_size(tmp_path) -> None:  # noqa: ANN001
+    spool = Spool(tmp_path, segment_max_bytes=64)
+    spool.append(_records(6))
+    spool.close()
+    assert spool.pending_segments() > 1
+    assert [r["event"] for r in _replay_all(spool)] == [f"e{i}" for i in range(6)]
+
+
+def test_size_cap_evicts_oldest_segments(tmp_path) -> None:  # noqa: ANN001
+    spool = Spool(tmp_path, segment_max_bytes=40, max_bytes=120)
+    spool.append(_records(20))
+    spool.close()
+    assert spool.evicted_segments > 0
+    replayed = [r["properties"]["i"] for r in _replay_all(spool)]
+    assert replayed == sorted(replayed)
+    assert replayed[-1] == 19
+    assert replayed[0] > 0
+
+
+def test_failed_send_keeps_undelivered_records(tmp_path) -> None:  # noqa: ANN001
+    spool = Spool(tmp_path)
+    spool.append(_records(7))
+    spool.close()
+    calls = []
+
+    def flaky(chunk):  # noqa: ANN001, ANN202
+        calls.append(chunk)
+        return len(calls) == 1
+
+    assert spool.replay(flaky, chunk_size=3) == 3
+    assert [r["event"] for r in _replay_all(spool)] == [f"e{i}" for i in range(3, 7)]
+
+
+def test_torn_final_line_is_skipped(tmp_path) -> None:  # noqa: ANN001
+    spool = Spool(tmp_path)
+    spool.append(_records(2))
+    spool.close()
+    (segment,) = tmp_path.glob("*.seg")
+    with open(segment, "ab") as f:
+        f.write(b'{"event": "tor')
+    assert [r["event"] for r in _replay_all(spool)] == ["e0", "e1"]
+
+
+def test_open_segment_of_dead_process_is_recovered(tmp_path) -> None:  # noqa: ANN001
+    orphan = tmp_path / f"{1:020d}-{2**22 + 12345}.open"
+    orphan.write_bytes(b'{"event":"orphan"}\n')
+    spool = Spool(tmp_path)
+    assert [r["event"] for r in _replay_all(spool)] == ["orphan"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Windows recovers open segments by age")
+def test_idle_open_segment_of_live_process_is_left_alone(tmp_path) -> None:  # noqa: ANN001
+    segment = tmp_path / f"{1:020d}-{os.getppid()}.open"
+    segment.write_bytes(b'{"event":"live"}\n')
+    idle = time.time() - 10 * 3600
+    os.utime(segment, (idle, idle))
+    spool = Spool(tmp_path)
+    assert spool.pending_segments() == 0
+    assert segment.exists()
+
+
+def test_writer_survives_its_segment_being_recovered(tmp_path) -> None:  # noqa: ANN001
+    spool = Spool(tmp_path)
+    spool.append(_records(2))
+    (segment,) = tmp_path.glob("*.open")
+    os.replace(segment, segment.with_suffix(".seg"))  # as another process's recovery would
+    assert [r["event"] for r in _replay_all(Spool(tmp_path))] == ["e0", "e1"]
+    spool.close()
+    assert spool.append(_records(1, start=2)) == 1
+    spool.close()
+    assert [r["event"] for r in _replay_all(spool)] == ["e2"]
+
+
+def test_claimed_segment_is_not_replayed_twice(tmp_path) -> None:  # noqa: ANN001
+    spool = Spool(tmp_path)
+    spool.append(_records(2))
+    spool.close()
+    (segment,) = tmp_path.glob("*.seg")
+    os.replace(segment, segment.with_suffix(".claimed"))
+    assert _replay_all(Spool(tmp_path)) == []
+
+
+def _usage_records(n: int) -> list[dict]:
+    return [
+        {
+            "api_key": "phc_test",
+            "event": "action_executed",
+            "distinct_id": "d",
+            "timestamp": f"2026-01-01T00:00:{i:02d}+00:00",
+            "properties": {
+                "package": "openadapt",
+                "version": "1.0.0",
+                "platform": "linux",
+                "step": i,
+                "flag": i == 0,
+                "$geoip_disable": True,
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def test_hoisted_records_round_trip(tmp_path) -> None:  # noqa: ANN001
+    records = _usage_records(5)
+    records[1]["properties"]["version"] = 1  # differs from the rest, so not hoisted
+    records[2]["properties"]["flag"] = 1  # equal to True but a different JSON type
+    spool = Spool(tmp_path, hoist_shared=True)
+    assert spool.append(records) == 5
+    spool.close()
+    (segment,) = tmp_path.glob("*.seg")
+    assert segment.read_bytes().count(b'"platform"') == 1
+    assert _replay_all(spool) == records
+
+
+def test_hoisting_shrinks_the_spool(tmp_path) -> None:  # noqa: ANN001
+    sizes = []
+    for hoist in (False, True):
+        directory = tmp_path / str(hoist)
+        spool = Spool(directory, hoist_shared=hoist)
+        spool.append(_usage_records(50))
+        spool.close()
+        sizes.append(sum(path.stat().st_size for path in directory.iterdir()))
+    assert sizes[1] < sizes[0] * 0.7
+
+
+def test_failed_replay_rewrites_hoisted_remainder(tmp_path) -> None:  # noqa: ANN001
+    records = _usage_records(7)
+    spool = Spool(tmp_path, hoist_shared=True)
+    spool.append(records)
+    spool.close()
+    assert spool.replay(lambda chunk: False, chunk_size=3) == 0
+    (segment,) = tmp_path.glob("*.seg")
+    assert segment.read_bytes().startswith(b"[")
+    assert _replay_all(spool) == records
+
+
+def test_malformed_hoisted_lines_are_skipped(tmp_path) -> None:  # noqa: ANN001
+    (tmp_path / f"{1:020d}-1.seg").write_bytes(b'[]\n["x"]\n[{"api_key":"k"},{"event":"kept"},3]\n')
+    assert _replay_all(Spool(tmp_path)) == [{"api_key": "k", "event": "kept"}]
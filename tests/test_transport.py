@@ -0,0 +1,349 @@
+"""Tests for the keep-alive telemetry transport."""
+
+from __future__ import annotations
+
+import base64
+import socket
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+
+from openadapt_telemetry.transport import (
+    CircuitBreaker,
+    ConnectionPool,
+    RetryPolicy,
+    TransportResponse,
+    _parse_retry_after,
+    _ResumingHTTPSConnection,
+    _SessionCache,
+    send_with_retry,
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length", "0"))
+        body = self.rfile.read(length)
+        self.server.requests.append((self.path, self.client_address, body, dict(self.headers)))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        for name, value in self.server.extra_headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "2")
+        if self.server.close_after_response:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(b"ok")
+        if self.server.drop_after_response:
+            # Close without telling the client, like an idle timeout on the server.
+            self.close_connection = True
+
+    def log_message(self, format, *args):  # noqa: A002, ANN001, ANN002
+        return
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.requests = []
+    httpd.statuses = []
+    httpd.extra_headers = {}
+    httpd.close_after_response = False
+    httpd.drop_after_response = False
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _base_url(httpd) -> str:  # noqa: ANN001
+    host, port = httpd.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def test_requests_reuse_one_connection(server) -> None:  # noqa: ANN001
+    pool = ConnectionPool(_base_url(server))
+    for _ in range(5):
+        response = pool.request("POST", "/batch/", b"{}", {"Content-Type": "application/json"})
+        assert response.status == 200
+    pool.close()
+    assert len(server.requests) == 5
+    assert len({client for _, client, _, _ in server.requests}) == 1
+    assert server.requests[0][3]["User-Agent"].startswith("openadapt-telemetry-posthog")
+
+
+def test_reconnects_after_server_closes_idle_connection(server) -> None:  # noqa: ANN001
+    server.close_after_response = True
+    pool = ConnectionPool(_base_url(server))
+    assert pool.request("POST", "/batch/", b"{}").status == 200
+    assert pool.request("POST", "/batch/", b"{}").status == 200
+    pool.close()
+    assert len(server.requests) == 2
+    assert len({client for _, client, _, _ in server.requests}) == 2
+
+
+def test_stale_idle_connection_is_retried_transparently(server) -> None:  # noqa: ANN001
+    server.drop_after_response = True
+    pool = ConnectionPool(_base_url(server))
+    assert pool.request("POST", "/batch/", b"{}").status == 200
+    time.sleep(0.05)
+    assert pool.request("POST", "/batch/", b"{}").status == 200
+    pool.close()
+    assert len(server.requests) == 2
+
+
+def test_response_headers_are_lowercased(server) -> None:  # noqa: ANN001
+    server.statuses = [429]
+    server.extra_headers = {"Retry-After": "3"}
+    pool = ConnectionPool(_base_url(server))
+    response = pool.request("POST", "/batch/", b"{}")
+    pool.close()
+    assert response.status == 429
+    assert response.headers["retry-after"] == "3"
+
+
+def test_connection_refused_raises() -> None:
+    pool = ConnectionPool("http://127.0.0.1:9", timeout=0.5)
+    with pytest.raises(OSError):
+        pool.request("POST", "/batch/", b"{}")
+
+
+def test_rejects_unsupported_scheme() -> None:
+    with pytest.raises(ValueError):
+        ConnectionPool("ftp://example.com")
+
+
+def _use_proxy(monkeypatch, scheme: str, url: str) -> None:  # noqa: ANN001
+    for name in ("http_proxy", "https_proxy", "all_proxy", "no_proxy", "REQUEST_METHOD"):
+        monkeypatch.delenv(name, raising=False)
+        monkeypatch.delenv(name.upper(), raising=False)
+    monkeypatch.setenv(f"{scheme}_proxy", url)
+
+
+def test_http_proxy_gets_absolute_uri_and_credentials(server, monkeypatch) -> None:  # noqa: ANN001
+    host, port = server.server_address[:2]
+    _use_proxy(monkeypatch, "http", f"http://user:p%40ss@{host}:{port}")
+    pool = ConnectionPool("http://ingest.example:8080/base")
+    assert pool.request("POST", "/batch/", b"{}").status == 200
+    pool.close()
+    path, _, _, headers = server.requests[0]
+    assert path == "http://ingest.example:8080/base/batch/"
+    assert headers["Host"] == "ingest.example:8080"
+    assert headers["Proxy-Authorization"] == f"Basic {base64.b64encode(b'user:p@ss').decode()}"
+
+
+@pytest.fixture
+def connect_proxy():
+    """A proxy that records one CONNECT request and refuses it with 407."""
+    listener = socket.create_server(("127.0.0.1", 0))
+    requests: list[str] = []
+
+    def serve() -> None:
+        conn, _ = listener.accept()
+        with conn:
+            data = b""
+            while b"\r\n\r\n" not in data:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+            requests.append(data.decode("latin-1"))
+            conn.sendall(b"HTTP/1.1 407 Proxy Authentication Required\r\nContent-Length: 0\r\n\r\n")
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield listener.getsockname()[:2], requests
+    listener.close()
+
+
+@pytest.mark.parametrize("userinfo", ["user:p%40ss@", ""])
+def test_https_proxy_tunnel_sends_credentials(connect_proxy, monkeypatch, userinfo) -> None:  # noqa: ANN001
+    (host, port), requests = connect_proxy
+    _use_proxy(monkeypatch, "https", f"http://{userinfo}{host}:{port}")
+    pool = ConnectionPool("https://ingest.example")
+    with pytest.raises(OSError, match="407"):
+        pool.request("POST", "/batch/", b"{}")
+    (connect,) = requests
+    assert connect.startswith("CONNECT ingest.example:443 HTTP/1.")
+    expected = f"Proxy-Authorization: Basic {base64.b64encode(b'user:p@ss').decode()}"
+    assert (expected in connect) == bool(userinfo)
+
+
+class _FakeTLSContext:
+    """Stands in for an SSLContext, recording the session offered on each handshake."""
+
+    verify_mode = ssl.CERT_REQUIRED
+    check_hostname = True
+
+    def __init__(self, reject_sessions: bool = False) -> None:
+        self.offered: list[object] = []
+        self.reject_sessions = reject_sessions
+
+    def wrap_socket(self, sock, server_hostname=None, session=None):  # noqa: ANN001, ANN201
+        self.offered.append(session)
+        if session is not None and self.reject_sessions:
+            raise ssl.SSLError("session rejected")
+        sock.close()
+        wrapped = MagicMock(spec=ssl.SSLSocket)
+        wrapped.session = f"session-{len(self.offered)}"
+        return wrapped
+
+
+@pytest.fixture
+def tcp_listener():
+    listener = socket.create_server(("127.0.0.1", 0))
+    yield listener.getsockname()[:2]
+    listener.close()
+
+
+def _tls_connection(address, context, cache) -> _ResumingHTTPSConnection:  # noqa: ANN001
+    host, port = address
+    return _ResumingHTTPSConnection(host, port, timeout=1.0, context=context, session_cache=cache)
+
+
+def test_reconnect_resumes_cached_tls_session(tcp_listener) -> None:  # noqa: ANN001
+    cache, context = _SessionCache(), _FakeTLSContext()
+    first = _tls_connection(tcp_listener, context, cache)
+    first.connect()
+    first.remember_session()
+    first.close()
+    second = _tls_connection(tcp_listener, context, cache)
+    second.connect()
+    second.close()
+    assert context.offered == [None, "session-1"]
+
+
+def test_rejected_tls_session_falls_back_to_full_handshake(tcp_listener) -> None:  # noqa: ANN001
+    cache, context = _SessionCache(), _FakeTLSContext(reject_sessions=True)
+    cache.session = "stale"
+    conn = _tls_connection(tcp_listener, context, cache)
+    conn.connect()
+    conn.close()
+    assert context.offered == ["stale", None]
+    assert cache.session is None
+
+
+class _FakePool:
+    def __init__(self, outcomes) -> None:  # noqa: ANN001
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, path, body, headers=None):  # noqa: ANN001, ANN201
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_backoff_is_bounded_and_jittered() -> None:
+    policy = RetryPolicy(max_retries=3, base_delay=1.0, max_delay=3.0)
+    for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 3.0)):
+        delays = [policy.backoff(attempt) for _ in range(50)]
+        assert all(0.0 <= d <= ceiling for d in delays)
+        assert len(set(delays)) > 1
+    assert policy.backoff(4) is None
+
+
+def test_backoff_honors_retry_after() -> None:
+    policy = RetryPolicy(max_retries=2, max_delay=5.0)
+    assert policy.backoff(1, retry_after=2.0) == 2.0
+    assert policy.backoff(1, retry_after=60.0) is None
+
+
+def test_parse_retry_after_forms() -> None:
+    assert _parse_retry_after("3") == 3.0
+    assert _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert _parse_retry_after("soon") is None
+    assert _parse_retry_after(None) is None
+
+
+def test_retries_5xx_then_succeeds() -> None:
+    pool = _FakePool([TransportResponse(503), ConnectionResetError(), TransportResponse(200)])
+    sleeps = []
+    ok = send_with_retry(
+        pool, "POST", "/batch/", b"{}", policy=RetryPolicy(max_retries=2), sleep=sleeps.append
+    )
+    assert ok is True
+    assert pool.calls == 3
+    assert len(sleeps) == 2
+
+
+def test_client_errors_are_not_retried() -> None:
+    pool = _FakePool([TransportResponse(400)])
+    assert send_with_retry(pool, "POST", "/batch/", b"{}", sleep=lambda _: None) is True
+    assert pool.calls == 1
+
+
+def test_gives_up_after_max_retries() -> None:
+    pool = _FakePool([TransportResponse(500)] * 3)
+    ok = send_with_retry(
+        pool, "POST", "/batch/", b"{}", policy=RetryPolicy(max_retries=2), sleep=lambda _: None
+    )
+    assert ok is False
+    assert pool.calls == 3
+
+
+def test_429_retry_after_is_respected() -> None:
+    pool = _FakePool([TransportResponse(429, {"retry-after": "1.5"}), TransportResponse(200)])
+    clock = _Clock()
+    sleeps = []
+
+    def sleep(delay: float) -> None:
+        sleeps.append(delay)
+        clock.now += delay
+
+    breaker = CircuitBreaker(clock=clock)
+    assert send_with_retry(pool, "POST", "/batch/", b"{}", breaker=breaker, sleep=sleep) is True
+    assert sleeps == [1.5]
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_opens_after_consecutive_failures_and_probes() -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=30.0, clock=clock)
+    pool = _FakePool([OSError("down")] * 2)
+    policy = RetryPolicy(max_retries=5)
+    assert (
+        send_with_retry(
+            pool, "POST", "/", b"", policy=policy, breaker=breaker, sleep=lambda _: None
+        )
+        is False
+    )
+    assert pool.calls == 2
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # While open, nothing is dialed.
+    assert send_with_retry(pool, "POST", "/", b"", policy=policy, breaker=breaker) is False
+    assert pool.calls == 2
+
+    # After the cooldown a single failed probe re-opens the circuit.
+    clock.now += 30.0
+    pool.outcomes = [OSError("still down")]
+    assert (
+        send_with_retry(
+            pool, "POST", "/", b"", policy=policy, breaker=breaker, sleep=lambda _: None
+        )
+        is False
+    )
+    assert pool.calls == 3
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 30.0
+    pool.outcomes = [TransportResponse(200)]
+    assert send_with_retry(pool, "POST", "/", b"", policy=policy, breaker=breaker) is True
+    assert breaker.state == CircuitBreaker.CLOSED